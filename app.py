@@ -2,7 +2,10 @@ import streamlit as st
 import os
 import time
 import asyncio
+import uuid
 from generator import ReelGenerator
+from jobs import RenderQueue
+from render_manifest import MANIFEST_FILE
 from utils import estimate_duration
 
 # Page Config
@@ -82,6 +85,22 @@ with st.sidebar:
 if 'generator' not in st.session_state:
     st.session_state.generator = ReelGenerator()
 
+# One render queue per server process, shared by every session
+@st.cache_resource
+def get_render_queue():
+    queue = RenderQueue()
+    queue.warm_up()
+    return queue
+
+# Workers start (and warm up) while the user is still writing the script
+get_render_queue()
+if 'preview_name' not in st.session_state:
+    st.session_state.preview_name = f"preview_{uuid.uuid4().hex[:12]}"
+
+def preview_dir():
+    """This session's folder for voice previews and drafts, cleaned up with the queue's jobs."""
+    return get_render_queue().preview_dir(st.session_state.preview_name)
+
 # Helper for Voice Preview
 def play_voice_preview(text, voice, speed):
     """Generates and plays a quick voice sample."""
@@ -93,7 +112,8 @@ def play_voice_preview(text, voice, speed):
             rate_str = f"{rate_val:+d}%"
             # We use a temp method or just call generate_audio logic here
             # Re-using internal method for simplicity (hacky but works fast)
-            path = asyncio.run(st.session_state.generator.generate_audio(text, voice, rate_str))
+            # Per-session folder so concurrent previews don't overwrite each other
+            path = asyncio.run(st.session_state.generator.generate_audio(text, voice, rate_str, work_dir=preview_dir()))
             st.audio(path)
         except Exception as e:
             st.error(f"Preview failed: {e}")
@@ -149,12 +169,22 @@ with col_right:
         tab1, tab2 = st.tabs(["Appearance", "Layout"])
         
         with tab1:
-            bg_type = st.radio("Background", ["Solid Color", "Transparent (WebM)"], horizontal=True)
+            bg_type = st.radio("Background", ["Solid Color", "Transparent (WebM)", "Transparent (MOV)", "Overlay Pack (PNG)"], horizontal=True)
+            export = "video"
+            alpha_codec = "vp9"
             if bg_type == "Solid Color":
                 bg_color = st.color_picker("Background Hex", "#1E1E1E")
-            else:
+            elif bg_type == "Transparent (WebM)":
                 bg_color = "Transparent"
                 st.caption("ℹ️ Exports as WebM with alpha channel.")
+            elif bg_type == "Transparent (MOV)":
+                bg_color = "Transparent"
+                alpha_codec = "qtrle"
+                st.caption("ℹ️ Exports as lossless QuickTime Animation with alpha, for editing software. Much faster than WebM, but large files.")
+            else:
+                bg_color = "Transparent"
+                export = "overlay"
+                st.caption("ℹ️ Exports caption PNGs with a timing manifest, ASS/SRT subtitles and the voice track (ZIP). Much faster than an alpha video.")
                 
             text_color = st.color_picker("Text Color", "#FFFFFF")
             highlight_color = st.color_picker("Highlight Color", "#FF4B4B")
@@ -166,65 +196,122 @@ with col_right:
             font_size = st.slider("Text Size (px)", 40, 150, 80, 5)
             max_words = st.slider("Words per Chunk", 1, 10, 5, 1)
             position = st.selectbox("Vertical Align", ["Center", "Bottom"])
+            animation = st.selectbox("Highlight Animation", ["None", "Pop", "Fade", "Slide"])
+            animation = None if animation == "None" else animation.lower()
+            fps = st.select_slider("Frame Rate (fps)", [24, 30, 60], value=24)
 
 
 # Generate Actions
 st.markdown("---")
 gen_col1, gen_col2 = st.columns([2, 1])
 
+@st.fragment(run_every=1.0)
+def render_job_status():
+    """Polls the render queue for this session's job without blocking the page."""
+    job_id = st.session_state.get("job_id")
+    if not job_id:
+        return
+
+    info = get_render_queue().status(job_id)
+    if info["status"] == "queued":
+        st.info(f"⏳ Queued (position {info.get('position', '?')})...")
+    elif info["status"] == "running":
+        # The worker reports overall progress and a per-stage ETA with every event
+        st.progress(info["fraction"] or 0.0, text=f"⚙️ {info['message']}")
+    elif info["status"] == "done":
+        st.session_state.job_id = None
+        st.session_state.last_video = info["output_path"]
+        st.session_state.last_render_time = round(time.time() - st.session_state.job_started, 1)
+        st.session_state.last_metrics = info.get("metrics")
+        st.rerun()
+    else:
+        st.session_state.job_id = None
+        st.error(f"Generation Error: {info.get('error')}")
+
+def style_params():
+    return dict(
+        text=text_input,
+        voice_style=voice_key,
+        speed=speed,
+        bg_color=bg_color,
+        text_color=text_color,
+        highlight_color=highlight_color,
+        font_name=font_choice,
+        font_size=font_size,
+        max_words=max_words,
+        position=position
+    )
+
 with gen_col1:
-    if st.button("🚀 GENERATE REEL (Render Video)", type="primary", use_container_width=True):
+    # Opt-in: per-sentence TTS changes the prosody, and its audio never matches the
+    # whole-script voice preview's TTS cache entry
+    incremental = st.checkbox(
+        "Fast re-renders (voice per sentence)", value=False,
+        help="Re-voices and re-encodes only the sentences you edit. The voice is synthesized sentence by "
+             "sentence, so it sounds slightly different. Not used with highlight animations.",
+    )
+
+    # Drafts render in-session at low resolution; the voice comes from the TTS cache after the first run
+    if st.button("⚡ Draft Preview", use_container_width=True):
         if not text_input:
             st.error("Please enter a script first!")
         else:
-            with st.status("🎬 Production in progress...", expanded=True) as status:
-                progress_bar = st.progress(0)
-                
-                def p_callback(msg):
-                    status.write(f"⚙️ {msg}")
-                    if "Voice" in msg: progress_bar.progress(20)
-                    elif "Audio" in msg: progress_bar.progress(40)
-                    elif "Compositing" in msg: progress_bar.progress(70)
-                    elif "Final" in msg: progress_bar.progress(90)
-
+            with st.spinner("Rendering draft..."):
                 try:
-                    start_t = time.time()
-                    output_path = st.session_state.generator.generate_video(
-                        text=text_input,
-                        voice_style=voice_key,
-                        speed=speed,
-                        bg_color=bg_color,
-                        text_color=text_color,
-                        highlight_color=highlight_color,
-                        font_name=font_choice,
-                        font_size=font_size,
-                        max_words=max_words,
-                        position=position,
-                        progress_callback=p_callback
+                    st.session_state.draft_video = st.session_state.generator.generate_video(
+                        **style_params(), work_dir=preview_dir(), draft=True, incremental=incremental,
+                        animation=animation,
                     )
-                    end_t = time.time()
-                    
-                    progress_bar.progress(100)
-                    status.update(label="✅ Loop Completed!", state="complete", expanded=False)
-                    
-                    st.success(f"Video generated in {round(end_t - start_t, 1)}s")
-                    
-                    # Store output in session to persist across re-runs if needed
-                    st.session_state.last_video = output_path
-                    
                 except Exception as e:
-                    st.error(f"Generation Error: {e}")
-                    status.update(label="❌ Failed", state="error")
+                    st.error(f"Draft failed: {e}")
+
+    if st.button("🚀 GENERATE REEL (Full Quality Export)", type="primary", use_container_width=True):
+        if not text_input:
+            st.error("Please enter a script first!")
+        else:
+            # Each render runs in the shared worker pool with its own job directory,
+            # reusing whatever it can from the previous render's directory
+            params = dict(style_params(), export=export)
+            if export == "video":
+                params["incremental"] = incremental
+                params["alpha_codec"] = alpha_codec
+                params["animation"] = animation
+                params["fps"] = fps
+                if st.session_state.get("last_video"):
+                    last_dir = os.path.dirname(st.session_state.last_video)
+                    params["previous_manifest"] = os.path.join(last_dir, MANIFEST_FILE)
+            st.session_state.job_id = get_render_queue().submit(**params)
+            st.session_state.job_started = time.time()
+
+    render_job_status()
+
+    if st.session_state.get("last_render_time") and not st.session_state.get("job_id"):
+        st.success(f"Video generated in {st.session_state.last_render_time}s")
+        if st.session_state.get("last_metrics"):
+            with st.expander("Stage timings"):
+                stages = st.session_state.last_metrics["stages"]
+                st.table({name: {"seconds": s["wall_s"], "calls": s["calls"]} for name, s in stages.items()})
+                st.json(st.session_state.last_metrics["counters"])
 
 with gen_col2:
-    # Check if we have a generated video to show
-    if 'last_video' in st.session_state:
+    if st.session_state.get('draft_video') and os.path.exists(st.session_state.draft_video):
+        st.caption("Draft preview (low resolution)")
+        st.video(st.session_state.draft_video)
+
+    # Check if we have a generated video to show (old job folders are cleaned up)
+    if st.session_state.get('last_video') and os.path.exists(st.session_state.last_video):
         output_path = st.session_state.last_video
         
         # Determine format
-        if output_path.endswith(".webm"):
+        if output_path.endswith(".zip"):
+             mime = "application/zip"
+             ext = "zip"
+        elif output_path.endswith(".webm"):
              mime = "video/webm"
              ext = "webm"
+        elif output_path.endswith(".mov"):
+             mime = "video/quicktime"
+             ext = "mov"
         else:
              mime = "video/mp4"
              ext = "mp4"
@@ -240,4 +327,5 @@ with gen_col2:
             )
         
         # Preview might need restart or distinct key to refresh
-        st.video(output_path)
+        if ext not in ("zip", "mov"):
+            st.video(output_path)
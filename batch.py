@@ -0,0 +1,243 @@
+"""Headless batch renderer for CSV / JSONL manifests.
+
+Each manifest row holds a script (`text`) plus any generate_video style
+argument; missing ones fall back to DEFAULT_PARAMS, and columns that are not
+arguments are reported and ignored. Rows may carry an `id` column, otherwise
+the id is derived from the row's content. Every output goes to
+`<out_dir>/<id>.mp4` (or `.webm` / `.mov` for transparent backgrounds, by the
+row's `alpha_codec`, and `.zip` for `export=overlay` packs), and progress
+is recorded in `<out_dir>/batch_status.json` after each item, so re-running
+the same command skips items that already finished with the same parameters.
+
+    python batch.py scripts.csv --out renders/ --workers 4
+"""
+import argparse
+import csv
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from generator import ASPECT_SIZES, ReelGenerator
+from jobs import default_generator, run_render_job, warm_up_worker
+from render import output_extension
+
+STATUS_FILE = "batch_status.json"
+
+DEFAULT_PARAMS = {
+    "voice_style": "Andrew (Neural) - US Male",
+    "speed": 1.0,
+    "bg_color": "#1E1E1E",
+    "text_color": "#FFFFFF",
+    "highlight_color": "#FF4B4B",
+    "font_name": "Arial Bold",
+    "font_size": 80,
+    "max_words": 5,
+    "position": "Center",
+}
+# Render arguments a manifest cannot set: the worker supplies them
+RUNTIME_PARAMS = {"self", "progress_callback", "work_dir", "metrics", "progress", "previous_manifest"}
+
+
+def parse_bool(value):
+    """A manifest flag: JSON booleans, or true/false, yes/no, 1/0 in any case."""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "yes", "1"):
+        return True
+    if text in ("false", "no", "0"):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def parse_size(value):
+    """An output canvas: an ASPECT_SIZES name ("9:16"), "WxH", or a JSON [w, h] pair."""
+    if isinstance(value, str):
+        if value in ASPECT_SIZES:
+            return ASPECT_SIZES[value]
+        value = value.lower().split("x")
+    width, height = (int(v) for v in value)
+    return width, height
+
+
+PARAM_TYPES = {
+    "speed": float, "font_size": int, "max_words": int, "fps": int, "size": parse_size,
+    "draft": parse_bool, "incremental": parse_bool, "atlas": parse_bool,
+}
+
+
+def read_manifest(path):
+    """Reads manifest rows from a .csv or .jsonl file."""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def render_columns(export="video"):
+    """Manifest columns a row may set: the arguments of what its export runs, plus export itself.
+
+    Overlay packs (ReelGenerator.export_overlay) take no bg_color, but
+    run_render_job drops it, so a row may still carry the default.
+    """
+    method = ReelGenerator.export_overlay if export == "overlay" else ReelGenerator.generate_video
+    return (set(inspect.signature(method).parameters) - RUNTIME_PARAMS) | {"export", "bg_color"}
+
+
+def unknown_columns(row):
+    """Columns of a manifest row that are neither its id nor render arguments (see render_columns)."""
+    columns = render_columns(row.get("export") or "video") | {"id"}
+    return sorted(key for key, value in row.items() if key not in columns and value not in (None, ""))
+
+
+def item_params(row):
+    """generate_video arguments for a manifest row, with defaults and types applied.
+
+    Unknown columns (see unknown_columns) are left out.
+    """
+    params = dict(DEFAULT_PARAMS)
+    columns = render_columns(row.get("export") or "video")
+    for key, value in row.items():
+        if key not in columns or value in (None, ""):
+            continue
+        params[key] = PARAM_TYPES[key](value) if key in PARAM_TYPES else value
+    if not params.get("text"):
+        raise ValueError("manifest row has no text")
+    return params
+
+
+def params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def item_id(row, params):
+    return str(row.get("id") or params_hash(params))
+
+
+def output_path(out_dir, item, params):
+    if params.get("export") == "overlay":
+        ext = "zip"  # run_render_job zips the pack
+    else:
+        is_transparent = params["bg_color"] in (None, "Transparent") and params.get("alpha_codec", "vp9")
+        ext = output_extension(is_transparent)
+    return os.path.join(out_dir, f"{item}.{ext}")
+
+
+def load_status(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATUS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_status(out_dir, status):
+    path = os.path.join(out_dir, STATUS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(status, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def render_item(work_dir, params, final_path, generator_factory):
+    """Worker: renders one item and moves the result to its deterministic path."""
+    rendered = run_render_job(work_dir, params, generator_factory)
+    os.replace(rendered, final_path)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return final_path
+
+
+def run_batch(manifest_path, out_dir, workers=None, generator_factory=default_generator, log=print):
+    """Renders every pending manifest item across a process pool; returns the status map."""
+    os.makedirs(out_dir, exist_ok=True)
+    status = load_status(out_dir)
+
+    planned = {}  # item -> (params, digest, manifest line)
+    conflicts = {}
+    items = []
+    for line, row in enumerate(read_manifest(manifest_path), 1):
+        try:
+            params = item_params(row)
+        except ValueError as e:
+            # A bad row fails on its own; the rest of the batch still renders
+            item = str(row.get("id") or f"row-{line}")
+            items.append(item)
+            status[item] = {"status": "failed", "error": str(e)}
+            log(f"[failed] {item}: {e}")
+            continue
+        item = item_id(row, params)
+        digest = params_hash(params)
+        if item in planned:
+            # Rows sharing an id would share a work dir and an output path
+            if planned[item][1] == digest:
+                log(f"[skip] {item}: duplicate of row {planned[item][2]}")
+            else:
+                conflicts.setdefault(item, [planned[item][2]]).append(line)
+            continue
+        planned[item] = (params, digest, line)
+        items.append(item)
+        unknown = unknown_columns(row)
+        if unknown:
+            log(f"[warn] {item}: ignoring unknown columns: {', '.join(unknown)}")
+
+    pending = []
+    for item, (params, digest, _) in planned.items():
+        final_path = output_path(out_dir, item, params)
+        if item in conflicts:
+            error = f"rows {', '.join(map(str, conflicts[item]))} use this id with different parameters"
+            status[item] = {"status": "failed", "error": error}
+            log(f"[failed] {item}: {error}")
+            continue
+        previous = status.get(item, {})
+        if previous.get("status") == "done" and previous.get("params") == digest and os.path.exists(final_path):
+            log(f"[skip] {item}")
+            continue
+        status[item] = {"status": "pending", "params": digest, "output": final_path}
+        pending.append((item, params, final_path))
+    save_status(out_dir, status)
+
+    # Workers keep one ReelGenerator each (fonts, layouts, TTS cache) across items
+    work_root = os.path.join(out_dir, ".work")
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers or os.cpu_count() or 1, mp_context=context, initializer=warm_up_worker,
+                             initargs=(generator_factory,)) as pool:
+        futures = {
+            pool.submit(render_item, os.path.join(work_root, item), params, final_path, generator_factory): item
+            for item, params, final_path in pending
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                future.result()
+                status[item]["status"] = "done"
+                log(f"[done] {item}")
+            except Exception as e:
+                status[item]["status"] = "failed"
+                status[item]["error"] = str(e)
+                log(f"[failed] {item}: {e}")
+            save_status(out_dir, status)
+
+    shutil.rmtree(work_root, ignore_errors=True)
+    return {item: status[item] for item in items}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="CSV or JSONL file, one reel per row")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel renders (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    status = run_batch(args.manifest, args.out, args.workers)
+    failed = [item for item, s in status.items() if s["status"] != "done"]
+    print(f"{len(status) - len(failed)}/{len(status)} items done")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Transparent-export throughput: the old alpha paths against render.ALPHA_CODECS.
+
+Renders one synthetic caption timeline (no voice track) as transparent video
+and reports output frames per second and file size for each path:
+
+    moviepy       lazy moviepy clip with an alpha mask composited per frame,
+                  libvpx-vp9 at its default settings (the transparent path
+                  before the alpha profiles)
+    vp9-default   straight-alpha held frames, libvpx-vp9 at its default settings
+    vp9, qtrle, png
+                  held frames, hidden colour cleared, encoded with that ALPHA_CODECS profile
+
+    python bench_alpha.py --seconds 10
+    python bench_alpha.py --seconds 30 --paths vp9 qtrle png
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from PIL import Image
+
+from bench_common import spoken_words
+from generator import ReelGenerator
+from render import ALPHA_CODECS, FPS, CaptionFrames, encode_concat, output_extension, run_ffmpeg, write_held_frames
+from timeline import EventCursor, build_caption_events, char_weighted_durations, held_frames
+from utils import ffmpeg_binary
+
+VP9_DEFAULT = ["-c:v", "libvpx-vp9", "-pix_fmt", "yuva420p"]
+
+
+def straight_frames(gen, style):
+    """frame_for_event before hidden colour was cleared: the sprite pasted as is."""
+    def frame_for_event(event):
+        frame = Image.new("RGBA", style["size"], (0, 0, 0, 0))
+        if event is not None:
+            sprite, origin = gen.captions.render_word_frame(event.words, event.highlight_idx, **style)
+            frame.paste(sprite, origin)
+        return frame
+    return frame_for_event
+
+
+def render_moviepy(gen, style, events, seconds, output_path):
+    import numpy as np
+    from moviepy import VideoClip
+
+    frame_for_event = straight_frames(gen, style)
+    cursor = EventCursor(events)
+    current = {}
+
+    def arrays_at(t):
+        event = cursor.at(t)
+        if event not in current:
+            current.clear()
+            frame = np.asarray(frame_for_event(event))
+            current[event] = (frame[..., :3], frame[..., 3] / 255.0)
+        return current[event]
+
+    clip = VideoClip(lambda t: arrays_at(t)[0], duration=seconds).with_mask(
+        VideoClip(lambda t: arrays_at(t)[1], is_mask=True, duration=seconds)
+    )
+    clip.write_videofile(output_path, fps=FPS, codec="libvpx-vp9", ffmpeg_params=["-pix_fmt", "yuva420p"],
+                         audio=False, logger=None)
+
+
+def render_vp9_default(gen, style, runs, n_frames, work_dir, output_path):
+    list_path = write_held_frames(runs, straight_frames(gen, style), work_dir, FPS)
+    run_ffmpeg([ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+                "-vf", f"fps={FPS}", "-frames:v", str(n_frames)] + VP9_DEFAULT + [output_path])
+
+
+def render_profile(gen, style, runs, n_frames, work_dir, output_path, codec):
+    list_path = write_held_frames(runs, CaptionFrames(gen.fonts, style, None, gen.captions), work_dir, FPS)
+    encode_concat(list_path, None, output_path, FPS, codec, n_frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--paths", nargs="*", default=["moviepy", "vp9-default"] + list(ALPHA_CODECS))
+    args = parser.parse_args()
+
+    words = spoken_words(args.seconds)
+    events = build_caption_events(words, char_weighted_durations(words, args.seconds), 5)
+    runs = held_frames(events, args.seconds, FPS)
+    n_frames = sum(n for _, n in runs)
+    print(f"{len(words)} words, {n_frames} output frames, {len(runs)} distinct caption frames")
+
+    gen = ReelGenerator()
+    style = gen.caption_style("#FF4B4B", 80, "#FFFFFF", "Arial", "Center", (1080, 1920), scale=1.0)
+    for path in args.paths:
+        work_dir = tempfile.mkdtemp(prefix="bench_alpha_")
+        output_path = os.path.join(work_dir, f"out.{output_extension(path if path in ALPHA_CODECS else True)}")
+        start = time.perf_counter()
+        if path == "moviepy":
+            render_moviepy(gen, style, events, args.seconds, output_path)
+        elif path == "vp9-default":
+            render_vp9_default(gen, style, runs, n_frames, work_dir, output_path)
+        else:
+            render_profile(gen, style, runs, n_frames, work_dir, output_path, path)
+        elapsed = time.perf_counter() - start
+        size_kb = os.path.getsize(output_path) / 1024
+        print(f"{path:>12}: {elapsed:6.1f}s  {n_frames / elapsed:6.1f} fps  {size_kb:8.0f} KB")
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
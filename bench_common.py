@@ -0,0 +1,27 @@
+"""Synthetic scripts shared by the benchmarks (bench_*.py, benchmark.py)."""
+import random
+
+VOCAB = "wake up early grind hard success is waiting for those who never stop building their dreams every single day".split()
+# Speaking rate estimate_duration and silent_speech_stream assume
+WORDS_PER_SECOND = 2.5
+
+
+def script_words(n_words, seed=None):
+    """n_words cycled through VOCAB in order, or drawn from it at random with `seed`."""
+    if seed is None:
+        return [VOCAB[i % len(VOCAB)] for i in range(n_words)]
+    rng = random.Random(seed)
+    return [rng.choice(VOCAB) for _ in range(n_words)]
+
+
+def spoken_words(seconds):
+    """About `seconds` of speech as a word list."""
+    return script_words(int(seconds * WORDS_PER_SECOND))
+
+
+def make_script(n_words):
+    """Deterministic script text with a sentence break every 12 words."""
+    words = script_words(n_words)
+    return " ".join(
+        word + "." if i % 12 == 11 or i == n_words - 1 else word for i, word in enumerate(words)
+    )
@@ -0,0 +1,70 @@
+"""Micro-benchmark: caption layout cost per word as scripts grow.
+
+Compares the legacy wrap loop (re-measuring the growing line with
+draw.textbbox for every word) with layout.layout_text.
+
+    python bench_layout.py
+"""
+import time
+
+from PIL import Image, ImageDraw
+
+from bench_common import script_words
+from layout import FALLBACK_FONT, layout_text, load_font
+
+SIZE = (1080, 1920)
+
+
+def legacy_layout(words, font_file, fontsize, size):
+    """The wrap + measure loop create_text_clip_pil used before the layout module."""
+    from PIL import ImageFont
+    W, H = size
+    draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+    try:
+        font = ImageFont.truetype(font_file, fontsize)
+    except OSError:
+        font = ImageFont.truetype(FALLBACK_FONT, fontsize)
+    lines, current_line = [], []
+    for word in words:
+        bbox = draw.textbbox((0, 0), ' '.join(current_line + [word]), font=font)
+        if bbox[2] - bbox[0] <= W - 100:
+            current_line.append(word)
+        else:
+            lines.append(current_line)
+            current_line = [word]
+    lines.append(current_line)
+    for line in lines:
+        draw.textbbox((0, 0), ' '.join(line), font=font)
+        for word in line:
+            draw.textbbox((0, 0), word, font=font)
+            draw.textbbox((0, 0), " ", font=font)
+    return lines
+
+
+def per_word_us(fn, words, chunk_words):
+    start = time.perf_counter()
+    if chunk_words:
+        for i in range(0, len(words), chunk_words):
+            fn(words[i:i + chunk_words])
+    else:
+        fn(words)
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def main():
+    font_file, fontsize = "arial.ttf", 80
+    load_font(font_file, fontsize)
+
+    print(f"{'words':>7} {'mode':>10} {'legacy us/word':>15} {'layout us/word':>15}")
+    for n_words in (100, 1000, 10000):
+        words = script_words(n_words, seed=0)
+        for chunk_words, mode in ((5, "chunks"), (None, "paragraph")):
+            tall = (SIZE[0], 10 ** 7)
+            size = SIZE if chunk_words else tall
+            legacy = per_word_us(lambda ws: legacy_layout(ws, font_file, fontsize, size), words, chunk_words)
+            new = per_word_us(lambda ws: layout_text(ws, font_file, fontsize, size, 0), words, chunk_words)
+            print(f"{n_words:>7} {mode:>10} {legacy:>15.1f} {new:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
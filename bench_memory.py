@@ -0,0 +1,89 @@
+"""Peak-RSS comparison: full-frame caption clips vs cropped caption sprites.
+
+Builds the per-word caption clips for a synthetic script exactly like
+generate_video does (no TTS, fixed word durations), composites them and
+renders a sample of frames. Each mode runs in its own process so the peak
+RSS figures do not contaminate each other.
+
+    python bench_memory.py                 # compare both modes at 50/100/200 words
+    python bench_memory.py --mode sprite --words 500
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from bench_common import script_words
+
+SIZE = (1080, 1920)
+
+
+def build_and_render(mode, n_words, max_words=5, word_duration=0.4, sample_frames=48):
+    import numpy as np
+    from moviepy import ColorClip, CompositeVideoClip, ImageClip
+    from PIL import Image
+    from generator import ReelGenerator
+
+    gen = ReelGenerator()
+    words = script_words(n_words)
+    total = n_words * word_duration
+    clips = [ColorClip(size=SIZE, color=(30, 30, 30), duration=total)]
+
+    start = time.perf_counter()
+    t = 0.0
+    for c in range(0, n_words, max_words):
+        chunk = words[c:c + max_words]
+        for i in range(len(chunk)):
+            sprite, origin = gen.captions.render_word_frame(chunk, i, "#FF4B4B", 80, "#FFFFFF", "Arial", SIZE, 'center')
+            if mode == "full":
+                # Previous behaviour: every word is a full 1080x1920 RGBA frame
+                canvas = Image.new('RGBA', SIZE, (255, 255, 255, 0))
+                canvas.paste(sprite, origin)
+                clip = ImageClip(np.array(canvas))
+            else:
+                clip = ImageClip(np.array(sprite)).with_position(origin)
+            clips.append(clip.with_start(t).with_duration(word_duration))
+            t += word_duration
+    build_s = time.perf_counter() - start
+
+    final = CompositeVideoClip(clips)
+    start = time.perf_counter()
+    for k in range(sample_frames):
+        final.get_frame(total * k / sample_frames)
+    composite_ms = (time.perf_counter() - start) / sample_frames * 1000
+
+    return {
+        "mode": mode,
+        "words": n_words,
+        "build_s": round(build_s, 2),
+        "composite_ms_per_frame": round(composite_ms, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["full", "sprite"])
+    parser.add_argument("--words", type=int, nargs="*", default=[50, 100, 200])
+    args = parser.parse_args()
+
+    if args.mode:
+        for n in args.words:
+            print(json.dumps(build_and_render(args.mode, n)))
+        return
+
+    print(f"{'words':>6} {'mode':>7} {'peak RSS MB':>12} {'build s':>8} {'ms/frame':>9}")
+    for n in args.words:
+        for mode in ("full", "sprite"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--words", str(n)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{n:>6} {mode:>7} {r['peak_rss_mb']:>12} {r['build_s']:>8} {r['composite_ms_per_frame']:>9}")
+
+
+if __name__ == "__main__":
+    main()
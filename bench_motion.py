@@ -0,0 +1,83 @@
+"""Motion-caption cost by frame rate: held frames against rendering every frame.
+
+Renders one synthetic caption timeline (no voice track) with an animated
+highlight at each frame rate and reports wall time and the number of
+composited frames:
+
+    static      no animation, one held PNG per word through the concat demuxer
+                (the 24 fps baseline)
+    motion      animated for MOTION_WINDOW seconds per word, then held; each
+                distinct frame streamed to ffmpeg once with its timestamp, held
+                runs repeated by the encoder (render.encode_frames_pipe)
+    motion (png)
+                the same frames as PNGs through the concat demuxer (--png)
+    per-frame   the same animation with every output frame composited
+                (what per-frame rendering costs even with cached sprites)
+
+    python bench_motion.py --seconds 20
+    python bench_motion.py --animation slide --fps 24 60
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from bench_common import spoken_words
+from generator import ReelGenerator
+from render import CaptionFrames, encode_concat, encode_frames_pipe, write_held_frames
+from timeline import build_caption_events, char_weighted_durations, held_frames, motion_frames
+
+
+
+def render(runs, frame_for_event, fps, pipe=False):
+    """Wall seconds for a held-frame render of runs: PNGs + concat demuxer, or streamed raw frames."""
+    work_dir = tempfile.mkdtemp(prefix="bench_motion_")
+    output_path = f"{work_dir}/out.mp4"
+    try:
+        start = time.perf_counter()
+        if pipe:
+            encode_frames_pipe(runs, frame_for_event, None, output_path, fps, False)
+        else:
+            list_path = write_held_frames(runs, frame_for_event, work_dir, fps)
+            encode_concat(list_path, None, output_path, fps, False, sum(n for _, n in runs))
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def report(name, fps, frames, elapsed, base):
+    print(f"{name:>12} @{fps}: {frames:5d} composited  {elapsed:6.1f}s  ({elapsed / base:.2f}x static @24)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--animation", default="pop", choices=["pop", "fade", "slide"])
+    parser.add_argument("--fps", type=int, nargs="*", default=[24, 30, 60])
+    parser.add_argument("--per-frame", action="store_true", help="also time compositing every output frame")
+    parser.add_argument("--png", action="store_true", help="also time motion frames saved as PNGs for the concat demuxer")
+    args = parser.parse_args()
+
+    words = spoken_words(args.seconds)
+    events = build_caption_events(words, char_weighted_durations(words, args.seconds), 5)
+    gen = ReelGenerator()
+    style = gen.caption_style("#FF4B4B", 80, "#FFFFFF", "Arial", "Center", (1080, 1920), scale=1.0)
+    bg_rgb = (30, 30, 30)
+    print(f"{len(words)} words over {args.seconds:.0f}s, {args.animation}")
+
+    runs = held_frames(events, args.seconds, 24)
+    base = render(runs, CaptionFrames(gen.fonts, style, bg_rgb), 24)
+    report("static", 24, len(runs), base, base)
+    for fps in args.fps:
+        frames = CaptionFrames(gen.fonts, style, bg_rgb, animation=args.animation)
+        runs = motion_frames(events, args.seconds, fps)
+        if args.png:
+            report("motion (png)", fps, len(runs), render(runs, frames, fps), base)
+        report("motion", fps, len(runs), render(runs, frames, fps, pipe=True), base)
+        if args.per_frame:
+            every = [(event, 1) for event, n in runs for _ in range(n)]
+            report("per-frame", fps, len(every), render(every, frames, fps, pipe=True), base)
+
+
+if __name__ == "__main__":
+    main()
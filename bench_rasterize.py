@@ -0,0 +1,55 @@
+"""Micro-benchmark: caption rasterization throughput in words per second.
+
+Rasterizes a script chunk by chunk the way the renderers do (the chunk's
+stroke and fill once, then one highlight frame per word) with the PIL
+rasterizer (draw.text passes) and the glyph-atlas one (glyph_atlas). The atlas
+column is measured after a warm-up pass, as in a long-running worker; "atlas
+cold" includes building every glyph's masks.
+
+    python bench_rasterize.py
+    python bench_rasterize.py --words 2000 --scale 0.4   # draft size
+"""
+import argparse
+import time
+
+from bench_common import script_words
+from captions import CaptionRenderer
+from generator import ReelGenerator
+from glyph_atlas import glyph_atlas
+
+SIZE = (1080, 1920)
+
+
+def words_per_second(renderer, words, max_words, scale):
+    start = time.perf_counter()
+    for i in range(0, len(words), max_words):
+        chunk = words[i:i + max_words]
+        for idx in range(len(chunk)):
+            renderer.render_word_frame(chunk, idx, "#FF4B4B", 80, "#FFFFFF", "Arial", SIZE, 'center', scale)
+    return len(words) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--max-words", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    words = script_words(args.words, seed=0)
+    fonts = ReelGenerator().fonts
+
+    # Fresh renderers, so no chunk is served from the chunk cache
+    pil = words_per_second(CaptionRenderer(fonts, rasterizer="pil"), words, args.max_words, args.scale)
+    glyph_atlas.cache_clear()
+    cold = words_per_second(CaptionRenderer(fonts), words, args.max_words, args.scale)
+    warm = words_per_second(CaptionRenderer(fonts), words, args.max_words, args.scale)
+
+    print(f"{args.words} words, {args.max_words} per chunk, scale {args.scale}")
+    print(f"{'pil':>11}: {pil:8.0f} words/s")
+    print(f"{'atlas cold':>11}: {cold:8.0f} words/s")
+    print(f"{'atlas':>11}: {warm:8.0f} words/s  ({warm / pil:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
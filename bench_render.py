@@ -0,0 +1,79 @@
+"""Render-time comparison of ReelGenerator backends on a synthetic reel.
+
+TTS is replaced by tts.silent_speech_stream (silence with evenly paced word
+boundaries) and the TTS cache is off, so only caption rendering and encoding
+are measured, and no run reuses an earlier run's voice. Backends:
+moviepy and frames rasterize captions with PIL; libass has ffmpeg draw them
+from an ASS script. --workers renders the frames backend once per worker
+count, to see how segment-parallel rendering scales with cores. --variants N
+compares rendering 9:16, 1:1 and 16:9 (cycled, N outputs) with
+generate_variants against N separate generate_video calls.
+
+    python bench_render.py --seconds 60
+    python bench_render.py --seconds 60 --backends frames libass --transparent
+    python bench_render.py --seconds 300 --backends frames --workers 1 2 4 8
+    python bench_render.py --seconds 60 --backends --variants 3
+"""
+import argparse
+import time
+
+from bench_common import spoken_words
+from generator import ASPECT_SIZES, ReelGenerator
+from render import FPS
+from timeline import build_caption_events, char_weighted_durations, held_frames
+from tts import silent_speech_stream
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--backends", nargs="*", default=["moviepy", "frames", "libass"])
+    parser.add_argument("--transparent", action="store_true")
+    parser.add_argument("--workers", nargs="*", type=int, default=[1], help="encode_workers for the frames backend")
+    parser.add_argument("--variants", type=int, default=0, help="also compare N variants rendered together vs apart")
+    args = parser.parse_args()
+
+    words = spoken_words(args.seconds)
+    text = " ".join(words)
+
+    events = build_caption_events(words, char_weighted_durations(words, args.seconds), 5)
+    print(f"{len(words)} words, {int(args.seconds * FPS)} output frames, "
+          f"{len(held_frames(events, args.seconds, FPS))} distinct caption frames")
+
+    runs = [(backend, workers) for backend in args.backends
+            for workers in (args.workers if backend == "frames" else [1])]
+    for backend, workers in runs:
+        gen = ReelGenerator(render_backend=backend, encode_workers=workers)
+        gen.speech_stream = silent_speech_stream
+        gen.tts_cache = None
+        start = time.perf_counter()
+        gen.generate_video(
+            text=text, voice_style="Guy (Neural) - US Male", speed=1.0,
+            bg_color="Transparent" if args.transparent else "#1E1E1E", text_color="#FFFFFF",
+            highlight_color="#FF4B4B", font_name="Arial", font_size=80, max_words=5, position="Center",
+        )
+        label = backend if workers == 1 else f"{backend} x{workers}"
+        print(f"{label:>10}: {time.perf_counter() - start:.1f}s")
+
+    if args.variants:
+        sizes = list(ASPECT_SIZES.values())
+        variants = [dict(name=f"variant_{i}", size=sizes[i % len(sizes)]) for i in range(args.variants)]
+        style = dict(bg_color="Transparent" if args.transparent else "#1E1E1E", text_color="#FFFFFF",
+                     highlight_color="#FF4B4B", font_name="Arial", font_size=80, position="Center")
+        gen = ReelGenerator()
+        gen.speech_stream = silent_speech_stream
+        gen.tts_cache = None
+        start = time.perf_counter()
+        for variant in variants:
+            gen.generate_video(text=text, voice_style="Guy (Neural) - US Male", speed=1.0, max_words=5,
+                               size=variant["size"], **style)
+        apart = time.perf_counter() - start
+        start = time.perf_counter()
+        gen.generate_variants(text, "Guy (Neural) - US Male", 1.0, 5, variants, **style)
+        together = time.perf_counter() - start
+        print(f"{args.variants} variants: {apart:.1f}s apart, {together:.1f}s together")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cold-start benchmark: import time and first-render latency in fresh processes, as JSON.
+
+Every measurement runs in a new interpreter, the way a Streamlit server
+start or a freshly spawned pool worker sees it:
+
+    import_s      time to import generator / jobs (median of --repeat runs)
+    heavy_loaded  heavy modules (moviepy, edge_tts, numpy) that import pulled in
+    first_render  first and second draft render of a short script with silent TTS,
+                  without and with ReelGenerator.warm_up beforehand
+
+    python bench_startup.py --out startup.json
+    python bench_startup.py --max-import-ms 300   # exit 1 if generator imports slower
+
+--max-import-ms and a non-empty heavy_loaded fail the run, so the script can
+guard against import-time regressions in CI.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ["generator", "jobs"]
+HEAVY_MODULES = ["moviepy", "edge_tts", "numpy"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"import_s": time.perf_counter() - start,
+                  "heavy_loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+RENDER_PROBE = """
+import json, tempfile, time
+from functools import partial
+start = time.perf_counter()
+from generator import ReelGenerator
+from tts import silent_speech_stream
+gen = ReelGenerator()
+gen.speech_stream = partial(silent_speech_stream, words_per_second=6)
+gen.tts_cache = None
+result = {{"import_s": time.perf_counter() - start}}
+if {warm_up!r}:
+    t = time.perf_counter()
+    gen.warm_up()
+    result["warm_up_s"] = time.perf_counter() - t
+style = dict(voice_style="Guy (Neural) - US Male", speed=1.0, bg_color="#1E1E1E", text_color="#FFFFFF",
+             highlight_color="#FF4B4B", font_name="Arial", font_size=80, max_words=5, position="Center")
+for label in ("first_s", "second_s"):
+    t = time.perf_counter()
+    gen.generate_video(text="Wake up early. Grind hard.", work_dir=tempfile.mkdtemp(), draft=True, **style)
+    result[label] = time.perf_counter() - t
+print(json.dumps(result))
+"""
+
+
+def probe(code):
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    report = {"imports": {}, "first_render": {}}
+    for module in MODULES:
+        runs = [probe(IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)) for _ in range(args.repeat)]
+        report["imports"][module] = {
+            "import_s": round(statistics.median(r["import_s"] for r in runs), 4),
+            "heavy_loaded": runs[0]["heavy_loaded"],
+        }
+    for warm_up in (False, True):
+        result = probe(RENDER_PROBE.format(warm_up=warm_up))
+        report["first_render"]["warm_up" if warm_up else "cold"] = {k: round(v, 4) for k, v in result.items()}
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+    failures = [f"{m} imports {', '.join(r['heavy_loaded'])}" for m, r in report["imports"].items() if r["heavy_loaded"]]
+    import_ms = report["imports"]["generator"]["import_s"] * 1000
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"generator import {import_ms:.0f}ms > {args.max_import_ms:.0f}ms")
+    if failures:
+        print("FAIL: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Offline render benchmark: per-stage wall time and peak RSS as JSON.
+
+TTS is replaced by tts.silent_speech_stream (silence of a controlled length
+with evenly paced word boundaries), so runs are deterministic and need no
+network. Every configuration of the matrix renders in a fresh process, so
+caches and peak memory never carry over between configurations.
+
+    python benchmark.py --out bench.json
+    python benchmark.py --lengths 50 300 600 --max-words 3 5 8 --font-sizes 60 100 \\
+        --backgrounds solid transparent --out bench.json
+
+Stages reported: the pipeline phases tts, timing, frames and encode, plus
+rasterize and composite, which are timed inside frames (see
+ReelGenerator.generate_video), and the render's counters (frames rendered,
+bytes written). Compare two commits by diffing their JSON.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_common import make_script
+
+
+def run_config(config):
+    """Renders one configuration in this process and returns its measurements."""
+    from functools import partial
+
+    from generator import ReelGenerator
+    from metrics import RenderProgress, StageMetrics
+    from tts import silent_speech_stream
+
+    gen = ReelGenerator(render_backend=config["backend"])
+    gen.speech_stream = partial(silent_speech_stream, words_per_second=config["words_per_second"])
+    gen.tts_cache = None
+
+    progress = RenderProgress(StageMetrics())
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    start = time.perf_counter()
+    output = gen.generate_video(
+        text=make_script(config["words"]),
+        voice_style="Guy (Neural) - US Male",
+        speed=1.0,
+        bg_color="Transparent" if config["background"] == "transparent" else "#1E1E1E",
+        text_color="#FFFFFF",
+        highlight_color="#FF4B4B",
+        font_name="Arial",
+        font_size=config["font_size"],
+        max_words=config["max_words"],
+        position="Center",
+        work_dir=work_dir,
+        progress=progress,
+    )
+    wall = time.perf_counter() - start
+    result = {"config": config, "wall_s": round(wall, 3), "output_bytes": os.path.getsize(output)}
+    result.update(progress.to_dict())
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[50, 150], help="Script lengths in words")
+    parser.add_argument("--max-words", type=int, nargs="+", default=[5])
+    parser.add_argument("--font-sizes", type=int, nargs="+", default=[80])
+    parser.add_argument("--backgrounds", nargs="+", choices=["solid", "transparent"], default=["solid", "transparent"])
+    parser.add_argument("--backend", default="frames")
+    parser.add_argument("--words-per-second", type=float, default=2.5)
+    parser.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--single", help=argparse.SUPPRESS)  # JSON config, used for the per-run child process
+    args = parser.parse_args(argv)
+
+    if args.single:
+        print(json.dumps(run_config(json.loads(args.single))))
+        return 0
+
+    results = []
+    for words, max_words, font_size, background in itertools.product(
+        args.lengths, args.max_words, args.font_sizes, args.backgrounds
+    ):
+        config = {
+            "words": words, "max_words": max_words, "font_size": font_size, "background": background,
+            "backend": args.backend, "words_per_second": args.words_per_second,
+        }
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", json.dumps(config)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            results.append({"config": config, "error": proc.stderr.strip().splitlines()[-1:]})
+        else:
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        r = results[-1]
+        print(f"{words:>5}w mw={max_words} fs={font_size} {background:>11}: {r.get('wall_s', 'ERR')}s", file=sys.stderr)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
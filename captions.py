@@ -0,0 +1,192 @@
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw
+
+from layout import layout_text, resolve_font_file
+
+STROKE_WIDTH = 2
+STROKE_COLOR = "black"
+
+
+def stroke_width(scale=1.0):
+    """Outline width in pixels at a render scale (never thinner than one pixel)."""
+    return max(1, int(round(STROKE_WIDTH * scale)))
+
+
+class ChunkRaster:
+    """A caption chunk rasterized once, cropped to its text: stroke layer, base layer and layout."""
+
+    def __init__(self, stroke_layer, base_layer, layout, origin, stroke=STROKE_WIDTH):
+        self.stroke_layer = stroke_layer  # Stroke only (black outline of every word)
+        self.base_layer = base_layer      # Stroke + every word in the normal text color
+        self.layout = layout              # Word positions in canvas coordinates
+        self.origin = origin              # Canvas position of the sprite's top-left corner
+        self.stroke = stroke
+        self._word_layers = {}
+        self._lock = threading.Lock()  # Renderers shared by threads share their chunks too
+
+    def word_box(self, idx):
+        """Ink bounds of a word in sprite coordinates, clamped so crop/paste stay aligned."""
+        W, H = self.base_layer.size
+        ox, oy = self.origin
+        x0, y0, x1, y1 = self.layout.words[idx].box
+        x0, y0, x1, y1 = x0 - ox, y0 - oy, x1 - ox, y1 - oy
+        return (max(0, x0), max(0, y0), min(W, max(x1, x0 + 1)), min(H, max(y1, y0 + 1)))
+
+    def outline_box(self, idx):
+        """word_box grown by the stroke width: everything the word draws, clamped to the sprite."""
+        W, H = self.base_layer.size
+        x0, y0, x1, y1 = self.word_box(idx)
+        s = self.stroke
+        return (max(0, x0 - s), max(0, y0 - s), min(W, x1 + s), min(H, y1 + s))
+
+    def word_layers(self, idx, highlight_color, color):
+        """The word alone in the highlight color, and the base layer without it; cached per word.
+
+        Returns (word, under, box): RGBA patches of the word's outline_box,
+        drawn once per chunk so animations (see motion) can move the word
+        without redrawing any text.
+        """
+        key = (idx, highlight_color, color)
+        with self._lock:
+            layers = self._word_layers.get(key)
+            if layers is None:
+                box = self.outline_box(idx)
+                others = [j for j in range(len(self.layout.words)) if j != idx and _overlaps(self.outline_box(j), box)]
+                layers = self._word_layers[key] = (
+                    self.draw_words(box, [idx], highlight_color), self.draw_words(box, others, color), box
+                )
+            return layers
+
+    def draw_words(self, box, indices, color):
+        """RGBA patch of a sprite box holding only the given words: their outlines, then their fill in color."""
+        x0, y0, x1, y1 = box
+        ox, oy = self.origin
+        patch = Image.new('RGBA', (x1 - x0, y1 - y0), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(patch)
+        words = [self.layout.words[i] for i in indices]
+        draw_outlines(draw, words, self.layout.font, (ox + x0, oy + y0), self.stroke)
+        for word in words:
+            draw.text((word.x - ox - x0, word.y - oy - y0), word.word, font=self.layout.font, fill=color)
+        return patch
+
+    def highlight(self, highlight_idx, highlight_color):
+        """Returns a sprite with only the highlighted word redrawn on top of the base layer."""
+        frame = self.base_layer.copy()
+        if highlight_idx is None or not (0 <= highlight_idx < len(self.layout.words)):
+            return frame
+
+        word = self.layout.words[highlight_idx]
+        box = self.word_box(highlight_idx)
+        ox, oy = self.origin
+        # Start from the stroke-only pixels under the word so the highlight blends
+        # exactly like it would have been drawn directly over the outline.
+        patch = self.stroke_layer.crop(box)
+        ImageDraw.Draw(patch).text(
+            (word.x - ox - box[0], word.y - oy - box[1]), word.word, font=self.layout.font, fill=highlight_color
+        )
+        frame.paste(patch, box[:2])
+        return frame
+
+
+class CaptionRenderer:
+    """Rasterizes caption chunks once and derives the per-word highlight frames from them.
+
+    Threads may share a renderer: chunks and their word layers are
+    rasterized and cached under locks, and highlight frames are drawn on copies.
+    """
+
+    def __init__(self, fonts, max_cached_chunks=32, rasterizer="atlas"):
+        self.fonts = fonts
+        self.max_cached_chunks = max_cached_chunks
+        # "atlas": blit cached glyph masks (see glyph_atlas); "pil": draw.text passes per chunk
+        self.rasterizer = rasterizer
+        self._chunks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def layout_chunk(self, words_to_show, fontsize, font_name_key, size, position_y_offset=0, scale=1.0):
+        """Lays out a chunk with the shared font and word-metric caches."""
+        font_file = resolve_font_file(self.fonts, font_name_key)
+        return layout_text(words_to_show, font_file, fontsize, size, position_y_offset, scale)
+
+    def render_chunk(self, words_to_show, fontsize, color, font_name_key, size, position_y_offset=0, scale=1.0):
+        """Returns the cached ChunkRaster for a chunk, rasterizing it on first use.
+
+        Sizes are full-size values; `scale` shrinks the whole chunk (drafts).
+        """
+        key = (tuple(words_to_show), fontsize, color, font_name_key, tuple(size), position_y_offset, scale)
+        with self._lock:
+            raster = self._chunks.get(key)
+            if raster is not None:
+                self._chunks.move_to_end(key)
+                return raster
+
+            raster = self._rasterize(words_to_show, fontsize, color, font_name_key, size, position_y_offset, scale)
+            self._chunks[key] = raster
+            # Chunks are consumed in order, so a small LRU is enough to keep memory flat
+            while len(self._chunks) > self.max_cached_chunks:
+                self._chunks.popitem(last=False)
+            return raster
+
+    def render_word_frame(self, words_to_show, highlight_idx, highlight_color, fontsize, color, font_name_key, size, position_y_offset=0, scale=1.0):
+        """Returns the chunk's cropped RGBA sprite with one word highlighted, and its canvas origin."""
+        raster = self.render_chunk(words_to_show, fontsize, color, font_name_key, size, position_y_offset, scale)
+        return raster.highlight(highlight_idx, highlight_color), raster.origin
+
+    def render_motion_frame(self, words_to_show, highlight_idx, progress, animation, highlight_color, fontsize, color, font_name_key, size, position_y_offset=0, scale=1.0):
+        """render_word_frame for motion captions: the sprite `progress` (0..1) into the word's animation.
+
+        Returns (sprite, origin); animated sprites may extend past the chunk's
+        own bounds (see motion.motion_sprite).
+        """
+        import motion  # NumPy is loaded with the first animated frame, not at import
+        raster = self.render_chunk(words_to_show, fontsize, color, font_name_key, size, position_y_offset, scale)
+        return motion.motion_sprite(raster, highlight_idx, progress, animation, color, highlight_color)
+
+    def _rasterize(self, words_to_show, fontsize, color, font_name_key, size, position_y_offset, scale=1.0):
+        layout = self.layout_chunk(words_to_show, fontsize, font_name_key, size, position_y_offset, scale)
+        font = layout.font
+        stroke = stroke_width(scale)
+        ox, oy, sprite_w, sprite_h = sprite_bounds(layout, layout.size, stroke)
+        if self.rasterizer == "atlas":
+            import glyph_atlas  # NumPy is loaded with the first chunk, not at import
+            if glyph_atlas.atlas_supported(font):
+                return glyph_atlas.rasterize_chunk(layout, color, stroke, (ox, oy, sprite_w, sprite_h))
+
+        stroke_layer = Image.new('RGBA', (sprite_w, sprite_h), (255, 255, 255, 0))
+        # Stroke is drawn once per chunk (25 offset passes), never per highlighted word
+        draw_outlines(ImageDraw.Draw(stroke_layer), layout.words, font, (ox, oy), stroke)
+
+        base_layer = stroke_layer.copy()
+        base_draw = ImageDraw.Draw(base_layer)
+        for word in layout.words:
+            base_draw.text((word.x - ox, word.y - oy), word.word, font=font, fill=color)
+
+        return ChunkRaster(stroke_layer, base_layer, layout, (ox, oy), stroke)
+
+
+def draw_outlines(draw, words, font, origin, stroke):
+    """Draws the words' black outlines as (2 * stroke + 1)^2 offset passes, relative to origin."""
+    ox, oy = origin
+    for word in words:
+        for adj_x in range(-stroke, stroke + 1):
+            for adj_y in range(-stroke, stroke + 1):
+                draw.text((word.x - ox + adj_x, word.y - oy + adj_y), word.word, font=font, fill=STROKE_COLOR)
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def sprite_bounds(layout, size, stroke=STROKE_WIDTH):
+    """Canvas-clamped (x, y, w, h) covering the layout's ink plus the stroke."""
+    W, H = size
+    bbox = layout.bbox
+    if bbox is None:
+        return 0, 0, 1, 1
+    x0 = max(0, bbox[0] - stroke)
+    y0 = max(0, bbox[1] - stroke)
+    x1 = min(W, bbox[2] + stroke)
+    y1 = min(H, bbox[3] + stroke)
+    return x0, y0, max(1, x1 - x0), max(1, y1 - y0)
@@ -0,0 +1,58 @@
+"""Helpers shared by the test modules: an offline generator, one reel style, and output decoders."""
+import subprocess
+from functools import partial
+
+import numpy as np
+from moviepy.config import FFMPEG_BINARY
+
+from generator import ReelGenerator
+from tts import silent_speech_stream
+
+SCRIPT = "Wake up early. Grind hard. Success is waiting for those who never stop."
+# generate_video's voice and caption arguments; tests change single keys with dict(STYLE, ...)
+STYLE = dict(
+    voice_style="Guy (Neural) - US Male", speed=1.0, bg_color="#1E1E1E", text_color="#FFFFFF",
+    highlight_color="#FF4B4B", font_name="Arial", font_size=80, max_words=5, position="Center",
+)
+
+
+def offline_generator(**kwargs):
+    """A ReelGenerator whose TTS streams silence instead of calling edge-tts, without a TTS cache.
+
+    Module level, so render workers (RenderQueue, batch) can take it as their generator_factory.
+    """
+    gen = ReelGenerator(**kwargs)
+    gen.speech_stream = partial(silent_speech_stream, words_per_second=6)
+    gen.tts_cache = None
+    return gen
+
+
+def decode_frames(path, size=(108, 192)):
+    raw = subprocess.run(
+        [FFMPEG_BINARY, "-loglevel", "error", "-i", path, "-vf", f"scale={size[0]}:{size[1]}",
+         "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        check=True, capture_output=True,
+    ).stdout
+    return np.frombuffer(raw, np.uint8).reshape(-1, size[1], size[0], 3)
+
+
+def decode_rgba_frame(path, index, size=(1080, 1920)):
+    decoder = ["-c:v", "libvpx-vp9"] if path.endswith(".webm") else []  # ffmpeg's native VP9 decoder drops alpha
+    raw = subprocess.run(
+        [FFMPEG_BINARY, "-loglevel", "error", *decoder, "-i", path, "-vf", f"select=eq(n\\,{index})",
+         "-frames:v", "1", "-f", "rawvideo", "-pix_fmt", "rgba", "-"],
+        check=True, capture_output=True,
+    ).stdout
+    return np.frombuffer(raw, np.uint8).reshape(size[1], size[0], 4)
+
+
+def audio_stream(path):
+    """The output's audio codec and its packets re-wrapped as a bare stream."""
+    info = subprocess.run([FFMPEG_BINARY, "-hide_banner", "-i", path], capture_output=True, text=True).stderr
+    codec = info.split("Audio: ", 1)[1].split()[0].rstrip(",")
+    packets = subprocess.run(
+        [FFMPEG_BINARY, "-loglevel", "error", "-i", path, "-map", "0:a", "-map_metadata", "-1", "-c", "copy",
+         "-id3v2_version", "0", "-write_xing", "0", "-f", codec, "-"],
+        check=True, capture_output=True,
+    ).stdout
+    return codec, packets
@@ -1,18 +1,71 @@
 import asyncio
+import importlib
 import os
-import random
+import shutil
 import tempfile
-import edge_tts
-from moviepy import ColorClip, CompositeVideoClip, AudioFileClip, TextClip, ImageClip
-from utils import split_text_into_chunks, hex_to_rgb
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from utils import ffmpeg_binary, hex_to_rgb
+from captions import CaptionRenderer, stroke_width
+from layout import font_path, load_font, resolve_font_file, scaled_size
+from overlay import write_overlay
+from subtitles import write_ass, write_karaoke_ass, write_srt
+from render import (
+    FPS, CaptionFrames, audio_codec, concat_segments, concat_segments_async, encode_ass, encode_concat,
+    encode_concat_async, encode_frames_pipe, encode_slots, output_extension, render_held_frames, segment_runs,
+    split_segments, write_concat_list,
+)
+from render_manifest import FRAMES_DIR, MANIFEST_FILE, SEGMENTS_DIR, RenderManifest, content_key
+from timeline import (
+    MOTION_WINDOW, EventCursor, MotionFrame, aligned_word_durations, build_caption_events, held_frames, motion_frames,
+)
+from tts import edge_tts_stream, split_sentences, stitch_speech, stream_speech, synthesize_pieces
+from tts_cache import TTSCache
+from metrics import RenderProgress, legacy_progress_adapter
+
+# moviepy, numpy and edge_tts are imported where they are used, so importing this
+# module (app start-up, fresh pool workers) stays cheap; see warm_up
 
 # Ensure temp dir exists
 TEMP_DIR = "temp"
 os.makedirs(TEMP_DIR, exist_ok=True)
+TTS_CACHE_DIR = os.path.join(TEMP_DIR, "tts_cache")
+# Output canvases for the published aspect ratios
+ASPECT_SIZES = {"9:16": (1080, 1920), "1:1": (1080, 1080), "16:9": (1920, 1080)}
+# Draft previews: a third of the resolution (360x640) at half the frame rate
+DRAFT_SCALE = 1 / 3
+DRAFT_FPS = 12
+
+
+def encode_progress_logger(progress):
+    """proglog logger that forwards moviepy's per-frame write progress to a RenderProgress."""
+    import proglog
+
+    class EncodeProgressLogger(proglog.ProgressBarLogger):
+        def bars_callback(self, bar, attr, value, old_value=None):
+            if bar == "frame_index" and attr == "index":
+                total = self.bars[bar]["total"]
+                progress.advance("encode", min(value + 1, total), total)
+
+    return EncodeProgressLogger()
+
 
 class ReelGenerator:
-    def __init__(self):
+    def __init__(self, render_backend="frames", parallel_tts=False, tts_concurrency=4, encode_workers=1):
+        # "frames": encode each distinct caption frame once and let ffmpeg hold it
+        # "moviepy": composite and pipe every frame at FPS through moviepy
+        # "libass": write the captions as an ASS script and let ffmpeg's libass draw them
+        self.render_backend = render_backend
+        # Source of TTS chunks (audio bytes + WordBoundary events); swappable for offline use
+        self.speech_stream = edge_tts_stream
+        # Content-addressed TTS results shared by previews and renders (None disables)
+        self.tts_cache = TTSCache(TTS_CACHE_DIR)
+        # Split long scripts into sentences and synthesize them concurrently
+        self.parallel_tts = parallel_tts
+        self.tts_concurrency = tts_concurrency
+        # Frames backend: split the timeline at chunk boundaries and composite/encode
+        # that many segments in parallel processes (1 renders in this process)
+        self.encode_workers = encode_workers
+
         # Expanded Neural Voice Library (Microsoft Edge TTS)
         self.voices = {
             # US English - Male
@@ -55,229 +108,582 @@ class ReelGenerator:
             "Comic Sans": "comic.ttf"
         }
 
-    async def generate_audio(self, text, voice_key, rate_str="+0%"):
-        """Generates TTS audio file using edge-tts."""
+        # Chunk-level caption rasterizer (caches each chunk's base layer)
+        self.captions = CaptionRenderer(self.fonts)
+
+    def warm_up(self, font_sizes=(80,)):
+        """Pays the first render's one-time costs up front: the ffmpeg lookup, every UI
+        font (at font_sizes, full size and draft) and the imports of the TTS client and
+        render backend. Pool workers run this before their first job (see jobs.warm_up_worker).
+        """
+        ffmpeg_binary()
+        for font_file in set(self.fonts.values()):
+            for size in font_sizes:
+                load_font(font_file, size)
+                load_font(font_file, max(1, int(round(size * DRAFT_SCALE))))
+        if self.speech_stream is edge_tts_stream:
+            importlib.import_module("edge_tts")
+        if self.render_backend == "moviepy":
+            importlib.import_module("moviepy")
+
+    def resolve_voice(self, voice_key):
+        """Maps a UI voice name (or a raw edge-tts voice code) to a voice code."""
         # Default fallback
         voice = self.voices.get(voice_key, "en-US-GuyNeural")
         
         # If user passed a direct code (rare case), use it, otherwise lookup
         if voice_key not in self.voices and "-" in voice_key:
              voice = voice_key
-             
-        output_path = os.path.join(TEMP_DIR, "voice.mp3")
-        communicate = edge_tts.Communicate(text, voice, rate=rate_str)
-        await communicate.save(output_path)
-        return output_path
+        return voice
 
-    def create_text_clip_pil(self, words_to_show, highlight_idx, highlight_color, fontsize, color, font_name_key, size, position_y_offset=0):
-        """Generates a text clip using PIL. Supports highlighting a specific word."""
-        from PIL import Image, ImageDraw, ImageFont
-        
-        W, H = size
-        img = Image.new('RGBA', (W, H), (255, 255, 255, 0))
-        draw = ImageDraw.Draw(img)
-        
-        # Load Font
-        font_file = self.fonts.get(font_name_key, "arial.ttf")
+    async def synthesize(self, text, voice_key, rate_str="+0%", on_word=None, work_dir=TEMP_DIR, per_sentence=None):
+        """Streams TTS once: writes the audio incrementally and collects word timings.
+
+        With parallel_tts (or per_sentence) the script is split into sentences
+        that are synthesized concurrently (tts_concurrency at a time) and
+        stitched back together; each sentence is cached on its own, so an edit
+        only re-synthesizes the sentences it touched. Word timings are then
+        reported once the whole track is assembled.
+        """
+        voice = self.resolve_voice(voice_key)
+        output_path = os.path.join(work_dir, "voice.mp3")
+
+        if per_sentence is None:
+            per_sentence = self.parallel_tts
+        pieces = split_sentences(text) if per_sentence else []
+        if len(pieces) <= 1:
+            return await self._synthesize_piece(text, voice, rate_str, output_path, on_word)
+
+        piece_dir = tempfile.mkdtemp(prefix="tts_", dir=work_dir)
         try:
-            font = ImageFont.truetype(font_file, fontsize)
-        except OSError:
-            try:
-                font = ImageFont.truetype(f"/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", fontsize)
-            except OSError:
-                font = ImageFont.load_default()
-
-        # Wrap text logic (Word by word to track positions)
-        max_width = W - 100
-        lines = [] # List of list of (word_string, original_index)
-        current_line = []
-        
-        for idx, word in enumerate(words_to_show):
-            # Check length with new word
-            test_line_words = [w[0] for w in current_line] + [word]
-            test_line_str = ' '.join(test_line_words)
-            
-            bbox = draw.textbbox((0, 0), test_line_str, font=font)
-            w_line = bbox[2] - bbox[0]
-            
-            if w_line <= max_width:
-                current_line.append((word, idx))
-            else:
-                lines.append(current_line)
-                current_line = [(word, idx)]
-        lines.append(current_line)
-        
-        # Draw Text
-        total_text_height = len(lines) * (fontsize + 10)
-        
-        if position_y_offset == 'center':
-            y_start = (H - total_text_height) // 2
-        else:
-            y_start = position_y_offset
-            
-        current_y = y_start
-        for line_words in lines:
-            # Reconstruct string for centering
-            line_str = " ".join([w[0] for w in line_words])
-            bbox = draw.textbbox((0, 0), line_str, font=font)
-            w_line = bbox[2] - bbox[0]
-            x_pos = (W - w_line) // 2
-            
-            # Draw each word
-            # Note: We need to draw word by word to change colors, OR distinct "draw calls" if we can calculate X.
-            # To avoid irregular spacing issues with manual kerning, it's safer/easier to:
-            # 1. Draw the whole line stroke first (black).
-            # 2. Draw the whole line main color (white/text_color).
-            # 3. Draw ONLY the highlighted word in highlight_color ON TOP (if active).
-            
-            stroke_width = 2
-            stroke_color = "black"
+            async def synthesize_one(index, piece):
+                piece_path = os.path.join(piece_dir, f"piece_{index:04d}.mp3")
+                return await self._synthesize_piece(piece, voice, rate_str, piece_path)
 
-            # Draw Base Line (Stroke + Fill)
-            for adj_x in range(-stroke_width, stroke_width+1):
-                for adj_y in range(-stroke_width, stroke_width+1):
-                    draw.text((x_pos+adj_x, current_y+adj_y), line_str, font=font, fill=stroke_color)
-            
-            # Draw Main Fill (Text Color) - But wait, if we draw normal text, we might overdraw?
-            # Actually, let's just draw word by word for color control.
-            # We need correct X spacing. 'draw.text' doesn't return cursor x.
-            # We can calculate it.
-            
-            cursor_x = x_pos
-            for i, (word, orig_idx) in enumerate(line_words):
-                # determine color
-                final_color = highlight_color if orig_idx == highlight_idx else color
-                
-                # Draw just this word
-                draw.text((cursor_x, current_y), word, font=font, fill=final_color)
-                
-                # Advance cursor
-                # Measure this word + space
-                word_bbox = draw.textbbox((0, 0), word, font=font)
-                word_w = word_bbox[2] - word_bbox[0]
-                
-                cursor_x += word_w
-                
-                # Add space width unless last word
-                if i < len(line_words) - 1:
-                    space_bbox = draw.textbbox((0, 0), " ", font=font)
-                    space_w = space_bbox[2] - space_bbox[0]
-                    cursor_x += space_w
-                    
-            current_y += (fontsize + 10)
-            
-        return ImageClip(np.array(img)).with_duration(1)
+            results = await synthesize_pieces(pieces, synthesize_one, max_concurrency=self.tts_concurrency)
+            speech = stitch_speech(results, output_path)
+        finally:
+            shutil.rmtree(piece_dir, ignore_errors=True)
 
-    def generate_video(self, text, voice_style, speed, bg_color, text_color, highlight_color, font_name, font_size, max_words, position, progress_callback=None):
-        """Main pipeline to generate the video."""
-        
-        is_transparent = bg_color is None or bg_color == "Transparent"
-        
-        # 1. Generate Voice
-        if progress_callback: progress_callback("Generating Voice...")
-        
+        if on_word:
+            for timing in speech.words: on_word(timing)
+        return speech
+
+    async def _synthesize_piece(self, text, voice, rate_str, output_path, on_word=None):
+        # Identical (text, voice, rate) requests, e.g. a preview or a style-only
+        # re-render, are served from the on-disk cache without a network round trip
+        key = None
+        if self.tts_cache is not None:
+            source = getattr(self.speech_stream, "__name__", repr(self.speech_stream))
+            key = self.tts_cache.key(text, voice, rate_str, source)
+            cached = self.tts_cache.get(key, output_path)
+            if cached is not None:
+                if on_word:
+                    for timing in cached.words: on_word(timing)
+                return cached
+
+        chunks = self.speech_stream(text, voice, rate_str)
+        speech = await stream_speech(chunks, output_path, on_word=on_word)
+        if key is not None:
+            self.tts_cache.put(key, speech)
+        return speech
+
+    async def generate_audio(self, text, voice_key, rate_str="+0%", work_dir=TEMP_DIR):
+        """Generates TTS audio file using edge-tts."""
+        speech = await self.synthesize(text, voice_key, rate_str, work_dir=work_dir)
+        return speech.audio_path
+
+    def create_text_clip_pil(self, words_to_show, highlight_idx, highlight_color, fontsize, color, font_name_key, size, position_y_offset=0, scale=1.0):
+        """Generates a text clip using PIL. Supports highlighting a specific word."""
+        # The chunk's stroke and fill are rasterized once and cached by the caption
+        # renderer; each call only redraws the highlighted word on top of that base.
+        # The clip is cropped to the text and positioned on the canvas, so memory and
+        # compositing cost scale with the text area rather than the full frame.
+        import numpy as np
+        from moviepy import ImageClip
+
+        img, origin = self.captions.render_word_frame(
+            words_to_show, highlight_idx, highlight_color, fontsize, color, font_name_key, size, position_y_offset, scale
+        )
+        return ImageClip(np.array(img)).with_duration(1).with_position(origin)
+
+    def build_timeline(self, text, voice_style, speed, max_words, progress, work_dir=TEMP_DIR, per_sentence=None):
+        """Synthesizes the voice and times the captions; returns (speech, events).
+
+        events is None when the script has no words.
+        """
+        os.makedirs(work_dir, exist_ok=True)
         rate_val = int((speed - 1.0) * 100)
         rate_str = f"{rate_val:+d}%"
         
-        audio_path = asyncio.run(self.generate_audio(text, voice_style, rate_str))
-        
-        # 2. Analyze Audio
-        if progress_callback: progress_callback("Analyzing Audio & Timing...")
-        audio_clip = AudioFileClip(audio_path)
-        total_duration = audio_clip.duration
+        # Audio and word boundaries arrive in the same stream, so there is no
+        # separate pass over the audio file to find its duration
+        with progress.phase("tts"):
+            speech = asyncio.run(self.synthesize(text, voice_style, rate_str, work_dir=work_dir, per_sentence=per_sentence))
         
-        # 3. Prepare Captions & Timings
-        # Estimate duration per word based on characters
+        # Anchor each word on its TTS word boundary
         all_words = text.split()
-        if not all_words: return None
+        if not all_words: return speech, None
         
-        total_chars = sum(len(w) for w in all_words)
-        # Avoid div by zero
-        if total_chars == 0: total_chars = 1
+        with progress.phase("timing"):
+            word_durations = aligned_word_durations(all_words, speech.words, speech.duration)
+            # Each word in a chunk gets its moment to shine (be highlighted) while the
+            # rest of the chunk stays on screen
+            events = build_caption_events(all_words, word_durations, max_words)
+        return speech, events
+
+    @staticmethod
+    def caption_style(highlight_color, font_size, text_color, font_name, position, size=(1080, 1920), scale=1.0):
+        """Caption rendering arguments (see CaptionRenderer.render_word_frame) for the UI's style options."""
+        w, h = size
+        return dict(
+            highlight_color=highlight_color,
+            fontsize=font_size,
+            color=text_color,
+            font_name_key=font_name,
+            size=(w, h),
+            position_y_offset='center' if position == "Center" else h - 500,
+            scale=scale
+        )
+
+    def generate_video(self, text, voice_style, speed, bg_color, text_color, highlight_color, font_name, font_size, max_words, position, progress_callback=None, work_dir=TEMP_DIR, metrics=None, progress=None, draft=False, incremental=False, previous_manifest=None, size=(1080, 1920), alpha_codec="vp9", fps=FPS, animation=None):
+        """Main pipeline to generate the video; returns the output path.
+
+        work_dir: intermediate files and the output (one per concurrent job)
+        progress / metrics: a metrics.RenderProgress or StageMetrics to report to
+        draft: DRAFT_SCALE and DRAFT_FPS with a faster encoder, for style previews
+        incremental / previous_manifest: re-render what changed (frames backend, no animation; see render_manifest)
+        size: the output canvas (see ASPECT_SIZES)
+        alpha_codec: transparent output format (see render.ALPHA_CODECS)
+        fps: full-render frame rate (24, 30 or 60)
+        animation: motion captions, "pop", "fade" or "slide" (see motion)
+        """
+        progress = progress or RenderProgress(metrics)
+        if progress_callback: progress.subscribe(legacy_progress_adapter(progress_callback))
         
-        char_duration = total_duration / total_chars
+        # False, or the ALPHA_CODECS key for transparent output
+        is_transparent = (bg_color is None or bg_color == "Transparent") and alpha_codec
+        incremental = incremental and self.render_backend == "frames" and not animation
         
-        # Create Chunks
-        chunks_of_words = []
-        for i in range(0, len(all_words), max_words):
-            chunks_of_words.append(all_words[i:i+max_words])
+        # 1-2. Voice, then captions & timings
+        speech, events = self.build_timeline(text, voice_style, speed, max_words, progress, work_dir,
+                                             per_sentence=True if incremental else None)
+        if events is None: return None
+        audio_path = speech.audio_path
+        total_duration = speech.duration
             
-        # 4. Create Video Components
-        if progress_callback: progress_callback("Compositing Video...")
-        
-        w, h = 1080, 1920
-        
-        if is_transparent:
-            bg_clip = ColorClip(size=(w, h), color=(0,0,0,0), duration=total_duration, is_mask=False)
-        else:
-            bg_rgb = hex_to_rgb(bg_color)
-            bg_clip = ColorClip(size=(w, h), color=bg_rgb, duration=total_duration)
-        
-        clips = [bg_clip]
-        
-        if position == "Center":
-            y_pos_arg = 'center'
-        else:
-            y_pos_arg = h - 500
+        # 3. Create Video Components
+        style = self.caption_style(highlight_color, font_size, text_color, font_name, position, size,
+                                   scale=DRAFT_SCALE if draft else 1.0)
+        fps = DRAFT_FPS if draft else fps
 
-        current_time = 0.0
-        
-        for chunk in chunks_of_words:
-            # Calculate duration for this chunk
-            chunk_len = sum(len(w) for w in chunk)
-            chunk_duration = chunk_len * char_duration
-            
-            # Instead of one static clip, we generate a sequence for this chunk
-            # Each word in the chunk gets its moment to shine (be highlighted)
-            
-            # But wait, if we highlight word by word, the text of the chunk remains on screen
-            # while the highlight moves.
-            
-            # Loop through words in this chunk and create sub-clips
-            for i, word in enumerate(chunk):
-                word_len = len(word)
-                word_duration = word_len * char_duration
-                
-                # Render frame where 'i' is highlighted
-                txt_img = self.create_text_clip_pil(
-                    words_to_show=chunk,
-                    highlight_idx=i, # Index relative to this chunk
-                    highlight_color=highlight_color,
-                    fontsize=font_size,
-                    color=text_color,
-                    font_name_key=font_name,
-                    size=(w, h),
-                    position_y_offset=y_pos_arg
+        name = "draft_reel" if draft else "output_reel"
+        output_filename = os.path.join(work_dir, f"{name}.{output_extension(is_transparent)}")
+        bg_rgb = None if is_transparent else hex_to_rgb(bg_color)
+
+        # 4. Render
+        if animation:
+            return self._render_held_frames(events, audio_path, total_duration, bg_rgb, style, output_filename,
+                                            progress, fps, draft, alpha_codec, animation)
+        if incremental:
+            manifest = RenderManifest(work_dir, inputs=dict(
+                text=text, voice=self.resolve_voice(voice_style), rate=int((speed - 1.0) * 100), max_words=max_words,
+                style=style, bg_color=bg_color, fps=fps, draft=draft,
+            ))
+            previous = RenderManifest.load(previous_manifest or os.path.join(work_dir, MANIFEST_FILE))
+            return self._render_incremental(events, speech, bg_rgb, style, output_filename, progress, manifest,
+                                            previous, fps, draft, alpha_codec)
+        if self.render_backend == "moviepy" and not is_transparent:
+            return self._render_moviepy(events, audio_path, total_duration, bg_rgb, style, output_filename, progress, fps, draft)
+        if self.render_backend == "libass":
+            return self._render_libass(events, audio_path, total_duration, bg_rgb, style, output_filename, progress, fps, draft, alpha_codec)
+
+        return self._render_held_frames(events, audio_path, total_duration, bg_rgb, style, output_filename, progress, fps, draft, alpha_codec)
+
+    async def generate_video_async(self, text, voice_style, speed, bg_color, text_color, highlight_color, font_name, font_size, max_words, position, progress_callback=None, work_dir=TEMP_DIR, progress=None, draft=False, size=(1080, 1920), executor=None, alpha_codec="vp9", fps=FPS, animation=None):
+        """Coroutine counterpart of generate_video, for callers that already run an event loop.
+
+        Caption frames depend only on the script's words, not on when they are
+        spoken, so every chunk's highlight frames are composited in executor
+        (the loop's default thread pool if None) while the voice is synthesized
+        on the loop. Once the timings are in, the timeline is split into
+        segments, each encoded by an ffmpeg subprocess as soon as its frames
+        are written, and the segments are joined with the voice track. ffmpeg
+        runs are awaited, never blocking, so many renders can share one loop;
+        their segment encodes share one bound per loop (render.encode_slots).
+        Always uses the held-frame pipeline. fps and animation are as for
+        generate_video; with an animation every window frame of every word is
+        composited ahead, since the timings only decide how long each is held.
+        """
+        progress = progress or RenderProgress()
+        if progress_callback: progress.subscribe(legacy_progress_adapter(progress_callback))
+
+        words = text.split()
+        if not words: return None
+        os.makedirs(work_dir, exist_ok=True)
+        rate_str = f"{int((speed - 1.0) * 100):+d}%"
+        style = self.caption_style(highlight_color, font_size, text_color, font_name, position, size,
+                                   scale=DRAFT_SCALE if draft else 1.0)
+        fps = DRAFT_FPS if draft else fps
+        is_transparent = (bg_color is None or bg_color == "Transparent") and alpha_codec
+        bg_rgb = None if is_transparent else hex_to_rgb(bg_color)
+        name = "draft_reel" if draft else "output_reel"
+        output_filename = os.path.join(work_dir, f"{name}.{output_extension(is_transparent)}")
+        window_frames = max(1, int(round(MOTION_WINDOW * fps)))  # As motion_frames splits them
+
+        frame_for_event = CaptionFrames(self.fonts, style, bg_rgb, self.captions, animation=animation)
+        frames_dir = tempfile.mkdtemp(prefix="frames_", dir=work_dir)
+        ext = os.path.splitext(output_filename)[1]
+
+        # Which frames exist does not depend on the timings, so placeholder events will do
+        placeholders = build_caption_events(words, [0.0] * len(words), max_words)
+        loop = asyncio.get_running_loop()
+        ready = {c: loop.create_future() for c in range(-1, placeholders[-1].chunk_index + 1)}  # -1: background
+        paths = {}
+
+        def frame_key(event):
+            if event is None:
+                return None
+            step = round(event.progress * window_frames) if isinstance(event, MotionFrame) else None
+            return event.chunk_index, event.highlight_idx, step
+
+        def resolve(chunk_index=None, error=None):
+            def settle():
+                for c in (ready if error else [chunk_index]):
+                    if not ready[c].done():
+                        ready[c].set_exception(error) if error else ready[c].set_result(None)
+            loop.call_soon_threadsafe(settle)
+
+        def composite_all():
+            try:
+                for event in [None] + placeholders:
+                    frames = [event]
+                    if animation and event is not None:
+                        frames = [MotionFrame(event, i / window_frames) for i in range(window_frames)] + frames
+                    for frame in frames:
+                        path = os.path.join(frames_dir, f"frame_{len(paths):06d}.png")
+                        frame_for_event(frame).save(path, compress_level=1)
+                        paths[frame_key(frame)] = path
+                        progress.count("frames_rendered")
+                    if event is None or event.highlight_idx == len(event.words) - 1:
+                        resolve(-1 if event is None else event.chunk_index)
+            except Exception as e:
+                resolve(error=e)
+                raise
+
+        async def composite():
+            with progress.phase("frames"):
+                await loop.run_in_executor(executor, composite_all)
+
+        async def encode_segment(i, runs, audio_path=None, output_path=None, on_progress=None):
+            # Starts as soon as the compositor has written the segment's last chunk
+            await ready[max((e.chunk_index for e, _ in runs if e is not None), default=-1)]
+            list_path = os.path.join(frames_dir, f"segment_{i:04d}.ffconcat")
+            write_concat_list([(paths[frame_key(e)], n) for e, n in runs], list_path, fps)
+            output_path = output_path or os.path.join(frames_dir, f"segment_{i:04d}{ext}")
+            async with encode_slots():
+                return await encode_concat_async(list_path, audio_path, output_path, fps, is_transparent,
+                                                 sum(n for _, n in runs), on_progress, draft)
+
+        compositing = asyncio.ensure_future(composite())
+        try:
+            with progress.phase("tts"):
+                speech = await self.synthesize(text, voice_style, rate_str, work_dir=work_dir)
+            with progress.phase("timing"):
+                word_durations = aligned_word_durations(words, speech.words, speech.duration)
+                events = build_caption_events(words, word_durations, max_words)
+                runs = (motion_frames if animation else held_frames)(events, speech.duration, fps)
+
+            total_frames = sum(n for _, n in runs)
+            on_progress = lambda frame, _: progress.advance("encode", frame, total_frames)
+            with progress.phase("encode"):
+                # One segment per core; a single core gains nothing from splitting
+                segments = split_segments(runs, os.cpu_count() or 1)
+                if len(segments) == 1:
+                    await encode_segment(0, runs, speech.audio_path, output_filename, on_progress)
+                else:
+                    tasks = [asyncio.ensure_future(encode_segment(i, seg)) for i, seg in enumerate(segments)]
+                    try:
+                        segment_paths = await asyncio.gather(*tasks)
+                    except BaseException:
+                        # The other segments' encoders still read frames_dir: stop them before it goes
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+                        raise
+                    await concat_segments_async(segment_paths, speech.audio_path, output_filename, is_transparent,
+                                                total_frames, on_progress)
+                await compositing
+                progress.count("frames_encoded", total_frames)
+                progress.count("bytes_written", os.path.getsize(output_filename))
+            return output_filename
+        finally:
+            await asyncio.gather(compositing, return_exceptions=True)
+            shutil.rmtree(frames_dir, ignore_errors=True)
+
+    def generate_variants(self, text, voice_style, speed, max_words, variants, progress_callback=None, work_dir=TEMP_DIR, progress=None, draft=False, **style):
+        """Renders one script as several output variants; returns {name: output path}.
+
+        Each variant is a dict overriding the shared style keyword arguments
+        (bg_color, text_color, highlight_color, font_name, font_size, position)
+        plus "size" (w, h; see ASPECT_SIZES), "alpha_codec" (see generate_video)
+        and "name" (the output file stem).
+        The voice, word timings and held-frame runs are built once; caption
+        sprites are shared between variants that differ only in background.
+        Variants always use the held-frame pipeline, all at once: each is
+        composited on a thread of its own and streamed to its own ffmpeg
+        process (render.encode_frames_pipe), so no frame goes through a PNG.
+        """
+        progress = progress or RenderProgress()
+        if progress_callback: progress.subscribe(legacy_progress_adapter(progress_callback))
+
+        speech, events = self.build_timeline(text, voice_style, speed, max_words, progress, work_dir)
+        if events is None: return None
+        fps = DRAFT_FPS if draft else FPS
+        runs = held_frames(events, speech.duration, fps)
+        total_frames = sum(n for _, n in runs)
+
+        def render(frame_for_event, output_filename, is_transparent):
+            return encode_frames_pipe(runs, frame_for_event, speech.audio_path, output_filename, fps, is_transparent,
+                                      draft=draft)
+
+        outputs = {}
+        with progress.phase("encode"), ThreadPoolExecutor(max(1, len(variants))) as pool:
+            for i, variant in enumerate(variants):
+                v = dict(style, **variant)
+                name = v.pop("name", f"variant_{i}")
+                is_transparent = (v["bg_color"] is None or v["bg_color"] == "Transparent") and v.get("alpha_codec", "vp9")
+                bg_rgb = None if is_transparent else hex_to_rgb(v["bg_color"])
+                variant_style = self.caption_style(
+                    v["highlight_color"], v["font_size"], v["text_color"], v["font_name"], v["position"],
+                    tuple(v.get("size", ASPECT_SIZES["9:16"])), scale=DRAFT_SCALE if draft else 1.0
                 )
-                
-                txt_img = txt_img.with_start(current_time).with_duration(word_duration)
-                clips.append(txt_img)
-                
-                current_time += word_duration
-
-        # 5. Render
-        if progress_callback: progress_callback("Rendering Final Video...")
-        final_video = CompositeVideoClip(clips)
-        final_video = final_video.with_audio(audio_clip)
-        
-        if is_transparent:
-            output_filename = os.path.join(TEMP_DIR, "output_reel.webm")
-            final_video.write_videofile(
-                output_filename, 
-                fps=24, 
-                codec='libvpx-vp9',
-                ffmpeg_params=['-pix_fmt', 'yuva420p'],
-                logger=None
+                output_filename = os.path.join(work_dir, f"{name}.{output_extension(is_transparent)}")
+                # One shared renderer: variants in the same caption style rasterize each chunk once
+                frame_for_event = CaptionFrames(self.fonts, variant_style, bg_rgb, self.captions, progress)
+                outputs[name] = pool.submit(render, frame_for_event, output_filename, is_transparent)
+
+            for i, future in enumerate(outputs.values()):
+                output_filename = future.result()
+                progress.count("frames_rendered", len(runs))
+                progress.count("frames_encoded", total_frames)
+                progress.count("bytes_written", os.path.getsize(output_filename))
+                progress.advance("encode", i + 1, len(outputs))
+        return {name: future.result() for name, future in outputs.items()}
+
+    def export_overlay(self, text, voice_style, speed, text_color, highlight_color, font_name, font_size, max_words, position, progress_callback=None, work_dir=TEMP_DIR, progress=None, atlas=False):
+        """Exports captions as cropped PNG sprites with a timing manifest, ASS/SRT and the voice.
+
+        The caption-only alternative to a transparent WebM: every caption
+        image is rasterized and written once, with no full-canvas composite
+        and no alpha video encode. Returns the pack directory (see overlay.py).
+        """
+        progress = progress or RenderProgress()
+        if progress_callback: progress.subscribe(legacy_progress_adapter(progress_callback))
+
+        speech, events = self.build_timeline(text, voice_style, speed, max_words, progress, work_dir)
+        if events is None: return None
+        style = self.caption_style(highlight_color, font_size, text_color, font_name, position)
+
+        def sprite_for_event(event):
+            with progress.stage("rasterize"):
+                sprite, origin = self.captions.render_word_frame(event.words, event.highlight_idx, **style)
+            progress.count("frames_rendered")
+            progress.advance("frames", progress.counters["frames_rendered"], len(events))
+            return sprite, origin
+
+        font_file = resolve_font_file(self.fonts, font_name)
+
+        def write_captions_ass(events, path):
+            lines_for = lambda words: self.captions.layout_chunk(
+                words, font_size, font_name, style["size"], style["position_y_offset"]).lines
+            return write_ass(events, path, style["size"], font_file, font_size, text_color, highlight_color,
+                             style["position_y_offset"], lines_for)
+
+        with progress.phase("frames"):
+            return write_overlay(
+                events, sprite_for_event, speech.audio_path, os.path.join(work_dir, "overlay"), style["size"], FPS,
+                atlas=atlas, subtitle_writers={"captions.ass": write_captions_ass, "captions.srt": write_srt},
             )
-        else:
-            output_filename = os.path.join(TEMP_DIR, "output_reel.mp4")
-            final_video.write_videofile(
-                output_filename, 
-                fps=24, 
-                codec='libx264', 
-                audio_codec='aac',
-                preset='ultrafast',
-                logger=None
+
+    def _render_held_frames(self, events, audio_path, total_duration, bg_rgb, style, output_filename, progress, fps=FPS, draft=False, alpha_codec="vp9", animation=None):
+        """Renders each distinct caption frame once and has ffmpeg hold it (concat demuxer).
+
+        With an animation, each word's MOTION_WINDOW is rendered frame by frame.
+        """
+        frame_for_event = CaptionFrames(self.fonts, style, bg_rgb, self.captions, progress, animation)
+        return render_held_frames(
+            events, total_duration, frame_for_event, audio_path,
+            output_filename, fps=fps, is_transparent=bg_rgb is None and alpha_codec, work_dir=os.path.dirname(output_filename),
+            progress=progress, draft=draft, workers=self.encode_workers, motion_window=MOTION_WINDOW if animation else 0
+        )
+
+    def _render_incremental(self, events, speech, bg_rgb, style, output_filename, progress, manifest, previous=None, fps=FPS, draft=False, alpha_codec="vp9"):
+        """Held-frame render from content-keyed frame images and per-chunk segments.
+
+        Frames and segments whose keys are already on disk, here or in the
+        previous render's directory, are reused; the rest are rebuilt. The new
+        manifest replaces the old one once the output is written.
+        """
+        is_transparent = bg_rgb is None and alpha_codec
+        canvas = scaled_size(style["size"], style["scale"])
+        ext = output_extension(is_transparent)
+
+        # Sentence audio is reused through the TTS cache; record which sentences changed
+        source = getattr(self.speech_stream, "__name__", repr(self.speech_stream))
+        rate_str = f"{manifest.inputs['rate']:+d}%"
+        manifest.sentences = [
+            {"text": piece, "key": TTSCache.key(piece, manifest.inputs["voice"], rate_str, source)}
+            for piece in split_sentences(manifest.inputs["text"])
+        ]
+        known = previous.sentence_keys() if previous else set()
+        reused = sum(s["key"] in known for s in manifest.sentences)
+        progress.count("sentences_reused", reused)
+        progress.count("sentences_synthesized", len(manifest.sentences) - reused)
+
+        def frame_key(event):
+            if event is None:
+                return content_key("background", canvas, bg_rgb)
+            return content_key(event.words, event.highlight_idx, style, bg_rgb)
+
+        runs = held_frames(events, speech.duration, fps)
+        total_frames = sum(n for _, n in runs)
+        os.makedirs(os.path.join(manifest.root, FRAMES_DIR), exist_ok=True)
+        os.makedirs(os.path.join(manifest.root, SEGMENTS_DIR), exist_ok=True)
+
+        frame_for_event = CaptionFrames(self.fonts, style, bg_rgb, self.captions, progress)
+        distinct = {}
+        for event, _ in runs:
+            distinct.setdefault(frame_key(event), event)
+        with progress.phase("frames"):
+            for i, (key, event) in enumerate(distinct.items()):
+                path = manifest.frame_path(key)
+                if manifest.reuse(path, previous):
+                    progress.count("frames_reused")
+                else:
+                    frame = frame_for_event(event)
+                    frame.save(path + ".part.png", compress_level=1)
+                    os.replace(path + ".part.png", path)
+                    progress.count("frames_rendered")
+                progress.advance("frames", i + 1, len(distinct))
+        manifest.frames = {key: os.path.relpath(manifest.frame_path(key), manifest.root) for key in distinct}
+
+        with progress.phase("encode"):
+            done = 0
+            for segment in segment_runs(runs):
+                entries = [(frame_key(event), n) for event, n in segment]
+                n_frames = sum(n for _, n in entries)
+                key = content_key(entries, fps, is_transparent, draft)
+                path = manifest.segment_path(key, ext)
+                if manifest.reuse(path, previous):
+                    progress.count("segments_reused")
+                else:
+                    list_path = os.path.join(manifest.root, FRAMES_DIR, f"{key}.ffconcat")
+                    write_concat_list([(manifest.frame_path(k), n) for k, n in entries], list_path, fps)
+                    part_path = manifest.segment_path(key + ".part", ext)
+                    encode_concat(list_path, None, part_path, fps, is_transparent, n_frames, draft=draft)
+                    os.replace(part_path, path)
+                    os.remove(list_path)
+                    progress.count("segments_encoded")
+                chunk = next((event.chunk_index for event, _ in segment if event is not None), None)
+                manifest.segments.append({
+                    "key": key, "file": os.path.relpath(path, manifest.root), "frames": n_frames, "chunk": chunk,
+                })
+                done += n_frames
+                progress.advance("encode", done, total_frames)
+
+            concat_segments(
+                [manifest.artefact_path(s["file"]) for s in manifest.segments], speech.audio_path, output_filename,
+                is_transparent, total_frames,
             )
-        
+            progress.count("frames_encoded", total_frames)
+            progress.count("bytes_written", os.path.getsize(output_filename))
+
+        manifest.output = os.path.basename(output_filename)
+        manifest.save()
+        manifest.prune()
         return output_filename
+
+    def _render_libass(self, events, audio_path, total_duration, bg_rgb, style, output_filename, progress, fps=FPS, draft=False, alpha_codec="vp9"):
+        """Writes the timeline as an ASS script and has ffmpeg's libass draw every frame."""
+        scale = style["scale"]
+        font_file = resolve_font_file(self.fonts, style["font_name_key"])
+        fontsize_px = max(1, int(round(style["fontsize"] * scale)))
+        work_dir = os.path.dirname(output_filename)
+
+        def layout_for(words):
+            # Same layout (and line breaks) the PIL backends draw, on the output canvas
+            return self.captions.layout_chunk(
+                words, style["fontsize"], style["font_name_key"], style["size"], style["position_y_offset"], scale
+            )
+
+        script = dict(
+            layout_for=layout_for, size=scaled_size(style["size"], scale), font_file=font_file,
+            fontsize=fontsize_px, fps=fps, outline=stroke_width(scale),
+        )
+        ass_path = os.path.join(work_dir, "captions.ass")
+        mask_path = None
+        with progress.phase("frames"):
+            write_karaoke_ass(events, ass_path, color=style["color"], highlight_color=style["highlight_color"], **script)
+            if bg_rgb is None:
+                mask_path = os.path.join(work_dir, "captions_mask.ass")
+                write_karaoke_ass(events, mask_path, color="#FFFFFF", highlight_color="#FFFFFF",
+                                  outline_color="#FFFFFF", **script)
+
+        font_file_path = font_path(font_file)
+        total_frames = int(total_duration * fps)
+        with progress.phase("encode"):
+            encode_ass(
+                ass_path, audio_path, output_filename, script["size"], fps, total_frames, bg_rgb,
+                fonts_dir=os.path.dirname(font_file_path) if font_file_path else None, mask_ass_path=mask_path,
+                on_progress=lambda frame, _: progress.advance("encode", frame, total_frames), draft=draft,
+                alpha_codec=alpha_codec,
+            )
+            progress.count("frames_encoded", total_frames)
+            progress.count("bytes_written", os.path.getsize(output_filename))
+        return output_filename
+
+    def _render_moviepy(self, events, audio_path, total_duration, bg_rgb, style, output_filename, progress, fps=FPS, draft=False):
+        """moviepy path (opaque output): a lazy clip whose frames are composited as the encoder asks for them.
+
+        Only the frame currently on screen is held; it is dropped once its
+        event has passed, so memory stays flat however long the script is.
+        The voice track never becomes an AudioFileClip: the encoder's ffmpeg
+        reads the MP3 itself and muxes it in the same pass.
+        """
+        import numpy as np
+        from moviepy import VideoClip
+
+        with progress.phase("frames"):
+            frame_for_event = CaptionFrames(self.fonts, style, bg_rgb, self.captions, progress)
+            cursor = EventCursor(events)
+            current = {}  # The event on screen -> its frame array
+
+            def frame_at(t):
+                event = cursor.at(t)
+                if event not in current:
+                    current.clear()
+                    current[event] = np.asarray(frame_for_event(event))
+                    progress.count("frames_rendered")
+                return current[event]
+
+            final_video = VideoClip(frame_at, duration=total_duration)
+
+        # moviepy composites each frame while encoding, so both count as "encode"
+        with progress.phase("encode"):
+            self._write_moviepy(final_video, output_filename, encode_progress_logger(progress), fps, draft, audio_path)
+            progress.count("frames_encoded", int(final_video.duration * fps))
+            progress.count("bytes_written", os.path.getsize(output_filename))
+        return output_filename
+
+    def _write_moviepy(self, final_video, output_filename, logger=None, fps=FPS, draft=False, audio_path=None):
+        final_video.write_videofile(
+            output_filename, 
+            fps=fps, 
+            codec='libx264', 
+            audio=audio_path or False,
+            audio_codec=audio_codec(False),
+            preset='ultrafast',
+            ffmpeg_params=['-crf', '30'] if draft else None,
+            logger=logger
+        )
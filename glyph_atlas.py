@@ -0,0 +1,179 @@
+"""Glyph-atlas caption rasterizer: PIL-identical text from cached glyph masks.
+
+Each (font file, pixel size, stroke width) gets one GlyphAtlas holding every
+glyph's coverage mask and its outline mask. The outline is dilated once per
+glyph, where the PIL rasterizer draws 25 offset passes per chunk. Lines are
+then composed with NumPy blits of those masks and tinted with the text or
+highlight colour; no draw.text call is made after a glyph's first use.
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageColor, ImageFont
+
+from captions import ChunkRaster
+from layout import load_font
+
+
+def atlas_supported(font):
+    """Whether glyph masks placed at PIL's pen positions reproduce draw.text for this font.
+
+    Raqm layout can shape (ligatures, GPOS kerning), so only FreeType fonts
+    on the basic layout engine qualify.
+    """
+    return isinstance(font, ImageFont.FreeTypeFont) and font.layout_engine == ImageFont.Layout.BASIC
+
+
+class Glyph:
+    """One glyph's masks, each with its offset from the pen position."""
+    __slots__ = ("coverage", "offset", "stroke", "stroke_offset")
+
+    def __init__(self, coverage, offset, stroke, stroke_offset):
+        self.coverage = coverage            # uint8 ink coverage
+        self.offset = offset
+        self.stroke = stroke                # uint8 outline alpha (coverage dilated by the stroke width)
+        self.stroke_offset = stroke_offset
+
+
+class GlyphAtlas:
+    """Coverage and outline masks for every glyph drawn so far in one font, size and stroke width."""
+
+    def __init__(self, font, stroke):
+        self.font = font
+        self.stroke = stroke
+        self._glyphs = {}
+        self._words = {}  # word -> [(Glyph, pen x)]
+
+    def glyph(self, char):
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            glyph = self._glyphs[char] = self._build(char)
+        return glyph
+
+    def _build(self, char):
+        mask, offset = self.font.getmask2(char, mode="L")
+        w, h = mask.size
+        if not w or not h:
+            return None
+        coverage = np.asarray(mask, np.uint8).reshape(h, w)
+
+        # Dilation by the (2s+1)^2 square the PIL path strokes with, combining the
+        # shifted copies the way its 25 alpha-composited passes do
+        s = self.stroke
+        clear = np.ones((h + 2 * s, w + 2 * s), np.float32)
+        transmit = 1 - coverage.astype(np.float32) / 255
+        for dy in range(2 * s + 1):
+            for dx in range(2 * s + 1):
+                clear[dy:dy + h, dx:dx + w] *= transmit
+        stroke = np.rint((1 - clear) * 255).astype(np.uint8)
+        return Glyph(coverage, offset, stroke, (offset[0] - s, offset[1] - s))
+
+    def word(self, word):
+        """The word's glyphs with their pen positions, as draw.text places them."""
+        placed = self._words.get(word)
+        if placed is None:
+            placed = []
+            for i, char in enumerate(word):
+                glyph = self.glyph(char)
+                if glyph is not None:
+                    # The basic layout adds each pair's kerning to the previous glyph's
+                    # advance, so the pen stands at the kerned length of word[:i + 1] less
+                    # this glyph's own advance; FreeType rounds it to whole pixels
+                    pen = self.font.getlength(word[:i + 1]) - self.font.getlength(char)
+                    placed.append((glyph, math.floor(pen + 0.5)))
+            self._words[word] = placed
+        return placed
+
+    def blit_word(self, plane, word, x, y, outline=False):
+        """Max-blends the word's coverage (or outline) masks drawn at (x, y) into plane."""
+        for glyph, pen in self.word(word):
+            mask, (dx, dy) = (glyph.stroke, glyph.stroke_offset) if outline else (glyph.coverage, glyph.offset)
+            blit_max(plane, mask, x + pen + dx, y + dy)
+
+
+@lru_cache(maxsize=64)
+def glyph_atlas(font_file, fontsize, stroke):
+    """The process-wide GlyphAtlas for a font file at a pixel size and stroke width."""
+    return GlyphAtlas(load_font(font_file, fontsize), stroke)
+
+
+class AtlasChunkRaster(ChunkRaster):
+    """A ChunkRaster composed from atlas masks; a highlight re-tints only its word's box."""
+
+    def __init__(self, atlas, stroke_alpha, base_layer, layout, origin):
+        super().__init__(None, base_layer, layout, origin, atlas.stroke)
+        self.atlas = atlas
+        self.stroke_alpha = stroke_alpha  # uint8 outline alpha of the whole sprite
+
+    def highlight(self, highlight_idx, highlight_color):
+        frame = self.base_layer.copy()
+        if highlight_idx is None or not (0 <= highlight_idx < len(self.layout.words)):
+            return frame
+
+        word = self.layout.words[highlight_idx]
+        x0, y0, x1, y1 = self.word_box(highlight_idx)
+        ox, oy = self.origin
+        coverage = np.zeros((y1 - y0, x1 - x0), np.uint8)
+        self.atlas.blit_word(coverage, word.word, word.x - ox - x0, word.y - oy - y0)
+        frame.paste(tint(coverage, self.stroke_alpha[y0:y1, x0:x1], highlight_color), (x0, y0))
+        return frame
+
+    def draw_words(self, box, indices, color):
+        x0, y0, x1, y1 = box
+        ox, oy = self.origin
+        stroke_alpha = np.zeros((y1 - y0, x1 - x0), np.uint8)
+        coverage = np.zeros_like(stroke_alpha)
+        for i in indices:
+            word = self.layout.words[i]
+            self.atlas.blit_word(stroke_alpha, word.word, word.x - ox - x0, word.y - oy - y0, outline=True)
+            self.atlas.blit_word(coverage, word.word, word.x - ox - x0, word.y - oy - y0)
+        return tint(coverage, stroke_alpha, color)
+
+
+def rasterize_chunk(layout, color, stroke, bounds):
+    """AtlasChunkRaster of a laid-out chunk; bounds is sprite_bounds' (x, y, w, h)."""
+    atlas = glyph_atlas(layout.font_file, layout.font.size, stroke)
+    ox, oy, w, h = bounds
+    stroke_alpha = np.zeros((h, w), np.uint8)
+    coverage = np.zeros((h, w), np.uint8)
+    for word in layout.words:
+        atlas.blit_word(stroke_alpha, word.word, word.x - ox, word.y - oy, outline=True)
+        atlas.blit_word(coverage, word.word, word.x - ox, word.y - oy)
+    return AtlasChunkRaster(atlas, stroke_alpha, tint(coverage, stroke_alpha, color), layout, (ox, oy))
+
+
+def blit_max(plane, mask, x, y):
+    """plane = max(plane, mask) over the mask placed at (x, y), clipped to the plane."""
+    H, W = plane.shape
+    h, w = mask.shape
+    x0, y0, x1, y1 = max(0, x), max(0, y), min(W, x + w), min(H, y + h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    region = plane[y0:y1, x0:x1]
+    np.maximum(region, mask[y0 - y:y1 - y, x0 - x:x1 - x], out=region)
+
+
+@lru_cache(maxsize=32)
+def tint_table(color):
+    """RGBA for every (fill coverage, outline alpha) pair: fill in color over a black outline.
+
+    Composites the way PIL's draw.text does over the stroke layer; indexed
+    by coverage * 256 + outline alpha.
+    """
+    rgb = np.array(ImageColor.getrgb(color)[:3], np.float32)
+    fill = np.arange(256, dtype=np.float32)[:, None] / 255
+    outline = np.arange(256, dtype=np.float32)[None, :] / 255
+    alpha = fill + outline * (1 - fill)
+    # Colour is the fill's share of the alpha; the outline adds only black
+    share = np.divide(fill, alpha, out=np.zeros_like(alpha), where=alpha > 0)
+    table = np.empty((256, 256, 4), np.uint8)
+    table[..., :3] = np.rint(share[..., None] * rgb)
+    table[..., 3] = np.rint(alpha * 255)
+    return table.reshape(256 * 256, 4)
+
+
+def tint(coverage, stroke, color):
+    """RGBA image of fill coverage in color over a black outline of alpha stroke."""
+    index = coverage.astype(np.uint16) << 8 | stroke
+    return Image.fromarray(tint_table(color)[index])
@@ -0,0 +1,240 @@
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from generator import TEMP_DIR
+from metrics import PROGRESS, RenderProgress, StageMetrics
+
+JOBS_DIR = os.path.join(TEMP_DIR, "jobs")
+DEFAULT_MAX_AGE = 6 * 3600
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Minimum seconds between progress.json rewrites for per-frame progress events
+PROGRESS_WRITE_INTERVAL = 0.25
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# One generator per worker process, so fonts, layouts and caches persist across jobs
+_worker_generator = None
+
+
+def default_generator():
+    from generator import ReelGenerator
+    return ReelGenerator()
+
+
+def warm_up_worker(generator_factory=default_generator):
+    """Pool initializer: builds the worker's generator and preloads fonts, ffmpeg and imports."""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = generator_factory()
+        _worker_generator.warm_up()
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_render_job(work_dir, params, generator_factory=default_generator):
+    """Worker entry point: renders one job inside its own directory.
+
+    params are generate_video's arguments; with export="overlay" the job
+    produces a zipped caption overlay pack (ReelGenerator.export_overlay)
+    instead of a video.
+    """
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = generator_factory()
+
+    os.makedirs(work_dir, exist_ok=True)
+    progress_path = os.path.join(work_dir, "progress.json")
+    _write_json(progress_path, {"message": "Starting...", "fraction": 0.0, "time": time.time()})
+
+    last_write = [0.0]
+
+    def write_progress(event):
+        # Stage boundaries are always written; frame progress at most every PROGRESS_WRITE_INTERVAL
+        if event.kind == PROGRESS and event.time - last_write[0] < PROGRESS_WRITE_INTERVAL:
+            return
+        last_write[0] = event.time
+        _write_json(progress_path, event.to_dict())
+
+    progress = RenderProgress(StageMetrics())
+    progress.subscribe(write_progress)
+    params = dict(params)
+    if params.pop("export", "video") == "overlay":
+        # Caption-only pack (sprites, manifest, subtitles, voice), zipped for download
+        params.pop("bg_color", None)
+        pack_dir = _worker_generator.export_overlay(**params, work_dir=work_dir, progress=progress)
+        output = shutil.make_archive(pack_dir, "zip", pack_dir)
+    else:
+        output = _worker_generator.generate_video(**params, work_dir=work_dir, progress=progress)
+
+    # Per-job metrics, for dashboards (JSON) or a Prometheus textfile collector
+    _write_json(os.path.join(work_dir, "metrics.json"), progress.to_dict())
+    with open(os.path.join(work_dir, "metrics.prom"), "w") as f:
+        f.write(progress.to_prometheus())
+    return output
+
+
+class RenderJob:
+    """A queued render and where its files live."""
+
+    def __init__(self, job_id, work_dir, params, future):
+        self.job_id = job_id
+        self.work_dir = work_dir
+        self.params = params
+        self.future = future
+        self.submitted_at = time.time()
+
+    @property
+    def status(self):
+        if not self.future.done():
+            # The worker writes progress.json as soon as it picks the job up
+            return RUNNING if os.path.exists(os.path.join(self.work_dir, "progress.json")) else QUEUED
+        return FAILED if self.future.exception() is not None else DONE
+
+
+class RenderQueue:
+    """Bounded process pool of renders, one directory per job.
+
+    At most max_workers renders (and therefore ffmpeg encodes) run at once;
+    the rest wait in the queue. Finished job directories are removed once
+    older than max_age seconds, or oldest first while all job directories
+    together exceed max_bytes.
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR, max_workers=None, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES,
+                 generator_factory=default_generator):
+        self.jobs_dir = jobs_dir
+        self.generator_factory = generator_factory  # Module-level callable, run once per worker
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # spawn: the Streamlit server is multi-threaded, which fork does not handle safely
+        self._pool = ProcessPoolExecutor(
+            self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up_worker, initargs=(generator_factory,),
+        )
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def warm_up(self):
+        """Starts every worker now, so the first jobs don't wait for process start-up and warm-up."""
+        for _ in range(self.max_workers):
+            self._pool.submit(os.getpid)
+
+    def submit(self, **params):
+        """Queues a render with generate_video's arguments and returns its job id."""
+        self.cleanup()
+        job_id = uuid.uuid4().hex[:12]
+        work_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(work_dir)
+        future = self._pool.submit(run_render_job, work_dir, params, self.generator_factory)
+        job = RenderJob(job_id, work_dir, params, future)
+        with self._lock:
+            self._jobs[job_id] = job
+        return job_id
+
+    def preview_dir(self, name):
+        """A session's directory for in-app previews and drafts, created on demand.
+
+        It lives in jobs_dir, so cleanup() removes it by age and size like a
+        finished job's; each call marks it as recently used.
+        """
+        path = os.path.join(self.jobs_dir, name)
+        os.makedirs(path, exist_ok=True)
+        os.utime(path)
+        return path
+
+    def status(self, job_id):
+        """Snapshot of a job for polling: status, latest progress event, output or error.
+
+        While running, `stage`, `fraction` (0..1 overall) and `eta_s` (seconds left
+        in the current stage, when known) come from the worker's last progress event;
+        finished jobs also carry their `metrics` report.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return {"job_id": job_id, "status": "unknown"}
+
+        info = {"job_id": job_id, "status": job.status, "message": None, "stage": None, "fraction": 0.0,
+                "eta_s": None, "output_path": None, "error": None}
+        progress = _read_json(os.path.join(job.work_dir, "progress.json"))
+        if progress:
+            for key in ("message", "stage", "fraction", "eta_s"):
+                info[key] = progress.get(key, info[key])
+        if info["status"] == QUEUED:
+            info["position"] = self._queue_position(job)
+        elif info["status"] == DONE:
+            info["output_path"] = job.future.result()
+            info["fraction"] = 1.0
+            info["metrics"] = _read_json(os.path.join(job.work_dir, "metrics.json"))
+        elif info["status"] == FAILED:
+            info["error"] = str(job.future.exception())
+        return info
+
+    def wait(self, job_id, timeout=None):
+        with self._lock:
+            job = self._jobs[job_id]
+        job.future.exception(timeout)
+        return self.status(job_id)
+
+    def _queue_position(self, job):
+        with self._lock:
+            waiting = [j for j in self._jobs.values() if j.status == QUEUED]
+        waiting.sort(key=lambda j: j.submitted_at)
+        return waiting.index(job) + 1 if job in waiting else 0
+
+    def cleanup(self, now=None):
+        """Removes finished job directories past max_age, then oldest first while over max_bytes."""
+        now = now or time.time()
+        with self._lock:
+            active_dirs = {j.work_dir for j in self._jobs.values() if not j.future.done()}
+
+        entries = []
+        for name in os.listdir(self.jobs_dir):
+            path = os.path.join(self.jobs_dir, name)
+            if path in active_dirs or not os.path.isdir(path):
+                continue
+            entries.append((os.path.getmtime(path), _dir_size(path), name))
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, name in sorted(entries):
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.jobs_dir, name), ignore_errors=True)
+            with self._lock:
+                self._jobs.pop(name, None)
+            total -= size
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,170 @@
+import os
+from functools import lru_cache
+
+from PIL import ImageFont
+
+FALLBACK_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+DEFAULT_FONT_FILE = "arial.ttf"
+LINE_SPACING = 10
+SIDE_MARGIN = 100
+
+
+def resolve_font_file(fonts, font_name_key):
+    """Maps a UI font name (see ReelGenerator.fonts) to a font file."""
+    return fonts.get(font_name_key, DEFAULT_FONT_FILE)
+
+
+@lru_cache(maxsize=None)
+def resolve_font_file_path(font_file):
+    """File a font name resolves to, once per process: the font itself, else DejaVu, else None.
+
+    PIL searches the system font directories for bare names like
+    "arial.ttf", and a miss walks all of them, so the result is cached
+    rather than rediscovered for every font size.
+    """
+    for candidate in (font_file, FALLBACK_FONT):
+        try:
+            path = ImageFont.truetype(candidate, 10).path
+        except OSError:
+            continue
+        return os.path.abspath(path) if isinstance(path, str) else candidate
+    return None
+
+
+@lru_cache(maxsize=None)
+def load_font(font_file, fontsize):
+    """Loads a font once per process, falling back to DejaVu and then PIL's default.
+
+    Captions are plain words that need no shaping, so fonts use the basic
+    layout engine even where Pillow has raqm; glyph_atlas requires it.
+    """
+    path = resolve_font_file_path(font_file)
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, fontsize, layout_engine=ImageFont.Layout.BASIC)
+
+
+def font_path(font_file):
+    """File that load_font actually opens for a font (None for PIL's built-in font)."""
+    path = resolve_font_file_path(font_file)
+    return path if isinstance(path, str) and os.path.exists(path) else None
+
+
+@lru_cache(maxsize=65536)
+def word_bbox(font_file, fontsize, word):
+    """Cached ink bounding box of a word drawn at (0, 0)."""
+    return load_font(font_file, fontsize).getbbox(word)
+
+
+def scaled_size(size, scale):
+    """Canvas size at `scale`, rounded to even dimensions for yuv420p encoding."""
+    if scale == 1.0:
+        return tuple(size)
+    return tuple(max(2, int(round(d * scale / 2)) * 2) for d in size)
+
+
+def word_width(font_file, fontsize, word):
+    """Cached advance used to step the cursor past a word."""
+    bbox = word_bbox(font_file, fontsize, word)
+    return bbox[2] - bbox[0]
+
+
+class WordBox:
+    """Position of one word inside a TextLayout."""
+    __slots__ = ("word", "index", "line", "x", "y", "box")
+
+    def __init__(self, word, index, line, x, y, box):
+        self.word = word
+        self.index = index  # Index in the words passed to layout_text
+        self.line = line
+        self.x = x          # Draw origin
+        self.y = y
+        self.box = box      # Ink bounds (x0, y0, x1, y1) on the canvas
+
+
+class TextLayout:
+    """Line breaks and per-word positions for a block of caption text."""
+
+    def __init__(self, words, lines, font, font_file, fontsize, size, scale=1.0):
+        self.words = words  # List of WordBox, in input order
+        self.lines = lines  # List of lists of word indices
+        self.font = font    # Font the words are drawn with (already scaled)
+        self.font_file = font_file
+        self.fontsize = fontsize  # Full-size font size
+        self.size = size    # Canvas the layout is placed on (already scaled)
+        self.scale = scale
+
+    @property
+    def line_height(self):
+        return int(round((self.fontsize + LINE_SPACING) * self.scale))
+
+    @property
+    def bbox(self):
+        """Union of every word's ink bounds, or None when there are no words."""
+        if not self.words:
+            return None
+        return (
+            min(w.box[0] for w in self.words),
+            min(w.box[1] for w in self.words),
+            max(w.box[2] for w in self.words),
+            max(w.box[3] for w in self.words),
+        )
+
+
+def break_lines(widths, space_w, max_width):
+    """Greedy line breaking in one pass over the summed word widths."""
+    lines = []
+    current_line = []
+    line_w = 0
+    for idx, w in enumerate(widths):
+        new_w = w if not current_line else line_w + space_w + w
+        if new_w <= max_width or not current_line:
+            current_line.append(idx)
+            line_w = new_w
+        else:
+            lines.append(current_line)
+            current_line = [idx]
+            line_w = w
+    lines.append(current_line)
+    return lines
+
+
+def layout_text(words, font_file, fontsize, size, position_y_offset=0, scale=1.0):
+    """Lays out words centered on a canvas of `size`, starting at `position_y_offset` or 'center'.
+
+    `size`, `fontsize` and `position_y_offset` are full-size values; with a
+    `scale` below 1 the layout is placed on the scaled canvas (for drafts),
+    keeping the full-size line breaks so the framing matches the final render.
+    """
+    W, H = size
+    widths = [word_width(font_file, fontsize, w) for w in words]
+    space_w = word_width(font_file, fontsize, " ")
+    lines = break_lines(widths, space_w, W - SIDE_MARGIN)
+
+    if scale != 1.0:
+        fontsize_px = max(1, int(round(fontsize * scale)))
+        widths = [word_width(font_file, fontsize_px, w) for w in words]
+        space_w = word_width(font_file, fontsize_px, " ")
+        W, H = scaled_size(size, scale)
+    else:
+        fontsize_px = fontsize
+    font = load_font(font_file, fontsize_px)
+
+    line_height = int(round((fontsize + LINE_SPACING) * scale))
+    if position_y_offset == 'center':
+        current_y = (H - len(lines) * line_height) // 2
+    else:
+        current_y = int(round(position_y_offset * scale))
+
+    boxes = [None] * len(words)
+    for line_no, line in enumerate(lines):
+        line_w = sum(widths[i] for i in line) + space_w * max(0, len(line) - 1)
+        cursor_x = (W - line_w) // 2
+        for idx in line:
+            bx0, by0, bx1, by1 = word_bbox(font_file, fontsize_px, words[idx])
+            box = (cursor_x + bx0, current_y + by0, cursor_x + bx1, current_y + by1)
+            boxes[idx] = WordBox(words[idx], idx, line_no, cursor_x, current_y, box)
+            cursor_x += widths[idx] + space_w
+        current_y += line_height
+
+    return TextLayout(boxes, lines, font, font_file, fontsize, (W, H), scale)
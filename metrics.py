@@ -0,0 +1,228 @@
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes():
+    """Resident set size of this process right now (Linux /proc, else the peak so far)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _RSSSampler(threading.Thread):
+    """Polls RSS in the background to catch the peak while a stage runs."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return self.peak
+
+
+class StageMetrics:
+    """Wall time and peak RSS per pipeline stage.
+
+    A stage may be entered many times (e.g. once per caption frame); its wall
+    time accumulates and its peak RSS is the highest seen across entries.
+    Child processes (ffmpeg) are reported separately through
+    `children_peak_rss_mb`, since their memory is not part of this process.
+    """
+
+    def __init__(self, sample_interval=0.005, sample_rss=True):
+        self.sample_interval = sample_interval
+        self.sample_rss = sample_rss
+        self.stages = {}  # name -> {"wall_s", "calls", "peak_rss_mb"}, in first-entered order
+
+    @contextmanager
+    def stage(self, name):
+        sampler = None
+        if self.sample_rss:
+            sampler = _RSSSampler(self.sample_interval)
+            sampler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak_mb = (sampler.stop() if sampler else current_rss_bytes()) / (1024 * 1024)
+            entry = self.stages.setdefault(name, {"wall_s": 0.0, "calls": 0, "peak_rss_mb": 0.0})
+            entry["wall_s"] += elapsed
+            entry["calls"] += 1
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"], peak_mb)
+
+    def to_dict(self):
+        return {
+            "stages": {
+                name: {"wall_s": round(s["wall_s"], 4), "calls": s["calls"], "peak_rss_mb": round(s["peak_rss_mb"], 1)}
+                for name, s in self.stages.items()
+            },
+            "total_s": round(sum(s["wall_s"] for s in self.stages.values()), 4),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "children_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        }
+
+
+@contextmanager
+def no_stage(name):
+    yield
+
+
+# Top-level phases of a render, in pipeline order, with the message shown for each
+PHASE_LABELS = {
+    "tts": "Generating Voice...",
+    "timing": "Analyzing Audio & Timing...",
+    "frames": "Compositing Video...",
+    "encode": "Rendering Final Video...",
+}
+# Share of the overall progress bar each phase accounts for
+PHASE_WEIGHTS = {"tts": 0.2, "timing": 0.05, "frames": 0.25, "encode": 0.5}
+
+STAGE_START, STAGE_END, PROGRESS = "stage_start", "stage_end", "progress"
+
+
+class ProgressEvent:
+    """One structured progress update from a render."""
+    __slots__ = ("kind", "stage", "time", "duration_s", "done", "total", "eta_s", "fraction")
+
+    def __init__(self, kind, stage, time, duration_s=None, done=None, total=None, eta_s=None, fraction=0.0):
+        self.kind = kind          # STAGE_START, STAGE_END or PROGRESS
+        self.stage = stage
+        self.time = time          # Wall-clock timestamp
+        self.duration_s = duration_s
+        self.done = done          # Units finished within the stage (e.g. frames)
+        self.total = total
+        self.eta_s = eta_s        # Estimated seconds left in the stage
+        self.fraction = fraction  # Overall render progress, 0..1
+
+    @property
+    def message(self):
+        label = PHASE_LABELS.get(self.stage, self.stage)
+        if self.kind == PROGRESS and self.total:
+            eta = f", ~{self.eta_s:.0f}s left" if self.eta_s is not None else ""
+            return f"{label} {self.done}/{self.total}{eta}"
+        if self.kind == STAGE_END:
+            return f"{label} done in {self.duration_s:.1f}s"
+        return label
+
+    def to_dict(self):
+        d = {k: getattr(self, k) for k in self.__slots__ if getattr(self, k) is not None}
+        d["message"] = self.message
+        return d
+
+
+class RenderProgress:
+    """Structured progress and metrics for one render.
+
+    phase() marks the top-level pipeline phases (see PHASE_LABELS) and emits
+    stage_start / stage_end events; advance() emits per-unit progress with an
+    ETA; stage() times finer-grained work silently; count() bumps counters
+    such as frames_rendered or bytes_written. Listeners receive every
+    ProgressEvent as it happens, and the totals export as JSON or Prometheus
+    text.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics if metrics is not None else StageMetrics(sample_rss=False)
+        self.counters = {}
+        self.listeners = []
+        self._phase_started = {}
+        self._completed = set()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        return listener
+
+    def stage(self, name):
+        return self.metrics.stage(name)
+
+    def _fraction(self, current=None, done=0, total=0):
+        fraction = sum(PHASE_WEIGHTS.get(p, 0.0) for p in self._completed)
+        if current and total:
+            fraction += PHASE_WEIGHTS.get(current, 0.0) * min(1.0, done / total)
+        return min(1.0, fraction)
+
+    def _emit(self, event):
+        for listener in self.listeners:
+            listener(event)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self._phase_started[name] = start
+        self._emit(ProgressEvent(STAGE_START, name, time.time(), fraction=self._fraction()))
+        with self.metrics.stage(name):
+            yield
+        self._completed.add(name)
+        duration = time.perf_counter() - start
+        self._emit(ProgressEvent(STAGE_END, name, time.time(), duration_s=duration, fraction=self._fraction()))
+
+    def advance(self, name, done, total):
+        eta = None
+        started = self._phase_started.get(name)
+        if started is not None and done > 0:
+            eta = (time.perf_counter() - started) / done * max(0, total - done)
+        self._emit(ProgressEvent(PROGRESS, name, time.time(), done=done, total=total, eta_s=eta,
+                                 fraction=self._fraction(name, done, total)))
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        d = self.metrics.to_dict()
+        d["counters"] = dict(self.counters)
+        return d
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix="text2reel", labels=None):
+        """Prometheus text exposition of stage timings, memory and counters."""
+        def fmt(extra=None):
+            merged = dict(labels or {}, **(extra or {}))
+            if not merged:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(merged.items())) + "}"
+
+        d = self.to_dict()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time spent in each render stage.",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines += [f"{prefix}_stage_seconds{fmt({'stage': n})} {s['wall_s']}" for n, s in d["stages"].items()]
+        lines += [
+            f"# HELP {prefix}_stage_peak_rss_bytes Peak resident memory during each render stage.",
+            f"# TYPE {prefix}_stage_peak_rss_bytes gauge",
+        ]
+        lines += [
+            f"{prefix}_stage_peak_rss_bytes{fmt({'stage': n})} {int(s['peak_rss_mb'] * 1024 * 1024)}"
+            for n, s in d["stages"].items()
+        ]
+        for name, value in sorted(d["counters"].items()):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total{fmt()} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def legacy_progress_adapter(progress_callback):
+    """Listener that forwards phase starts as the old free-text progress strings."""
+    def listener(event):
+        if event.kind == STAGE_START:
+            progress_callback(event.message)
+    return listener
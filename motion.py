@@ -0,0 +1,151 @@
+"""Motion captions: animated highlights derived from a chunk's cached sprites.
+
+A chunk is rasterized once (captions.ChunkRaster) and each word's sprite is
+cut from it once more (ChunkRaster.word_layers). Frames inside an animation
+window (timeline.motion_frames) are NumPy blends and affine transforms of
+those sprites, with no draw.text call; the rest of each word's time is one
+held frame of the animation's end state (see timeline.MOTION_WINDOW).
+
+    pop    the spoken word scales up in the highlight color and settles back
+    fade   the highlight cross-fades from the previous word to the spoken one
+    slide  a box in the highlight color slides from word to word behind the text
+"""
+import math
+
+import numpy as np
+from PIL import Image, ImageColor
+
+ANIMATIONS = ("pop", "fade", "slide")
+# Growth of a popping word at the top of its pop
+POP_SCALE = 0.25
+# Margin around a word's ink in its highlight box, in font sizes (also the corner radius)
+BOX_PADDING = 0.12
+
+
+def ease_out(t):
+    """Cubic ease-out: fast start, gentle landing."""
+    return 1 - (1 - t) ** 3
+
+
+def motion_sprite(raster, highlight_idx, progress, animation, color, highlight_color):
+    """(sprite, origin) of a chunk `progress` (0..1) into highlight_idx's animation.
+
+    pop and fade end on the plain highlight sprite, so their held frames are
+    the same as without motion; slide keeps its box behind the word.
+    """
+    if animation not in ANIMATIONS:
+        raise ValueError(f"Unknown caption animation: {animation!r}")
+    if animation == "slide":
+        return slide_sprite(raster, highlight_idx, progress, highlight_color)
+    if progress >= 1 or highlight_idx is None:
+        return raster.highlight(highlight_idx, highlight_color), raster.origin
+    if animation == "fade":
+        return fade_sprite(raster, highlight_idx, progress, highlight_color), raster.origin
+    return pop_sprite(raster, highlight_idx, progress, color, highlight_color)
+
+
+def fade_sprite(raster, highlight_idx, progress, highlight_color):
+    """The previous word's highlight sprite blended into this word's.
+
+    Only colors change between the two, never alpha, so a straight lerp is exact.
+    The first word of a chunk fades in from the base layer.
+    """
+    previous = raster.highlight(highlight_idx - 1 if highlight_idx > 0 else None, highlight_color)
+    start = np.asarray(previous, np.float32)
+    end = np.asarray(raster.highlight(highlight_idx, highlight_color), np.float32)
+    blended = start + (end - start) * ease_out(progress)
+    return Image.fromarray(np.rint(blended).astype(np.uint8))
+
+
+def pop_sprite(raster, highlight_idx, progress, color, highlight_color):
+    """The chunk with the highlighted word scaled about its center; returns (sprite, origin).
+
+    The word's box is first cleared back to the other words (word_layers'
+    under), so no copy of the unscaled word shows through the scaled one.
+    """
+    word, under, (x0, y0, x1, y1) = raster.word_layers(highlight_idx, highlight_color, color)
+    scale = 1 + POP_SCALE * math.sin(math.pi * progress)
+    w, h = word.size
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    left, top = math.floor(cx - w * scale / 2), math.floor(cy - h * scale / 2)
+    right, bottom = math.ceil(cx + w * scale / 2), math.ceil(cy + h * scale / 2)
+    # Output pixel (u, v) samples the word at ((u + left - cx) / scale + w / 2, ...)
+    scaled = word.transform(
+        (right - left, bottom - top), Image.AFFINE,
+        (1 / scale, 0, (left - cx) / scale + w / 2, 0, 1 / scale, (top - cy) / scale + h / 2),
+        resample=Image.BILINEAR,
+    )
+
+    W, H = raster.base_layer.size
+    ex0, ey0 = min(0, left), min(0, top)
+    canvas = np.zeros((max(H, bottom) - ey0, max(W, right) - ex0, 4), np.uint8)
+    canvas[-ey0:H - ey0, -ex0:W - ex0] = np.asarray(raster.base_layer)
+    canvas[y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0] = np.asarray(under)
+    over(canvas[top - ey0:bottom - ey0, left - ex0:right - ex0], np.asarray(scaled))
+    ox, oy = raster.origin
+    return Image.fromarray(canvas), (ox + ex0, oy + ey0)
+
+
+def highlight_box(raster, idx):
+    """Float (x0, y0, x1, y1) of a word's highlight box in sprite coordinates.
+
+    Boxes span the line's ascender-to-descender height rather than the word's
+    own ink, so every box on a line has the same height.
+    """
+    layout = raster.layout
+    word = layout.words[idx]
+    ox, oy = raster.origin
+    pad = layout.font.size * BOX_PADDING
+    _, top, _, bottom = layout.font.getbbox("Hg")
+    return (word.box[0] - ox - pad, word.y - oy + top - pad, word.box[2] - ox + pad, word.y - oy + bottom + pad)
+
+
+def slide_sprite(raster, highlight_idx, progress, highlight_color):
+    """The base layer over a highlight box moving from the previous word to this one.
+
+    The first word of a chunk grows its box from the word's center. Returns
+    (sprite, origin).
+    """
+    end = highlight_box(raster, highlight_idx)
+    if highlight_idx > 0:
+        start = highlight_box(raster, highlight_idx - 1)
+    else:
+        cx, cy = (end[0] + end[2]) / 2, (end[1] + end[3]) / 2
+        start = (cx, cy, cx, cy)
+    t = ease_out(min(1.0, progress))
+    box = [a + (b - a) * t for a, b in zip(start, end)]
+
+    W, H = raster.base_layer.size
+    ex0, ey0 = min(0, math.floor(box[0])), min(0, math.floor(box[1]))
+    ex1, ey1 = max(W, math.ceil(box[2])), max(H, math.ceil(box[3]))
+    canvas = np.zeros((ey1 - ey0, ex1 - ex0, 4), np.uint8)
+    x0, y0, x1, y1 = box[0] - ex0, box[1] - ey0, box[2] - ex0, box[3] - ey0
+    canvas[..., :3] = ImageColor.getrgb(highlight_color)[:3]
+    canvas[..., 3] = np.rint(rounded_rect_alpha(canvas.shape[:2], (x0, y0, x1, y1),
+                                                raster.layout.font.size * BOX_PADDING) * 255)
+    over(canvas[-ey0:H - ey0, -ex0:W - ex0], np.asarray(raster.base_layer))
+    ox, oy = raster.origin
+    return Image.fromarray(canvas), (ox + ex0, oy + ey0)
+
+
+def rounded_rect_alpha(shape, rect, radius):
+    """Anti-aliased coverage (0..1) of a rounded rectangle with float edges, over an (h, w) grid."""
+    x0, y0, x1, y1 = rect
+    hw, hh = max(0.0, (x1 - x0) / 2), max(0.0, (y1 - y0) / 2)
+    r = min(radius, hw, hh)
+    # Signed distance to the rectangle's edge, sampled at pixel centers
+    qx = np.abs(np.arange(shape[1]) + 0.5 - (x0 + x1) / 2) - (hw - r)
+    qy = np.abs(np.arange(shape[0]) + 0.5 - (y0 + y1) / 2) - (hh - r)
+    outside = np.hypot(np.maximum(qx, 0)[None, :], np.maximum(qy, 0)[:, None])
+    inside = np.minimum(np.maximum(qx[None, :], qy[:, None]), 0)
+    return np.clip(0.5 - (outside + inside - r), 0, 1)
+
+
+def over(dst, src):
+    """Composites straight-alpha RGBA src over dst in place (uint8 arrays of one shape)."""
+    src_a = src[..., 3:] / np.float32(255)
+    dst_a = dst[..., 3:] / np.float32(255) * (1 - src_a)
+    alpha = src_a + dst_a
+    rgb = (src[..., :3] * src_a + dst[..., :3] * dst_a) / np.maximum(alpha, 1e-6)
+    dst[..., :3] = np.rint(rgb)
+    dst[..., 3:] = np.rint(alpha * 255)
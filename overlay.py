@@ -0,0 +1,101 @@
+"""Caption-only overlay export: cropped caption sprites plus timing, no video encode.
+
+An overlay pack holds:
+
+    captions/caption_0000.png ...   one cropped RGBA image per caption event
+                                    (or a single atlas.png with atlas=True)
+    manifest.json                   canvas size, fps and each image's position
+                                    and start/end time
+    captions.ass, captions.srt      the same timeline as subtitles
+    voice.mp3                       the voice track
+
+Editors and compositors place each image at (x, y) on a canvas of the
+manifest's size from `start` (inclusive) to `end` (exclusive); frame numbers
+at the manifest's fps are included for frame-based tools.
+"""
+import json
+import math
+import os
+import shutil
+
+from PIL import Image
+
+MANIFEST_VERSION = 1
+ATLAS_MAX_WIDTH = 4096
+ATLAS_PADDING = 2
+
+
+def pack_atlas(sizes, max_width=ATLAS_MAX_WIDTH, padding=ATLAS_PADDING):
+    """Shelf-packs (w, h) rectangles in order; returns their positions and the atlas size."""
+    positions = []
+    x = y = shelf_h = atlas_w = 0
+    for w, h in sizes:
+        if x and x + w > max_width:
+            y += shelf_h + padding
+            x = shelf_h = 0
+        positions.append((x, y))
+        x += w + padding
+        shelf_h = max(shelf_h, h)
+        atlas_w = max(atlas_w, x - padding)
+    return positions, (max(1, atlas_w), max(1, y + shelf_h))
+
+
+def event_frames(event, fps):
+    """First frame showing the event and the first frame after it (frame k is sampled at k / fps)."""
+    return math.ceil(event.start * fps - 1e-9), math.ceil(event.end * fps - 1e-9)
+
+
+def write_overlay(events, sprite_for_event, audio_path, out_dir, size, fps, atlas=False, subtitle_writers=()):
+    """Writes an overlay pack for caption events into out_dir and returns out_dir.
+
+    sprite_for_event(event) returns (cropped RGBA sprite, canvas origin).
+    subtitle_writers are callables taking (events, path) keyed by file name,
+    e.g. {"captions.srt": write_srt}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    images_dir = os.path.join(out_dir, "captions")
+    if not atlas:
+        os.makedirs(images_dir, exist_ok=True)
+
+    items = []
+    sprites = []
+    for i, event in enumerate(events):
+        sprite, (x, y) = sprite_for_event(event)
+        start_frame, end_frame = event_frames(event, fps)
+        item = {
+            "index": i, "chunk": event.chunk_index, "text": " ".join(event.words),
+            "highlight": event.highlight_idx,
+            "x": x, "y": y, "width": sprite.width, "height": sprite.height,
+            "start": round(event.start, 6), "end": round(event.end, 6),
+            "start_frame": start_frame, "end_frame": end_frame,
+        }
+        if atlas:
+            sprites.append(sprite)
+        else:
+            # Written as we go, so only one sprite is held in memory at a time
+            name = f"caption_{i:04d}.png"
+            sprite.save(os.path.join(images_dir, name))
+            item["image"] = f"captions/{name}"
+        items.append(item)
+
+    manifest = {"version": MANIFEST_VERSION, "width": size[0], "height": size[1], "fps": fps}
+    if atlas:
+        positions, atlas_size = pack_atlas([s.size for s in sprites])
+        sheet = Image.new("RGBA", atlas_size, (0, 0, 0, 0))
+        for item, sprite, (ax, ay) in zip(items, sprites, positions):
+            sheet.paste(sprite, (ax, ay))
+            item["atlas"] = [ax, ay, sprite.width, sprite.height]
+        sheet.save(os.path.join(out_dir, "atlas.png"))
+        manifest["atlas"] = "atlas.png"
+
+    if audio_path:
+        shutil.copyfile(audio_path, os.path.join(out_dir, "voice.mp3"))
+        manifest["audio"] = "voice.mp3"
+    for name, writer in dict(subtitle_writers).items():
+        writer(events, os.path.join(out_dir, name))
+    manifest["subtitles"] = sorted(dict(subtitle_writers))
+    manifest["items"] = items
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return out_dir
@@ -0,0 +1,665 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+from captions import CaptionRenderer
+from layout import scaled_size
+from metrics import RenderProgress, no_stage
+from timeline import MotionFrame, held_frames, motion_frames
+from utils import ffmpeg_binary
+
+FPS = 24
+
+
+def clear_hidden(sprite):
+    """A copy of an RGBA sprite with the colour under zero alpha set to black.
+
+    An alpha encoder would otherwise spend bits on colour nobody sees and
+    bleed it into neighbouring chroma. Every alpha codec reads straight
+    (unpremultiplied) alpha, so partly transparent pixels keep their colour:
+    premultiplying them would darken anti-aliased edges such as a slide
+    box's once an editor composites the video.
+    """
+    hidden = sprite.getchannel('A').point(lambda a: 255 if a == 0 else 0)
+    sprite = sprite.copy()
+    sprite.paste((0, 0, 0, 0), mask=hidden)
+    return sprite
+
+
+def compose_frame(sprite, origin, size, bg_rgb=None):
+    """Composites a caption sprite onto a solid (bg_rgb) or transparent canvas.
+
+    Transparent frames skip compositing: the straight-alpha sprite, with its
+    hidden colour cleared, is copied into an empty canvas and goes to the
+    alpha encoder as is.
+    """
+    if bg_rgb is None:
+        frame = Image.new('RGBA', size, (0, 0, 0, 0))
+        if sprite is not None:
+            frame.paste(clear_hidden(sprite), origin)
+        return frame
+
+    frame = Image.new('RGB', size, tuple(bg_rgb))
+    if sprite is not None:
+        # Blend only the sprite's area, the same way moviepy alpha-composites clips
+        box = (origin[0], origin[1], origin[0] + sprite.width, origin[1] + sprite.height)
+        region = Image.alpha_composite(frame.crop(box).convert('RGBA'), sprite)
+        frame.paste(region.convert('RGB'), box[:2])
+    return frame
+
+
+class CaptionFrames:
+    """Picklable frame_for_event for render_held_frames: full-canvas frames in one caption style.
+
+    style is ReelGenerator.caption_style's dict. Only the font table and the
+    style travel to worker processes; each process builds its own
+    CaptionRenderer, and with it its own raster caches.
+
+    With an animation (see motion.ANIMATIONS) frames are motion captions:
+    MotionFrames (timeline.motion_frames) are drawn at their point in the
+    animation and plain events at its end.
+    """
+
+    def __init__(self, fonts, style, bg_rgb=None, captions=None, progress=None, animation=None):
+        self.fonts = fonts
+        self.style = style
+        self.bg_rgb = bg_rgb
+        self.canvas = scaled_size(style["size"], style["scale"])
+        self.captions = captions
+        self.progress = progress
+        self.animation = animation
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["captions"] = state["progress"] = None
+        return state
+
+    def __call__(self, event):
+        if self.captions is None:
+            self.captions = CaptionRenderer(self.fonts)
+        stage = self.progress.stage if self.progress else no_stage
+        sprite = origin = None
+        if event is not None:
+            with stage("rasterize"):
+                if self.animation:
+                    t = event.progress if isinstance(event, MotionFrame) else 1.0
+                    sprite, origin = self.captions.render_motion_frame(
+                        event.words, event.highlight_idx, t, self.animation, **self.style
+                    )
+                else:
+                    sprite, origin = self.captions.render_word_frame(event.words, event.highlight_idx, **self.style)
+        with stage("composite"):
+            return compose_frame(sprite, origin, self.canvas, self.bg_rgb)
+
+
+def write_concat_list(entries, list_path, fps):
+    """Writes an ffconcat script holding each image for its number of frames."""
+    # Each image is read at fps: at the image demuxer's default 25 fps, its timestamps
+    # fall on 1/25 s steps and 30 or 60 fps output drops and repeats frames
+    option = f"option framerate {fps}\n"
+    with open(list_path, "w") as f:
+        f.write("ffconcat version 1.0\n")
+        for image_path, n_frames in entries:
+            f.write(f"file '{os.path.basename(image_path)}'\n" + option)
+            f.write(f"duration {n_frames / fps:.6f}\n")
+        # The concat demuxer ignores the last entry's duration unless it is repeated
+        if entries:
+            f.write(f"file '{os.path.basename(entries[-1][0])}'\n" + option)
+
+
+class _ProgressParser:
+    """Feeds ffmpeg -progress lines to on_progress(frames_done, bytes_written)."""
+
+    def __init__(self, on_progress):
+        self.on_progress = on_progress
+        self.frame = self.size = 0
+
+    def feed(self, line):
+        key, _, value = line.strip().partition("=")
+        if key == "frame":
+            self.frame = int(value)
+        elif key == "total_size" and value.isdigit():
+            self.size = int(value)
+        elif key == "progress" and self.on_progress:
+            self.on_progress(self.frame, self.size)
+
+
+def run_ffmpeg(cmd, on_progress=None):
+    """Runs ffmpeg, reporting (frames_done, bytes_written) from its -progress output."""
+    cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    parser = _ProgressParser(on_progress)
+    for line in proc.stdout:
+        parser.feed(line)
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+
+
+async def run_ffmpeg_async(cmd, on_progress=None):
+    """run_ffmpeg as a coroutine: the event loop stays free while ffmpeg runs."""
+    cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    parser = _ProgressParser(on_progress)
+    stderr_task = asyncio.ensure_future(proc.stderr.read())
+    try:
+        async for line in proc.stdout:
+            parser.feed(line.decode())
+        stderr = (await stderr_task).decode()
+    except asyncio.CancelledError:
+        # Nothing will read what ffmpeg writes from here on, and its inputs may be about to go
+        proc.kill()
+        await proc.wait()
+        raise
+    if await proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+
+
+# Segment encodes in flight on each event loop, across every render sharing it
+_encode_slots = weakref.WeakKeyDictionary()
+
+
+def encode_slots():
+    """The running loop's semaphore bounding concurrent segment encodes to one per core.
+
+    Every render on a loop splits its timeline into a segment per core, so
+    without a shared bound n renders would run n encoders per core.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _encode_slots:
+        _encode_slots[loop] = asyncio.Semaphore(os.cpu_count() or 1)
+    return _encode_slots[loop]
+
+
+def held_output_args(fps, n_frames, is_transparent, draft=False):
+    """Output options turning a timeline of held images into n_frames CFR frames, then the codec options.
+
+    Each image is converted to the encoder's pixel format before the fps
+    filter repeats it, so a held frame is converted once rather than once per
+    output frame.
+    """
+    args = codec_args(is_transparent, draft)
+    pix_fmt = args[args.index("-pix_fmt") + 1]
+    return ["-vf", f"format={pix_fmt},fps={fps}", "-frames:v", str(n_frames)] + args
+
+
+def concat_command(list_path, audio_path, output_path, fps, is_transparent, n_frames, draft=False):
+    """ffmpeg command encoding an ffconcat image timeline plus the voice track into a CFR video."""
+    cmd = [
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+    ]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+    cmd += held_output_args(fps, n_frames, is_transparent, draft)
+    cmd.append(output_path)
+    return cmd
+
+
+# Frames piped to ffmpeg travel as a live Matroska stream: one uncompressed
+# video track, one cluster per frame, so each frame carries its own timestamp
+MATROSKA_TIMESCALE_NS = 1000  # Microsecond timestamps
+
+
+def _ebml_size(n):
+    """An EBML element size: a variable-length integer."""
+    for length in range(1, 9):
+        if n < (1 << 7 * length) - 1:  # All ones is reserved for "unknown size"
+            return (n | 1 << 7 * length).to_bytes(length, "big")
+    raise ValueError("EBML element too large")
+
+
+def _ebml_element(element_id, payload):
+    return element_id + _ebml_size(len(payload)) + payload
+
+
+def _ebml_uint(element_id, value):
+    return _ebml_element(element_id, value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big"))
+
+
+def matroska_header(size, is_transparent):
+    """The start of a Matroska stream of raw rgb24 (or rgba) frames, up to its first cluster.
+
+    The segment has unknown size, so the stream can be written as it is rendered.
+    """
+    ebml = b"".join([
+        _ebml_uint(b"\x42\x86", 1), _ebml_uint(b"\x42\xf7", 1),  # EBMLVersion, EBMLReadVersion
+        _ebml_uint(b"\x42\xf2", 4), _ebml_uint(b"\x42\xf3", 8),  # EBMLMaxIDLength, EBMLMaxSizeLength
+        _ebml_element(b"\x42\x82", b"matroska"),  # DocType
+        _ebml_uint(b"\x42\x87", 4), _ebml_uint(b"\x42\x85", 2),  # DocTypeVersion, DocTypeReadVersion
+    ])
+    info = _ebml_uint(b"\x2a\xd7\xb1", MATROSKA_TIMESCALE_NS)  # TimestampScale
+    video = b"".join([
+        _ebml_uint(b"\xb0", size[0]), _ebml_uint(b"\xba", size[1]),  # PixelWidth, PixelHeight
+        _ebml_element(b"\x2e\xb5\x24", b"RGBA" if is_transparent else b"RGB\x18"),  # ColourSpace (FourCC)
+    ])
+    track = b"".join([
+        _ebml_uint(b"\xd7", 1), _ebml_uint(b"\x73\xc5", 1), _ebml_uint(b"\x83", 1),  # Number, UID, Type: video
+        _ebml_element(b"\x86", b"V_UNCOMPRESSED"), _ebml_element(b"\xe0", video),
+    ])
+    return (
+        _ebml_element(b"\x1a\x45\xdf\xa3", ebml)
+        + b"\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff"  # Segment of unknown size
+        + _ebml_element(b"\x15\x49\xa9\x66", info)
+        + _ebml_element(b"\x16\x54\xae\x6b", _ebml_element(b"\xae", track))
+    )
+
+
+def matroska_frame_header(seconds, frame_bytes):
+    """The bytes preceding a raw frame of frame_bytes in its own cluster, as a keyframe block at `seconds`.
+
+    The frame itself follows as is, so it is never copied into the stream.
+    """
+    timestamp = _ebml_uint(b"\xe7", round(seconds * 1e9 / MATROSKA_TIMESCALE_NS))
+    block = b"\x81\x00\x00\x80"  # Track 1, no offset from the cluster's timestamp, keyframe
+    block_header = b"\xa3" + _ebml_size(len(block) + frame_bytes) + block  # SimpleBlock
+    cluster_size = len(timestamp) + len(block_header) + frame_bytes
+    return b"\x1f\x43\xb6\x75" + _ebml_size(cluster_size) + timestamp + block_header
+
+
+def pipe_command(audio_path, output_path, fps, is_transparent, n_frames, draft=False):
+    """ffmpeg command encoding timestamped frames read from stdin plus the voice track into a CFR video.
+
+    stdin is a Matroska stream (matroska_header, matroska_frame_header); the fps
+    filter holds each frame until the next one's timestamp, as for
+    concat_command's images.
+    """
+    cmd = [
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-f", "matroska", "-i", "-",
+    ]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+    cmd += held_output_args(fps, n_frames, is_transparent, draft)
+    cmd.append(output_path)
+    return cmd
+
+
+def encode_frames_pipe(runs, frame_for_event, audio_path, output_path, fps, is_transparent, on_frame=None,
+                       on_progress=None, draft=False):
+    """Streams held-frame runs to ffmpeg: each run's frame is composited and sent once, stamped with its start.
+
+    For timelines of many short runs (motion captions), where saving and
+    decoding a PNG per run costs more than the raw bytes. A held run is still
+    one frame on the pipe; ffmpeg repeats it up to the next timestamp, and a
+    closing copy of the last frame marks where the timeline ends. on_frame and
+    on_progress are as for write_held_frames and run_ffmpeg.
+    """
+    n_frames = sum(n for _, n in runs)
+    proc = reader = None
+    parser = _ProgressParser(on_progress)
+    try:
+        start = 0
+        for i, (event, n) in enumerate(runs):
+            frame = frame_for_event(event)
+            if proc is None:
+                cmd = pipe_command(audio_path, output_path, fps, is_transparent, n_frames, draft)
+                cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+                proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                # Progress is read on the side so a full stdout pipe never stalls the frame writes
+                reader = threading.Thread(target=lambda: [parser.feed(line.decode()) for line in proc.stdout])
+                reader.start()
+                proc.stdin.write(matroska_header(frame.size, is_transparent))
+            data = frame.tobytes()
+            proc.stdin.write(matroska_frame_header(start / fps, len(data)))
+            proc.stdin.write(data)
+            start += n
+            if on_frame:
+                on_frame(i + 1)
+        if proc is not None:
+            proc.stdin.write(matroska_frame_header(start / fps, len(data)))
+            proc.stdin.write(data)
+            proc.stdin.close()
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; its error is raised below
+    except BaseException:
+        if proc is not None:
+            # With stdin still open ffmpeg would wait for the rest of the frames forever
+            proc.kill()
+            reader.join()
+            proc.wait()
+            proc.stderr.close()
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        raise
+    if proc is not None:
+        stderr = proc.stderr.read().decode()
+        reader.join()
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args, stderr=stderr)
+    return output_path
+
+
+def encode_concat(list_path, audio_path, output_path, fps, is_transparent, n_frames, on_progress=None, draft=False):
+    """Encodes an ffconcat image timeline plus the voice track into a CFR video."""
+    run_ffmpeg(concat_command(list_path, audio_path, output_path, fps, is_transparent, n_frames, draft), on_progress)
+    return output_path
+
+
+async def encode_concat_async(list_path, audio_path, output_path, fps, is_transparent, n_frames, on_progress=None,
+                              draft=False):
+    """encode_concat as a coroutine."""
+    cmd = concat_command(list_path, audio_path, output_path, fps, is_transparent, n_frames, draft)
+    await run_ffmpeg_async(cmd, on_progress)
+    return output_path
+
+
+def filter_path(path):
+    """Escapes a file path for a filter option inside a -filter_complex graph.
+
+    Two levels, as ffmpeg parses them: the option value (\\ ' :) and then
+    the graph description (\\ ' [ ] , ;).
+    """
+    value = os.path.abspath(path).replace(os.sep, "/")
+    for special in ("\\':", "\\'[],;"):
+        value = "".join("\\" + c if c in special else c for c in value)
+    return value
+
+
+def encode_ass(ass_path, audio_path, output_path, size, fps, n_frames, bg_rgb=None, fonts_dir=None,
+               mask_ass_path=None, on_progress=None, draft=False, alpha_codec="vp9"):
+    """Burns an ASS script into a colour source with libass; no frames pass through Python.
+
+    libass leaves the alpha channel alone, so transparent output (bg_rgb None)
+    also needs mask_ass_path: the same script drawn all in white, whose luma
+    becomes the alpha channel of the colour pass, encoded with alpha_codec.
+    """
+    w, h = size
+    color = "black" if bg_rgb is None else "0x{:02X}{:02X}{:02X}".format(*bg_rgb)
+    ass_opts = f":fontsdir={filter_path(fonts_dir)}" if fonts_dir else ""
+    cmd = [
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"color=c={color}:s={w}x{h}:r={fps}",
+    ]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "[v]", "-map", "1:a"]
+    else:
+        cmd += ["-map", "[v]"]
+    if bg_rgb is None:
+        # Over black the colour pass is premultiplied by the mask's coverage
+        graph = (
+            f"[0:v]split[c][m];"
+            f"[c]ass={filter_path(ass_path)}{ass_opts}[rgb];"
+            f"[m]ass={filter_path(mask_ass_path)}{ass_opts},format=gray[a];"
+            f"[rgb][a]alphamerge,unpremultiply=inplace=1[v]"
+        )
+    else:
+        graph = f"[0:v]ass={filter_path(ass_path)}{ass_opts}[v]"
+    cmd += ["-filter_complex", graph, "-frames:v", str(n_frames)]
+    cmd += codec_args(bg_rgb is None and alpha_codec, draft)
+    cmd.append(output_path)
+    run_ffmpeg(cmd, on_progress)
+    return output_path
+
+
+# Transparent output formats: container and video codec options. VP9 with
+# alpha plays in browsers; QuickTime Animation (qtrle) and PNG-in-MOV are
+# lossless intermediates for editors, much larger but quicker to write.
+ALPHA_CODECS = {
+    # Row and tile threading, constant quality; codec_args adds the speed settings
+    "vp9": ("webm", ["-c:v", "libvpx-vp9", "-pix_fmt", "yuva420p", "-row-mt", "1", "-tile-columns", "2",
+                     "-crf", "32", "-b:v", "0"]),
+    "qtrle": ("mov", ["-c:v", "qtrle", "-pix_fmt", "argb"]),
+    "png": ("mov", ["-c:v", "png", "-pix_fmt", "rgba"]),
+}
+
+
+def alpha_codec_name(is_transparent):
+    """The ALPHA_CODECS key for is_transparent: True means "vp9", a key names itself."""
+    return "vp9" if is_transparent is True else is_transparent
+
+
+def output_extension(is_transparent):
+    """Container extension: mp4 for opaque output, else the alpha codec's container."""
+    return ALPHA_CODECS[alpha_codec_name(is_transparent)][0] if is_transparent else "mp4"
+
+
+def audio_codec(is_transparent):
+    """ffmpeg audio codec for muxing the TTS MP3 into the output container.
+
+    MP4 and MOV carry MP3 as is, so the voice track is stream-copied; WebM
+    does not, so it gets a single direct transcode to Opus. Either way ffmpeg
+    reads the MP3 itself and no PCM passes through Python.
+    """
+    return "libopus" if output_extension(is_transparent) == "webm" else "copy"
+
+
+def codec_args(is_transparent, draft=False):
+    """Video/audio codec options: an ALPHA_CODECS profile, or x264 + copied MP3 (MP4).
+
+    is_transparent is False for opaque output, or True / an ALPHA_CODECS key.
+    draft trades quality for speed: realtime VP9 and a lower-quality x264
+    rate; the lossless intermediates have no draft mode.
+    """
+    if is_transparent:
+        args = list(ALPHA_CODECS[alpha_codec_name(is_transparent)][1])
+        if alpha_codec_name(is_transparent) == "vp9":
+            # The fastest "good" step; the realtime deadline is quicker still but can
+            # leave flat transparent blocks at alpha 1, which only drafts tolerate
+            speed = ["-deadline", "realtime", "-cpu-used", "8"] if draft else ["-deadline", "good", "-cpu-used", "5"]
+            args += speed + ["-threads", str(os.cpu_count() or 1)]
+    else:
+        args = ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p"]
+        if draft:
+            args += ["-crf", "30"]
+    return args + ["-c:a", audio_codec(is_transparent)]
+
+
+def segment_runs(runs):
+    """Splits held-frame runs at caption-chunk boundaries; returns a list of run lists.
+
+    Frames without a caption stay with the segment they follow (leading ones
+    with the first segment), so every segment starts on a new chunk.
+    """
+    segments = []
+    current = []
+    current_chunk = None
+    for event, n_frames in runs:
+        if event is not None and current_chunk is not None and event.chunk_index != current_chunk:
+            segments.append(current)
+            current = []
+        if event is not None:
+            current_chunk = event.chunk_index
+        current.append((event, n_frames))
+    if current:
+        segments.append(current)
+    return segments
+
+
+def segments_command(segment_paths, list_path, audio_path, output_path, is_transparent, n_frames):
+    """Writes the segment list and returns the ffmpeg command joining the segments (see concat_segments)."""
+    with open(list_path, "w") as f:
+        f.write("ffconcat version 1.0\n")
+        for path in segment_paths:
+            f.write("file '{}'\n".format(os.path.abspath(path).replace("'", "'\\''")))
+    cmd = [
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+    ]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+    cmd += ["-frames:v", str(n_frames), "-c:v", "copy", "-c:a", audio_codec(is_transparent)]
+    cmd.append(output_path)
+    return cmd
+
+
+def concat_segments(segment_paths, audio_path, output_path, is_transparent, n_frames, on_progress=None):
+    """Joins encoded video segments without re-encoding them and muxes the voice track once."""
+    list_path = output_path + ".segments.ffconcat"
+    try:
+        run_ffmpeg(segments_command(segment_paths, list_path, audio_path, output_path, is_transparent, n_frames),
+                   on_progress)
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+async def concat_segments_async(segment_paths, audio_path, output_path, is_transparent, n_frames, on_progress=None):
+    """concat_segments as a coroutine."""
+    list_path = output_path + ".segments.ffconcat"
+    try:
+        cmd = segments_command(segment_paths, list_path, audio_path, output_path, is_transparent, n_frames)
+        await run_ffmpeg_async(cmd, on_progress)
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+def write_held_frames(runs, frame_for_event, frames_dir, fps, on_frame=None):
+    """Saves one image per held-frame run and an ffconcat list holding each; returns the list path.
+
+    on_frame(i) is called after the i-th image (1-based) is written.
+    """
+    entries = []
+    for i, (event, n_frames) in enumerate(runs):
+        image_path = os.path.join(frames_dir, f"frame_{i:06d}.png")
+        frame_for_event(event).save(image_path, compress_level=1)
+        entries.append((image_path, n_frames))
+        if on_frame:
+            on_frame(i + 1)
+    list_path = os.path.join(frames_dir, "timeline.ffconcat")
+    write_concat_list(entries, list_path, fps)
+    return list_path
+
+
+def split_segments(runs, n_segments):
+    """Groups held-frame runs into at most n_segments contiguous segments of similar length.
+
+    Cuts only fall on caption-chunk boundaries (see segment_runs).
+    """
+    total = sum(n for _, n in runs)
+    groups = []
+    current = []
+    done = 0
+    for chunk in segment_runs(runs):
+        current += chunk
+        done += sum(n for _, n in chunk)
+        if done >= total * (len(groups) + 1) / n_segments:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+def render_segment(runs, frame_for_event, output_path, fps=FPS, is_transparent=False, draft=False):
+    """Composites and encodes one video-only segment; returns the number of frames rasterized.
+
+    Runs in a worker process for parallel renders, so frame_for_event must be picklable.
+    """
+    frames_dir = tempfile.mkdtemp(prefix="frames_", dir=os.path.dirname(output_path))
+    try:
+        list_path = write_held_frames(runs, frame_for_event, frames_dir, fps)
+        encode_concat(list_path, None, output_path, fps, is_transparent, sum(n for _, n in runs), draft=draft)
+        return len(runs)
+    finally:
+        shutil.rmtree(frames_dir, ignore_errors=True)
+
+
+def render_segments_parallel(segments, frame_for_event, audio_path, output_path, fps=FPS, is_transparent=False,
+                             work_dir=None, progress=None, draft=False):
+    """Renders each segment (a list of held-frame runs) in its own process, then joins them.
+
+    Compositing and encoding both happen in the workers and are reported as
+    the "frames" phase; the stream-copy join and audio mux are the "encode"
+    phase.
+    """
+    progress = progress or RenderProgress()
+    total_frames = sum(n for runs in segments for _, n in runs)
+    ext = os.path.splitext(output_path)[1]
+    segments_dir = tempfile.mkdtemp(prefix="segments_", dir=work_dir)
+    paths = [os.path.join(segments_dir, f"segment_{i:04d}{ext}") for i in range(len(segments))]
+    try:
+        with progress.phase("frames"):
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(len(segments), mp_context=context) as pool:
+                futures = {
+                    pool.submit(render_segment, runs, frame_for_event, path, fps, is_transparent, draft): runs
+                    for runs, path in zip(segments, paths)
+                }
+                done = 0
+                for future in as_completed(futures):
+                    progress.count("frames_rendered", future.result())
+                    done += sum(n for _, n in futures[future])
+                    progress.advance("frames", done, total_frames)
+
+        with progress.phase("encode"):
+            concat_segments(
+                paths, audio_path, output_path, is_transparent, total_frames,
+                on_progress=lambda frame, _: progress.advance("encode", frame, total_frames),
+            )
+            progress.count("frames_encoded", total_frames)
+            progress.count("bytes_written", os.path.getsize(output_path))
+        return output_path
+    finally:
+        shutil.rmtree(segments_dir, ignore_errors=True)
+
+
+def render_held_frames(events, total_duration, frame_for_event, audio_path, output_path, fps=FPS, is_transparent=False, work_dir=None, progress=None, draft=False, workers=1, motion_window=0):
+    """Renders each distinct caption frame once and lets ffmpeg hold it for its duration.
+
+    frame_for_event(event) returns the full-canvas PIL frame for an event
+    (event is None for frames with no caption on screen). Progress is reported
+    through a metrics.RenderProgress as the "frames" and "encode" phases.
+
+    With workers > 1 the timeline is split at chunk boundaries into up to that
+    many segments rendered in parallel (see render_segments_parallel);
+    frame_for_event must then be picklable, e.g. a CaptionFrames.
+
+    With motion_window > 0, the first motion_window seconds of every event are
+    rendered frame by frame as MotionFrames (see timeline.motion_frames) for a
+    frame_for_event that animates them, e.g. a CaptionFrames with an animation.
+    Those frames are streamed to the encoder (encode_frames_pipe) rather than
+    saved as images, so compositing counts as the "encode" phase.
+    """
+    progress = progress or RenderProgress()
+    if motion_window:
+        runs = motion_frames(events, total_duration, fps, motion_window)
+    else:
+        runs = held_frames(events, total_duration, fps)
+    if workers > 1:
+        segments = split_segments(runs, workers)
+        if len(segments) > 1:
+            return render_segments_parallel(segments, frame_for_event, audio_path, output_path, fps, is_transparent,
+                                             work_dir, progress, draft)
+    total_frames = sum(n for _, n in runs)
+    if motion_window:
+        with progress.phase("encode"):
+            encode_frames_pipe(
+                runs, frame_for_event, audio_path, output_path, fps, is_transparent,
+                on_frame=lambda _: progress.count("frames_rendered"),
+                on_progress=lambda frame, _: progress.advance("encode", frame, total_frames), draft=draft,
+            )
+            progress.count("frames_encoded", total_frames)
+            progress.count("bytes_written", os.path.getsize(output_path))
+        return output_path
+
+    frames_dir = tempfile.mkdtemp(prefix="frames_", dir=work_dir)
+    try:
+        def on_frame(done):
+            progress.count("frames_rendered")
+            progress.advance("frames", done, len(runs))
+
+        with progress.phase("frames"):
+            list_path = write_held_frames(runs, frame_for_event, frames_dir, fps, on_frame)
+
+        with progress.phase("encode"):
+            encode_concat(
+                list_path, audio_path, output_path, fps, is_transparent, total_frames,
+                on_progress=lambda frame, _: progress.advance("encode", frame, total_frames), draft=draft,
+            )
+            progress.count("frames_encoded", total_frames)
+            progress.count("bytes_written", os.path.getsize(output_path))
+        return output_path
+    finally:
+        shutil.rmtree(frames_dir, ignore_errors=True)
@@ -0,0 +1,109 @@
+"""Render manifests: what each stage of a render was built from, for incremental re-renders.
+
+A manifest sits next to the output (render_manifest.json) and records the
+render's inputs, the TTS key of every sentence, and the content key of
+every caption frame image and encoded segment, with the files holding them
+under the render directory:
+
+    frames/<key>.png      one composited caption frame per distinct caption image
+    segments/<key>.mp4    one video-only segment per caption chunk
+
+Keys are hashes of everything that determines the artefact, so a later
+render reuses any artefact whose key it would produce again, from its own
+directory or from the previous render's, and rebuilds only the rest.
+"""
+import hashlib
+import json
+import os
+
+from tts_cache import atomic_link_or_copy
+
+MANIFEST_FILE = "render_manifest.json"
+MANIFEST_VERSION = 1
+FRAMES_DIR = "frames"
+SEGMENTS_DIR = "segments"
+
+
+def content_key(*parts):
+    """Short stable hash of JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class RenderManifest:
+    """Inputs and artefact keys of one render (see module docstring)."""
+
+    def __init__(self, root, inputs=None, sentences=None, frames=None, segments=None, output=None):
+        self.root = os.path.abspath(root)  # Render directory the artefact paths are relative to
+        self.inputs = inputs or {}
+        self.sentences = sentences or []   # [{"text", "key"}] in script order
+        self.frames = frames or {}         # frame key -> relative path
+        self.segments = segments or []     # [{"key", "file", "frames", "chunk"}] in timeline order
+        self.output = output
+
+    @classmethod
+    def load(cls, path):
+        """Reads a manifest, or returns None if it is missing, unreadable or from another version."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(data["root"], data["inputs"], data["sentences"], data["frames"], data["segments"], data["output"])
+
+    def save(self, path=None):
+        path = path or os.path.join(self.root, MANIFEST_FILE)
+        data = {
+            "version": MANIFEST_VERSION, "root": self.root, "inputs": self.inputs, "sentences": self.sentences,
+            "frames": self.frames, "segments": self.segments, "output": self.output,
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        return path
+
+    def artefact_path(self, relative):
+        return os.path.join(self.root, relative)
+
+    def frame_path(self, key):
+        return os.path.join(self.root, FRAMES_DIR, f"{key}.png")
+
+    def segment_path(self, key, ext):
+        return os.path.join(self.root, SEGMENTS_DIR, f"{key}.{ext}")
+
+    def sentence_keys(self):
+        return {s["key"] for s in self.sentences}
+
+    def reuse(self, path, previous=None):
+        """Makes an artefact available at path, from disk already or from the previous render.
+
+        Returns True if it was found, False if it has to be rebuilt.
+        """
+        if os.path.exists(path):
+            return True
+        if previous is None or previous.root == self.root:
+            return False
+        source = os.path.join(previous.root, os.path.relpath(path, self.root))
+        if not os.path.exists(source):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_link_or_copy(source, path)
+        return True
+
+    def prune(self):
+        """Removes frame and segment files this manifest no longer refers to."""
+        keep = {os.path.normpath(self.artefact_path(p)) for p in self.frames.values()}
+        keep |= {os.path.normpath(self.artefact_path(s["file"])) for s in self.segments}
+        for sub in (FRAMES_DIR, SEGMENTS_DIR):
+            folder = os.path.join(self.root, sub)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                path = os.path.normpath(os.path.join(folder, name))
+                if path not in keep:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
@@ -0,0 +1,169 @@
+"""SRT and ASS subtitle files from caption events (see timeline.build_caption_events)."""
+import math
+from itertools import groupby
+
+from captions import STROKE_WIDTH
+from layout import load_font
+from utils import hex_to_rgb
+
+ASS_STYLE = "Caption"
+
+
+def srt_timestamp(seconds):
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def ass_timestamp(seconds):
+    cs = int(round(seconds * 100))
+    h, cs = divmod(cs, 360000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h:d}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def ass_color(hex_color, alpha=0):
+    """ASS colour literal (&HAABBGGRR) for a #RRGGBB string."""
+    r, g, b = hex_to_rgb(hex_color)
+    return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
+
+
+def ass_escape(word):
+    # Braces open override blocks and backslashes start tags
+    return word.replace("\\", "/").replace("{", "(").replace("}", ")")
+
+
+def chunk_cues(events):
+    """Groups consecutive events of the same chunk into (start, end, words) cues."""
+    cues = []
+    for event in events:
+        if cues and cues[-1][0] == event.chunk_index:
+            cues[-1][2] = event.end
+        else:
+            cues.append([event.chunk_index, event.start, event.end, event.words])
+    return [(start, end, words) for _, start, end, words in cues]
+
+
+def write_srt(events, path):
+    """One SRT cue per caption chunk (SRT has no per-word highlight)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, (start, end, words) in enumerate(chunk_cues(events), 1):
+            f.write(f"{i}\n{srt_timestamp(start)} --> {srt_timestamp(end)}\n{' '.join(words)}\n\n")
+    return path
+
+
+def ass_header(size, font_file, fontsize, color, highlight_color, position_y_offset=0, outline=STROKE_WIDTH,
+               outline_color="#000000"):
+    """[Script Info] and [V4+ Styles] sections matching the PIL caption style."""
+    W, H = size
+    font = load_font(font_file, fontsize)
+    try:
+        family, style_name = font.getname()
+        ascent, descent = font.getmetrics()
+    except AttributeError:  # PIL's bitmap fallback font
+        family, style_name, ascent, descent = "Sans", "", fontsize, 0
+    bold = -1 if "Bold" in (style_name or "") else 0
+    # libass sizes fonts by ascent + descent, PIL by the em square
+    ass_size = ascent + descent
+    if position_y_offset == 'center':
+        alignment, margin_v = 5, 0
+    else:
+        alignment, margin_v = 8, position_y_offset
+    return (
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {W}\n"
+        f"PlayResY: {H}\n"
+        "WrapStyle: 2\n"  # Line breaks come from layout.layout_text, never from the renderer
+        "ScaledBorderAndShadow: yes\n"
+        "\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, "
+        "MarginR, MarginV, Encoding\n"
+        f"Style: {ASS_STYLE},{family},{ass_size},{ass_color(color)},{ass_color(highlight_color)},"
+        f"{ass_color(outline_color)},&H00000000,{bold},0,0,0,100,100,0,0,1,{outline},0,{alignment},0,0,{margin_v},1\n"
+        "\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+
+
+def ass_text(words, highlight_idx, lines, highlight_color):
+    """Dialogue text with the layout's line breaks and the highlighted word recoloured."""
+    rendered = []
+    for line in lines:
+        parts = []
+        for idx in line:
+            word = ass_escape(words[idx])
+            if idx == highlight_idx:
+                word = f"{{\\c{ass_color(highlight_color)}}}{word}{{\\r}}"
+            parts.append(word)
+        rendered.append(" ".join(parts))
+    return "\\N".join(rendered)
+
+
+def write_ass(events, path, size, font_file, fontsize, color, highlight_color, position_y_offset=0, lines_for=None):
+    """One Dialogue per caption event, so the highlight moves exactly like the video.
+
+    lines_for(words) returns the layout's lines (lists of word indices); by
+    default each chunk is a single line.
+    """
+    lines_for = lines_for or (lambda words: [list(range(len(words)))])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(ass_header(size, font_file, fontsize, color, highlight_color, position_y_offset))
+        for event in events:
+            text = ass_text(event.words, event.highlight_idx, lines_for(event.words), highlight_color)
+            f.write(f"Dialogue: 0,{ass_timestamp(event.start)},{ass_timestamp(event.end)},{ASS_STYLE},,0,0,0,,{text}\n")
+    return path
+
+
+def frame_boundary(t, fps):
+    """Moves a transition to halfway between the frames either side of it.
+
+    Frame k (sampled at k / fps) shows an event when start <= k / fps, so any
+    time in the gap before that frame gives the same frames; the midpoint
+    keeps ASS's centisecond rounding from moving a transition by a frame.
+    """
+    return max(0.0, (math.ceil(t * fps - 1e-9) - 0.5) / fps)
+
+
+def write_karaoke_ass(events, path, layout_for, size, font_file, fontsize, color, highlight_color, fps,
+                      outline=STROKE_WIDTH, outline_color="#000000"):
+    """ASS script for libass with one Dialogue per word, each shown for its whole chunk.
+
+    Words are placed at the PIL layout's positions (\\an7\\pos) and highlighted
+    by timed colour switches (\\t) while they are spoken, so only the current
+    word is lit, as in the PIL renders; karaoke \\k tags would leave every
+    spoken word lit. layout_for(words) returns the chunk's TextLayout on the
+    output canvas; fontsize is the size that layout was drawn with.
+    """
+    normal, lit = ass_color(color), ass_color(highlight_color)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(ass_header(size, font_file, fontsize, color, highlight_color, outline=outline,
+                           outline_color=outline_color))
+        for _, chunk in groupby(events, key=lambda e: e.chunk_index):
+            chunk = list(chunk)
+            layout = layout_for(chunk[0].words)
+            # \t offsets are relative to the Dialogue start as written, in centiseconds
+            start_cs = int(round(frame_boundary(chunk[0].start, fps) * 100))
+            start = ass_timestamp(start_cs / 100)
+            end = ass_timestamp(frame_boundary(chunk[-1].end, fps))
+            origin_ms = start_cs * 10
+            spoken = {e.highlight_idx: e for e in chunk}
+            for word in layout.words:
+                tags = f"\\an7\\pos({word.x},{word.y})"
+                event = spoken.get(word.index)
+                if event is None:
+                    tags += f"\\1c{normal}"
+                else:
+                    on = int(round(frame_boundary(event.start, fps) * 1000)) - origin_ms
+                    off = int(round(frame_boundary(event.end, fps) * 1000)) - origin_ms
+                    # A zero-length \t only fires after its time, so a word lit from the start is set directly
+                    tags += f"\\1c{lit}" if on <= 0 else f"\\1c{normal}\\t({on},{on},\\1c{lit})"
+                    tags += f"\\t({off},{off},\\1c{normal})"
+                f.write(f"Dialogue: 0,{start},{end},{ASS_STYLE},,0,0,0,,{{{tags}}}{ass_escape(word.word)}\n")
+    return path
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+from functools import partial
+
+import numpy as np
+import pytest
+
+import generator
+from conftest import SCRIPT, STYLE, decode_frames, offline_generator
+from metrics import RenderProgress, StageMetrics
+from render import encode_concat_async
+from tts import silent_speech_stream
+
+TTS_LATENCY = 1.0
+
+
+def slow_tts_generator(latency=TTS_LATENCY):
+    gen = offline_generator()
+    gen.speech_stream = partial(silent_speech_stream, words_per_second=6, latency=latency)
+    return gen
+
+
+@pytest.mark.parametrize("cores", [1, 3])
+def test_async_render_matches_sync_render(tmp_path, monkeypatch, cores):
+    # More than one core splits the timeline into segments encoded as their frames arrive
+    monkeypatch.setattr(os, "cpu_count", lambda: cores)
+    path = asyncio.run(offline_generator().generate_video_async(text=SCRIPT, work_dir=str(tmp_path / "a"), **STYLE))
+    expected = offline_generator().generate_video(text=SCRIPT, work_dir=str(tmp_path / "s"), **STYLE)
+    a, b = decode_frames(path), decode_frames(expected)
+    assert a.shape == b.shape
+    assert np.abs(a.astype(int) - b.astype(int)).max() < 16
+
+
+def test_compositing_overlaps_synthesis(tmp_path):
+    progress = RenderProgress(StageMetrics(sample_rss=False))
+    start = time.perf_counter()
+    asyncio.run(slow_tts_generator().generate_video_async(
+        text=SCRIPT * 3, work_dir=str(tmp_path), progress=progress, **STYLE
+    ))
+    wall = time.perf_counter() - start
+    stages = progress.metrics.stages
+    assert stages["tts"]["wall_s"] >= TTS_LATENCY
+    # tts and frames ran side by side, so the render took less than its stages end to end
+    serial = sum(stages[name]["wall_s"] for name in ("tts", "frames", "timing", "encode"))
+    assert wall < serial - 0.5 * min(stages["tts"]["wall_s"], stages["frames"]["wall_s"])
+
+
+def test_renders_share_one_event_loop(tmp_path):
+    gen = slow_tts_generator(latency=2.0)
+
+    async def main(n_renders):
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        tick = asyncio.ensure_future(ticker())
+        paths = await asyncio.gather(*(
+            gen.generate_video_async(text=SCRIPT, work_dir=str(tmp_path / f"{n_renders}_{i}"), **STYLE)
+            for i in range(n_renders)
+        ))
+        tick.cancel()
+        return paths, max(gaps)
+
+    start = time.perf_counter()
+    asyncio.run(main(1))
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    paths, max_gap = asyncio.run(main(3))
+    assert len(set(paths)) == 3
+    assert time.perf_counter() - start < 0.8 * 3 * single  # The TTS waits overlap
+    assert max_gap < 0.5  # Compositing and encoding never block the loop
+
+
+def test_async_motion_render_matches_sync_render(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    kwargs = dict(text=SCRIPT, fps=60, animation="pop", **STYLE)
+    path = asyncio.run(offline_generator().generate_video_async(work_dir=str(tmp_path / "a"), **kwargs))
+    expected = offline_generator().generate_video(work_dir=str(tmp_path / "s"), **kwargs)
+    a, b = decode_frames(path), decode_frames(expected)
+    assert a.shape == b.shape
+    assert np.abs(a.astype(int) - b.astype(int)).max() < 16
+
+
+def test_segment_encodes_share_one_bound_per_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    running, peak = [0], [0]
+
+    async def counted(*args, **kwargs):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        try:
+            await asyncio.sleep(0.05)
+            return await encode_concat_async(*args, **kwargs)
+        finally:
+            running[0] -= 1
+
+    monkeypatch.setattr(generator, "encode_concat_async", counted)
+
+    async def main():
+        gen = offline_generator()
+        return await asyncio.gather(*(
+            gen.generate_video_async(text=SCRIPT, work_dir=str(tmp_path / str(i)), **STYLE) for i in range(3)
+        ))
+
+    assert len(set(asyncio.run(main()))) == 3
+    assert peak[0] == 2  # Three renders of two segments each, never more than a core's worth at once
+
+
+def test_failed_segment_stops_its_siblings_before_cleanup(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 3)
+    started, stopped = [], []
+
+    async def failing(list_path, *args, **kwargs):
+        started.append(list_path)
+        if len(started) == 3:  # The last segment, once the first two are encoding
+            raise RuntimeError("encoder failed")
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            stopped.append(os.path.exists(list_path))  # Its frames are still there when it is told to stop
+            raise
+
+    monkeypatch.setattr(generator, "encode_concat_async", failing)
+    with pytest.raises(RuntimeError, match="encoder failed"):
+        asyncio.run(offline_generator().generate_video_async(text=SCRIPT * 3, work_dir=str(tmp_path), **STYLE))
+    assert len(started) == 3 and stopped == [True, True]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("frames_")]
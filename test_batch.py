@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from batch import item_params, run_batch, unknown_columns
+from conftest import offline_generator
+
+
+def write_manifest(path, rows):
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def test_item_params_applies_defaults_and_types():
+    params = item_params({"id": "a", "text": "Hi there", "font_size": "90", "speed": "1.2", "position": ""})
+    assert params["font_size"] == 90 and params["speed"] == 1.2
+    assert params["position"] == "Center" and "id" not in params
+
+
+def test_item_params_parses_flags_and_sizes():
+    params = item_params({"text": "Hi", "draft": "False", "incremental": "yes", "size": "1:1"})
+    assert params["draft"] is False and params["incremental"] is True and params["size"] == (1080, 1080)
+    assert item_params({"text": "Hi", "draft": True, "size": [720, 1280]})["size"] == (720, 1280)
+    with pytest.raises(ValueError):
+        item_params({"text": "Hi", "draft": "maybe"})
+
+
+def test_unknown_columns_are_reported_and_left_out():
+    row = {"id": "a", "text": "Hi", "colour": "red", "notes": "", "font_size": "90"}
+    assert unknown_columns(row) == ["colour"]
+    assert "colour" not in item_params(row)
+    # Overlay packs take their own arguments
+    overlay = {"text": "Hi", "export": "overlay", "atlas": "true", "fps": "60"}
+    assert unknown_columns(overlay) == ["fps"]
+    assert item_params(overlay)["atlas"] is True and "fps" not in item_params(overlay)
+
+
+def test_batch_renders_to_deterministic_paths_and_resumes(tmp_path):
+    manifest = str(tmp_path / "manifest.jsonl")
+    out_dir = str(tmp_path / "out")
+    write_manifest(manifest, [
+        {"id": "first", "text": "The first reel"},
+        {"id": "second", "text": "The second reel", "bg_color": "Transparent"},
+        {"id": "pack", "text": "The caption pack", "export": "overlay", "colour": "red"},
+    ])
+
+    logs = []
+    status = run_batch(manifest, out_dir, workers=2, generator_factory=offline_generator, log=logs.append)
+    assert {k: v["status"] for k, v in status.items()} == {"first": "done", "second": "done", "pack": "done"}
+    assert os.path.exists(os.path.join(out_dir, "first.mp4"))
+    assert os.path.exists(os.path.join(out_dir, "second.webm"))
+    assert os.path.exists(os.path.join(out_dir, "pack.zip"))
+    assert "[warn] pack: ignoring unknown columns: colour" in logs
+
+    # A rerun with one item changed only renders that item again
+    write_manifest(manifest, [
+        {"id": "first", "text": "The first reel"},
+        {"id": "second", "text": "The second reel", "bg_color": "Transparent", "font_size": 100},
+        {"id": "pack", "text": "The caption pack", "export": "overlay"},
+    ])
+    logs.clear()
+    run_batch(manifest, out_dir, workers=2, generator_factory=offline_generator, log=logs.append)
+    assert sorted(logs) == ["[done] second", "[skip] first", "[skip] pack"]
+
+
+def test_duplicate_conflicting_and_bad_rows_are_planned_apart(tmp_path):
+    manifest = str(tmp_path / "manifest.jsonl")
+    write_manifest(manifest, [
+        {"id": "same", "text": "One reel"},
+        {"id": "same", "text": "One reel"},
+        {"id": "clash", "text": "One version"},
+        {"id": "clash", "text": "Another version"},
+        {"id": "empty", "text": ""},
+        {"font_size": "90"},
+    ])
+
+    logs = []
+    status = run_batch(manifest, str(tmp_path / "out"), workers=2, generator_factory=offline_generator,
+                       log=logs.append)
+    assert {k: v["status"] for k, v in status.items()} == {
+        "same": "done", "clash": "failed", "empty": "failed", "row-6": "failed",
+    }
+    assert "error" not in status["same"] and "[skip] same: duplicate of row 1" in logs
+    assert status["clash"]["error"] == "rows 3, 4 use this id with different parameters"
+    assert status["empty"]["error"] == "manifest row has no text"
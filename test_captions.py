@@ -0,0 +1,71 @@
+import numpy as np
+from captions import CaptionRenderer
+from generator import ReelGenerator
+from glyph_atlas import atlas_supported
+from layout import load_font
+
+SIZE = (1080, 1920)
+CHUNK = "Wake up early and grind hard".split()
+
+
+def test_chunk_is_rasterized_once():
+    renderer = CaptionRenderer(ReelGenerator().fonts)
+    first = renderer.render_chunk(CHUNK, 80, "#FFFFFF", "Arial", SIZE, 'center')
+    for i in range(len(CHUNK)):
+        renderer.render_word_frame(CHUNK, i, "#FF4B4B", 80, "#FFFFFF", "Arial", SIZE, 'center')
+    assert renderer.render_chunk(CHUNK, 80, "#FFFFFF", "Arial", SIZE, 'center') is first
+
+
+def test_highlight_only_touches_its_word():
+    renderer = CaptionRenderer(ReelGenerator().fonts)
+    raster = renderer.render_chunk(CHUNK, 80, "#FFFFFF", "Arial", SIZE, 'center')
+    base = np.array(raster.base_layer)
+    frame = np.array(raster.highlight(2, "#FF4B4B"))
+
+    changed = np.argwhere((base != frame).any(axis=2))
+    assert len(changed) > 0
+    x0, y0, x1, y1 = raster.word_box(2)
+    assert changed[:, 1].min() >= x0 and changed[:, 1].max() < x1
+    assert changed[:, 0].min() >= y0 and changed[:, 0].max() < y1
+
+
+def test_lru_is_bounded():
+    renderer = CaptionRenderer(ReelGenerator().fonts, max_cached_chunks=2)
+    for word in ["one", "two", "three"]:
+        renderer.render_chunk([word], 80, "#FFFFFF", "Arial", SIZE, 'center')
+    assert len(renderer._chunks) == 2
+
+
+def test_sprite_is_cropped_to_text():
+    renderer = CaptionRenderer(ReelGenerator().fonts)
+    sprite, (ox, oy) = renderer.render_word_frame(CHUNK, 0, "#FF4B4B", 80, "#FFFFFF", "Arial", SIZE, 1420)
+    w, h = sprite.size
+    assert w < SIZE[0] and h < 300
+    assert 0 <= ox and ox + w <= SIZE[0] and 1420 - 10 <= oy and oy + h <= SIZE[1]
+    assert np.array(sprite)[:, :, 3].any()
+    assert w * h < SIZE[0] * SIZE[1] // 10
+
+
+def test_atlas_matches_pil_rasterizer():
+    fonts = ReelGenerator().fonts
+    pil, atlas = CaptionRenderer(fonts, rasterizer="pil"), CaptionRenderer(fonts)
+    cases = [(chunk, 80, scale) for chunk in (CHUNK, "Typography AVATAR office, Hello!".split())
+             for scale in (1.0, 0.4)]  # Full size and draft
+    # Kerned pairs, large enough for a misplaced kern to show
+    cases.append(("AV Ty LT".split(), 400, 1.0))
+    for chunk, fontsize, scale in cases:
+        for highlight_idx in (None, 2):
+            args = (chunk, highlight_idx, "#FF4B4B", fontsize, "#FFFFFF", "Arial", SIZE, 'center', scale)
+            (a, a_origin), (b, b_origin) = pil.render_word_frame(*args), atlas.render_word_frame(*args)
+            assert a_origin == b_origin and a.size == b.size
+            a, b = np.array(a).astype(int), np.array(b).astype(int)
+            premultiplied = lambda x: x[..., :3] * x[..., 3:] // 255
+            assert np.abs(premultiplied(a) - premultiplied(b)).max() <= 2
+            # Outlines differ only where neighbouring glyphs' outlines overlap
+            assert np.abs(a[..., 3] - b[..., 3]).mean() < 0.05
+
+
+def test_caption_fonts_use_the_glyph_atlas():
+    # Basic layout even where Pillow has raqm, which would make the renderer fall back to draw.text
+    for font_file in set(ReelGenerator().fonts.values()):
+        assert atlas_supported(load_font(font_file, 80))
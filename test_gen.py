@@ -1,7 +1,7 @@
 from generator import ReelGenerator
 import os
 
-def test_generator():
+def test_generator(tmp_path):
     print("Testing ReelGenerator Backend with Indian Voices...")
     gen = ReelGenerator()
     
@@ -18,6 +18,7 @@ def test_generator():
             font_size=80,
             max_words=5,
             position="Center",
+            work_dir=str(tmp_path),
             progress_callback=print
         )
         print(f"Success! {output_mp4}")
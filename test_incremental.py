@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from conftest import SCRIPT, STYLE, decode_frames, offline_generator
+from metrics import RenderProgress
+from render_manifest import MANIFEST_FILE, RenderManifest
+from tts_cache import TTSCache
+
+
+def cached_generator(tmp_path):
+    gen = offline_generator()
+    gen.tts_cache = TTSCache(str(tmp_path / "tts_cache"))
+    return gen
+
+
+def render(gen, work_dir, text=SCRIPT, previous=None, **overrides):
+    progress = RenderProgress()
+    path = gen.generate_video(
+        text=text, work_dir=str(work_dir), progress=progress, incremental=True,
+        previous_manifest=previous and os.path.join(str(previous), MANIFEST_FILE), **dict(STYLE, **overrides)
+    )
+    return path, progress.counters
+
+
+def test_incremental_render_matches_full_render(tmp_path):
+    path, counters = render(cached_generator(tmp_path), tmp_path / "inc")
+    full = offline_generator(parallel_tts=True).generate_video(text=SCRIPT, work_dir=str(tmp_path / "full"), **STYLE)
+
+    a, b = decode_frames(path), decode_frames(full)
+    assert a.shape == b.shape
+    assert np.abs(a.astype(int) - b.astype(int)).max() < 16
+    assert counters["frames_encoded"] == len(a)
+    assert counters["segments_encoded"] == 3 and counters.get("segments_reused", 0) == 0
+
+    manifest = RenderManifest.load(os.path.join(str(tmp_path / "inc"), MANIFEST_FILE))
+    assert [s["text"] for s in manifest.sentences] == [
+        "Wake up early.", "Grind hard.", "Success is waiting for those who never stop.",
+    ]
+    assert sum(s["frames"] for s in manifest.segments) == len(a)
+
+
+def test_rerender_in_place_reuses_everything(tmp_path):
+    gen = cached_generator(tmp_path)
+    render(gen, tmp_path / "job")
+    _, counters = render(gen, tmp_path / "job")
+    assert counters["sentences_reused"] == 3 and counters["sentences_synthesized"] == 0
+    assert counters.get("frames_rendered", 0) == 0 and counters.get("segments_encoded", 0) == 0
+
+
+def test_sentence_edit_rebuilds_only_what_changed(tmp_path):
+    gen = cached_generator(tmp_path)
+    render(gen, tmp_path / "v1")
+    edited = SCRIPT.replace("Success is waiting", "Success is wating")
+    path, counters = render(gen, tmp_path / "v2", text=edited, previous=tmp_path / "v1")
+
+    assert counters["sentences_reused"] == 2 and counters["sentences_synthesized"] == 1
+    assert counters["frames_reused"] > 0 and counters["segments_reused"] >= 1
+    assert counters["segments_encoded"] < 3
+    expected = offline_generator(parallel_tts=True).generate_video(text=edited, work_dir=str(tmp_path / "full"), **STYLE)
+    a, b = decode_frames(path), decode_frames(expected)
+    assert a.shape == b.shape and np.abs(a.astype(int) - b.astype(int)).max() < 16
+
+
+def test_style_change_keeps_the_voice(tmp_path):
+    gen = cached_generator(tmp_path)
+    render(gen, tmp_path / "v1")
+    _, counters = render(gen, tmp_path / "v2", previous=tmp_path / "v1", highlight_color="#00FF00")
+    assert counters["sentences_reused"] == 3
+    assert counters["frames_rendered"] > 0 and counters.get("segments_reused", 0) == 0
@@ -0,0 +1,77 @@
+import os
+import time
+import zipfile
+
+from conftest import STYLE, offline_generator
+from jobs import DONE, FAILED, RenderQueue
+
+
+def test_jobs_render_into_their_own_directories(tmp_path):
+    queue = RenderQueue(str(tmp_path / "jobs"), max_workers=2, generator_factory=offline_generator)
+    try:
+        ids = [queue.submit(text=f"Render number {i} is here", **STYLE) for i in range(3)]
+        results = [queue.wait(job_id, timeout=120) for job_id in ids]
+    finally:
+        queue.shutdown()
+
+    assert [r["status"] for r in results] == [DONE] * 3
+    outputs = [r["output_path"] for r in results]
+    assert len(set(outputs)) == 3
+    for job_id, path in zip(ids, outputs):
+        assert os.path.dirname(path) == str(tmp_path / "jobs" / job_id)
+        assert os.path.getsize(path) > 0
+
+
+def test_failed_job_reports_error(tmp_path):
+    queue = RenderQueue(str(tmp_path / "jobs"), max_workers=1, generator_factory=offline_generator)
+    try:
+        job_id = queue.submit(text="Bad colour", **{**STYLE, "bg_color": "#zz"})
+        info = queue.wait(job_id, timeout=120)
+    finally:
+        queue.shutdown()
+    assert info["status"] == FAILED and info["error"]
+
+
+def test_cleanup_by_age_and_size(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    queue = RenderQueue(str(jobs_dir), max_workers=1, max_age=60, max_bytes=1500)
+    try:
+        now = time.time()
+        for name, age in (("old", 120), ("mid", 30), ("new", 10)):
+            (jobs_dir / name).mkdir()
+            (jobs_dir / name / "out.mp4").write_bytes(b"x" * 1000)
+            os.utime(jobs_dir / name, (now - age, now - age))
+
+        queue.cleanup(now)
+    finally:
+        queue.shutdown()
+    # "old" is past max_age; "mid" goes next to get under max_bytes
+    assert sorted(os.listdir(jobs_dir)) == ["new"]
+
+
+def test_preview_dirs_are_cleaned_up_like_jobs(tmp_path):
+    queue = RenderQueue(str(tmp_path / "jobs"), max_workers=1, max_age=60)
+    try:
+        path = queue.preview_dir("preview_a")
+        (tmp_path / "jobs" / "preview_a" / "draft.mp4").write_bytes(b"x")
+        queue.cleanup(time.time() + 30)
+        assert os.path.exists(os.path.join(path, "draft.mp4"))
+        queue.cleanup(time.time() + 120)
+        assert not os.path.exists(path)
+        # The session gets its directory back on its next use
+        assert queue.preview_dir("preview_a") == path and os.path.isdir(path)
+    finally:
+        queue.shutdown()
+
+
+def test_overlay_job_returns_a_zipped_pack(tmp_path):
+    queue = RenderQueue(str(tmp_path / "jobs"), max_workers=1, generator_factory=offline_generator)
+    try:
+        job_id = queue.submit(text="Overlay export test", **{**STYLE, "bg_color": "Transparent"}, export="overlay")
+        info = queue.wait(job_id, timeout=120)
+    finally:
+        queue.shutdown()
+    assert info["status"] == DONE
+    with zipfile.ZipFile(info["output_path"]) as pack:
+        names = set(pack.namelist())
+    assert {"manifest.json", "captions.ass", "captions.srt", "voice.mp3"} <= names
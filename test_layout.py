@@ -0,0 +1,46 @@
+from layout import break_lines, layout_text, load_font, scaled_size, word_width
+
+SIZE = (1080, 1920)
+
+
+def test_fonts_are_loaded_once_per_key():
+    assert load_font("arial.ttf", 80) is load_font("arial.ttf", 80)
+    assert load_font("arial.ttf", 80) is not load_font("arial.ttf", 81)
+
+
+def test_break_lines_uses_summed_widths():
+    assert break_lines([40, 40, 40], 10, 90) == [[0, 1], [2]]
+    # A word wider than the line still gets a line of its own (no empty lines)
+    assert break_lines([200, 40], 10, 90) == [[0], [1]]
+
+
+def test_layout_positions_words_left_to_right():
+    words = "Success is waiting for you".split()
+    layout = layout_text(words, "arial.ttf", 80, SIZE, 'center')
+    space_w = word_width("arial.ttf", 80, " ")
+
+    for line in layout.lines:
+        for a, b in zip(line, line[1:]):
+            wa, wb = layout.words[a], layout.words[b]
+            assert wb.x == wa.x + word_width("arial.ttf", 80, wa.word) + space_w
+            assert wb.y == wa.y
+
+    x0, y0, x1, y1 = layout.bbox
+    assert 0 <= x0 < x1 <= SIZE[0] and 0 <= y0 < y1 <= SIZE[1]
+
+
+def test_bottom_position_starts_at_offset():
+    layout = layout_text(["Hello"], "arial.ttf", 80, SIZE, 1420)
+    assert layout.words[0].y == 1420
+
+
+def test_scaled_layout_keeps_line_breaks_and_framing():
+    words = "Success is waiting for those who never stop building".split()
+    full = layout_text(words, "arial.ttf", 80, SIZE, 1420)
+    draft = layout_text(words, "arial.ttf", 80, SIZE, 1420, scale=1 / 3)
+
+    assert draft.size == scaled_size(SIZE, 1 / 3) == (360, 640)
+    assert draft.lines == full.lines
+    assert draft.words[0].y == round(1420 / 3)
+    for a, b in zip(full.bbox, draft.bbox):
+        assert abs(a / 3 - b) <= 3
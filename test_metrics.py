@@ -0,0 +1,52 @@
+import time
+
+from metrics import PROGRESS, STAGE_END, RenderProgress, StageMetrics
+
+
+def test_stage_metrics_accumulate_per_stage():
+    metrics = StageMetrics()
+    for _ in range(3):
+        with metrics.stage("rasterize"):
+            time.sleep(0.01)
+    with metrics.stage("encode"):
+        blob = bytearray(50 * 1024 * 1024)
+        time.sleep(0.02)
+        del blob
+
+    report = metrics.to_dict()
+    assert list(report["stages"]) == ["rasterize", "encode"]
+    assert report["stages"]["rasterize"]["calls"] == 3
+    assert report["stages"]["rasterize"]["wall_s"] >= 0.03
+    assert report["stages"]["encode"]["peak_rss_mb"] >= report["stages"]["rasterize"]["peak_rss_mb"] + 40
+
+
+def test_render_progress_events_and_exports():
+    progress = RenderProgress()
+    events = []
+    progress.subscribe(events.append)
+    with progress.phase("tts"):
+        pass
+    with progress.phase("encode"):
+        for frame in (0, 5, 10):
+            time.sleep(0.01)
+            progress.advance("encode", frame, 10)
+    progress.count("bytes_written", 1234)
+    progress.count("frames_rendered")
+    progress.count("frames_rendered")
+
+    encode = [e for e in events if e.kind == PROGRESS]
+    assert encode[0].eta_s is None  # Nothing done yet
+    assert encode[1].eta_s > 0 and encode[2].eta_s == 0
+    assert encode[1].message.startswith("Rendering Final Video... 5/10")
+    # tts and encode weigh 0.2 and 0.5 of the bar
+    assert encode[1].fraction == 0.2 + 0.25
+    assert events[-1].kind == STAGE_END and events[-1].fraction == 0.7
+
+    report = progress.to_dict()
+    assert list(report["stages"]) == ["tts", "encode"]
+    assert report["counters"] == {"bytes_written": 1234, "frames_rendered": 2}
+
+    text = progress.to_prometheus(labels={"job": "abc"})
+    assert 'text2reel_stage_seconds{job="abc",stage="encode"}' in text
+    assert 'text2reel_frames_rendered_total{job="abc"} 2' in text
+    assert "# TYPE text2reel_bytes_written_total counter" in text
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from captions import CaptionRenderer
+from conftest import SCRIPT, STYLE, audio_stream, decode_frames, decode_rgba_frame, offline_generator
+from generator import ReelGenerator
+from render import CaptionFrames
+from timeline import MOTION_WINDOW, MotionFrame, build_caption_events, held_frames, motion_frames
+
+CHUNK = "Wake up early and grind hard".split()
+# STYLE's captions as CaptionRenderer arguments
+CAPTIONS = ReelGenerator.caption_style(
+    STYLE["highlight_color"], STYLE["font_size"], STYLE["text_color"], STYLE["font_name"], STYLE["position"]
+)
+# ... and as render_chunk arguments
+LAYOUT = {k: v for k, v in CAPTIONS.items() if k != "highlight_color"}
+
+
+def test_motion_frames_animate_only_the_window():
+    events = build_caption_events(["a", "bb", "c"], [0.5, 0.1, 0.6], max_words=3)
+    for fps in (24, 60):
+        held = held_frames(events, 1.2, fps)
+        runs = motion_frames(events, 1.2, fps)
+        assert sum(n for _, n in runs) == sum(n for _, n in held)
+        window = round(MOTION_WINDOW * fps)
+        for event, n in held:
+            animated = [r for r in runs if isinstance(r[0], MotionFrame) and r[0].event is event]
+            assert [m.progress for m, _ in animated] == [i / window for i in range(min(n, window))]
+            assert all(k == 1 for _, k in animated)
+    # Only the windows scale with the frame rate
+    assert len(motion_frames(events, 1.2, 60)) < 2.5 * len(motion_frames(events, 1.2, 24))
+
+
+@pytest.mark.parametrize("animation", ["pop", "fade"])
+def test_animation_ends_on_the_plain_highlight(animation):
+    renderer = CaptionRenderer(ReelGenerator().fonts)
+    for idx in range(len(CHUNK)):
+        plain, origin = renderer.render_word_frame(CHUNK, idx, **CAPTIONS)
+        end, end_origin = renderer.render_motion_frame(CHUNK, idx, 1.0, animation, **CAPTIONS)
+        assert end_origin == origin and np.array_equal(np.array(end), np.array(plain))
+        # A pop starts at scale 1: only resampling separates it from the plain highlight
+        if animation == "pop":
+            start, start_origin = renderer.render_motion_frame(CHUNK, idx, 0.0, animation, **CAPTIONS)
+            assert start_origin == origin and start.size == plain.size
+            a, b = np.array(start).astype(int), np.array(plain).astype(int)
+            assert np.abs(a[..., 3] - b[..., 3]).mean() < 1
+
+
+def test_pop_grows_past_the_chunk():
+    renderer = CaptionRenderer(ReelGenerator().fonts)
+    plain, (ox, oy) = renderer.render_word_frame(CHUNK, 0, **CAPTIONS)
+    popped, (px, py) = renderer.render_motion_frame(CHUNK, 0, 0.5, "pop", **CAPTIONS)
+    assert px < ox and py < oy and popped.width > plain.width
+    # The rest of the chunk is untouched
+    assert np.array_equal(np.array(popped)[oy - py:, -plain.width // 3:], np.array(plain)[:, -plain.width // 3:])
+
+
+def test_slide_box_moves_to_the_spoken_word():
+    renderer = CaptionRenderer(ReelGenerator().fonts)
+    raster = renderer.render_chunk(CHUNK, **LAYOUT)
+    red = lambda sprite: (np.array(sprite) == (255, 75, 75, 255)).all(axis=2)
+    for idx in (1, 2):
+        sprite, origin = renderer.render_motion_frame(CHUNK, idx, 1.0, "slide", **CAPTIONS)
+        cols = np.argwhere(red(sprite))[:, 1] + origin[0] - raster.origin[0]
+        x0, _, x1, _ = raster.word_box(idx)
+        assert x0 - 15 <= cols.min() and cols.max() < x1 + 15
+    # Halfway, the box spans the gap between the two words
+    sprite, origin = renderer.render_motion_frame(CHUNK, 2, 0.3, "slide", **CAPTIONS)
+    cols = np.argwhere(red(sprite))[:, 1] + origin[0] - raster.origin[0]
+    previous, current = raster.word_box(1), raster.word_box(2)
+    assert previous[0] < cols.min() < previous[2] and current[0] < cols.max() < current[2]
+
+
+def test_word_layers_match_between_rasterizers():
+    fonts = ReelGenerator().fonts
+    layers = []
+    for rasterizer in ("pil", "atlas"):
+        raster = CaptionRenderer(fonts, rasterizer=rasterizer).render_chunk(CHUNK, **LAYOUT)
+        word, under, box = raster.word_layers(2, "#FF4B4B", "#FFFFFF")
+        assert raster.word_layers(2, "#FF4B4B", "#FFFFFF")[0] is word  # Cached
+        layers.append((np.array(word).astype(int), np.array(under).astype(int), box))
+    (a, a_under, a_box), (b, b_under, b_box) = layers
+    assert a_box == b_box
+    premultiplied = lambda x: x[..., :3] * x[..., 3:] // 255
+    assert np.abs(premultiplied(a) - premultiplied(b)).max() <= 2
+    assert np.abs(premultiplied(a_under) - premultiplied(b_under)).max() <= 2
+
+
+def test_transparent_motion_frames_keep_straight_alpha():
+    fonts = ReelGenerator().fonts
+    event = build_caption_events(CHUNK, [0.5] * len(CHUNK), 5)[1]
+    for animation in ("pop", "fade", "slide"):
+        frame = np.array(CaptionFrames(fonts, CAPTIONS, None, animation=animation)(MotionFrame(event, 0.4)))
+        visible = frame[..., 3] > 0
+        assert visible.any() and not frame[~visible, :3].any()
+    # The slide box's anti-aliased edge keeps the full highlight colour rather than darkening towards black
+    edge = (frame[..., 3] > 0) & (frame[..., 3] < 255)
+    assert (frame[edge, :3] == (255, 75, 75)).all(axis=1).sum() > 100
+
+
+def test_motion_render_at_60_fps(tmp_path):
+    def render(name, **kwargs):
+        return decode_frames(offline_generator().generate_video(
+            text=SCRIPT, work_dir=str(tmp_path / name), fps=60, **STYLE, **kwargs
+        ))
+
+    static, popped = render("static"), render("pop", animation="pop")
+    assert popped.shape == static.shape
+    # Both end each word on the same highlight; the pop also changes from frame to frame inside its window
+    changes = lambda frames: (np.abs(np.diff(frames.astype(int), axis=0)).max(axis=(1, 2, 3)) > 16).sum()
+    assert changes(popped) > 3 * changes(static)
+    assert np.abs(popped[-1].astype(int) - static[-1].astype(int)).max() < 16
+
+
+def test_transparent_motion_render_streams_straight_alpha(tmp_path):
+    path = offline_generator().generate_video(
+        text="Hello transparent world", work_dir=str(tmp_path), alpha_codec="qtrle", fps=30, animation="slide",
+        **dict(STYLE, bg_color="Transparent")
+    )
+    assert path.endswith(".mov") and audio_stream(path)[0] == "mp3"
+    frame = decode_rgba_frame(path, 5)  # Late in the first word's slide-in
+    assert frame[0, 0, 3] == 0 and not frame[frame[..., 3] == 0, :3].any()
+    assert (frame == (255, 75, 75, 255)).all(axis=2).sum() > 1000  # The highlight box, opaque
+    edge = (frame[..., 3] > 0) & (frame[..., 3] < 255)
+    assert (frame[edge, :3] == (255, 75, 75)).all(axis=1).sum() > 100  # ... with undarkened edges
@@ -0,0 +1,75 @@
+import json
+import os
+
+from PIL import Image
+
+from conftest import SCRIPT, STYLE, offline_generator
+from metrics import RenderProgress
+from overlay import pack_atlas
+from subtitles import ass_timestamp, srt_timestamp
+from timeline import held_frames
+
+# export_overlay takes no background
+OVERLAY_STYLE = {key: value for key, value in dict(STYLE, position="Bottom").items() if key != "bg_color"}
+
+
+def test_overlay_pack_covers_the_timeline(tmp_path):
+    gen = offline_generator()
+    pack = gen.export_overlay(text=SCRIPT, work_dir=str(tmp_path), **OVERLAY_STYLE)
+
+    with open(os.path.join(pack, "manifest.json")) as f:
+        manifest = json.load(f)
+    assert (manifest["width"], manifest["height"], manifest["fps"]) == (1080, 1920, 24)
+    assert os.path.getsize(os.path.join(pack, manifest["audio"])) > 0
+    items = manifest["items"]
+    assert len(items) == len(SCRIPT.split())  # One image per highlighted word
+
+    for item in items:
+        sprite = Image.open(os.path.join(pack, item["image"]))
+        assert sprite.mode == "RGBA" and sprite.size == (item["width"], item["height"])
+        assert 0 <= item["x"] and item["x"] + item["width"] <= 1080
+        assert item["y"] + item["height"] <= 1920
+
+    # Frame ranges line up with what the video renderers show
+    speech, events = gen.build_timeline(SCRIPT, STYLE["voice_style"], 1.0, 5, RenderProgress(), str(tmp_path))
+    shown = []
+    for event, n in held_frames(events, speech.duration, 24):
+        shown += [None if event is None else events.index(event)] * n
+    for item in items:
+        frames = range(item["start_frame"], min(item["end_frame"], len(shown)))
+        assert all(shown[k] == item["index"] for k in frames)
+
+    srt = open(os.path.join(pack, "captions.srt")).read()
+    assert srt.startswith("1\n00:00:00,000 --> ")
+    ass = open(os.path.join(pack, "captions.ass")).read()
+    assert ass.count("Dialogue:") == len(items)
+    assert "{\\c&H004B4BFF}Wake{\\r}" in ass  # Highlight colour is &HAABBGGRR
+
+
+def test_atlas_pack_holds_every_sprite(tmp_path):
+    gen = offline_generator()
+    pack = gen.export_overlay(text=SCRIPT, work_dir=str(tmp_path), atlas=True, **OVERLAY_STYLE)
+    with open(os.path.join(pack, "manifest.json")) as f:
+        manifest = json.load(f)
+    atlas = Image.open(os.path.join(pack, manifest["atlas"]))
+    for item in manifest["items"]:
+        ax, ay, w, h = item["atlas"]
+        assert (w, h) == (item["width"], item["height"])
+        assert ax + w <= atlas.width and ay + h <= atlas.height
+        assert atlas.crop((ax, ay, ax + w, ay + h)).getbbox() is not None
+    assert not os.path.exists(os.path.join(pack, "captions"))
+
+
+def test_pack_atlas_never_overlaps():
+    sizes = [(900, 150), (900, 150), (300, 40), (4096, 10), (20, 20)]
+    positions, (W, H) = pack_atlas(sizes, max_width=2048)
+    rects = [(x, y, x + w, y + h) for (x, y), (w, h) in zip(positions, sizes)]
+    for i, a in enumerate(rects):
+        assert a[3] <= H
+        for b in rects[i + 1:]:
+            assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1]
+
+
+def test_subtitle_timestamps():
+    assert srt_timestamp(3725.5) == "01:02:05,500"
+    assert ass_timestamp(3725.5) == "1:02:05.50"
@@ -0,0 +1,274 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from moviepy.config import FFMPEG_BINARY
+from PIL import Image
+
+from conftest import SCRIPT, STYLE, audio_stream, decode_frames, decode_rgba_frame, offline_generator
+from metrics import PROGRESS, STAGE_END, STAGE_START, RenderProgress
+from render import ALPHA_CODECS, encode_concat, encode_frames_pipe, split_segments, write_held_frames
+from timeline import CaptionEvent, EventCursor, build_caption_events, held_frames
+
+
+def test_held_frames_match_fps_sampling():
+    events = build_caption_events(["a", "bb", "c"], [0.1, 0.25, 0.2], max_words=2)
+    runs = held_frames(events, 0.6, fps=24)
+    assert sum(n for _, n in runs) == int(0.6 * 24)
+
+    sampled = []
+    for event, n in runs:
+        sampled += [event] * n
+    for k, event in enumerate(sampled):
+        t = k / 24
+        playing = [e for e in events if e.start <= t < e.end]
+        assert event is (playing[-1] if playing else None)
+
+
+def test_event_cursor_matches_held_frames():
+    events = build_caption_events("a bb c dddd e ff".split(), [0.1, 0.25, 0.2, 0.3, 0.05, 0.15], max_words=2)
+    events.append(CaptionEvent(9, ["late"], 0, 0.3, 0.2))  # Overlaps the chunks around it
+    sampled = []
+    for event, n in held_frames(events, 1.2, fps=24):
+        sampled += [event] * n
+    cursor = EventCursor(events)
+    assert [cursor.at(k / 24) for k in range(len(sampled))] == sampled
+    assert cursor.at(0.0) is sampled[0]  # Seeking back restarts the scan
+
+
+def test_held_frames_gap_shows_background():
+    events = [CaptionEvent(0, ["a"], 0, 0.5, 0.5)]
+    runs = held_frames(events, 1.0, fps=10)
+    assert [(e is None, n) for e, n in runs] == [(True, 5), (False, 5)]
+
+
+def test_frames_backend_matches_moviepy(tmp_path):
+    outputs = {}
+    for backend in ("moviepy", "frames"):
+        gen = offline_generator(render_backend=backend)
+        outputs[backend] = decode_frames(gen.generate_video(text=SCRIPT, work_dir=str(tmp_path / backend), **STYLE))
+
+    assert outputs["frames"].shape == outputs["moviepy"].shape
+    # Same frames at the same indices: an off-by-one word transition would differ by ~200
+    diff = np.abs(outputs["frames"].astype(int) - outputs["moviepy"].astype(int))
+    assert diff.max() < 16
+
+
+def test_voice_track_is_muxed_without_reencoding(tmp_path):
+    for backend in ("moviepy", "frames", "libass"):
+        work_dir = tmp_path / backend
+        path = offline_generator(render_backend=backend).generate_video(text=SCRIPT, work_dir=str(work_dir), **STYLE)
+        with open(work_dir / "voice.mp3", "rb") as f:
+            voice = f.read()
+        codec, packets = audio_stream(path)
+        # MP4 stream-copies the TTS bytes, up to the last MP3 frame that fits the video
+        assert codec == "mp3" and voice.startswith(packets) and len(packets) > 0.95 * len(voice)
+
+        webm = offline_generator(render_backend=backend).generate_video(
+            text=SCRIPT, work_dir=str(work_dir), **dict(STYLE, bg_color="Transparent")
+        )
+        assert audio_stream(webm)[0] == "opus"
+
+
+def test_split_segments_cuts_at_chunk_boundaries():
+    events = build_caption_events("one two three four five six seven".split(), [0.2] * 7, max_words=2)
+    runs = held_frames(events, 1.6, fps=10)
+    segments = split_segments(runs, 3)
+    assert len(segments) == 3
+    assert [run for segment in segments for run in segment] == runs
+    for before, after in zip(segments, segments[1:]):
+        assert before[-1][0].chunk_index != after[0][0].chunk_index
+    assert split_segments(runs, 1) == [runs]
+
+
+def test_parallel_segments_match_single_process(tmp_path):
+    serial = offline_generator().generate_video(text=SCRIPT, work_dir=str(tmp_path / "serial"), **STYLE)
+    progress = RenderProgress()
+    parallel = offline_generator(encode_workers=3).generate_video(
+        text=SCRIPT, work_dir=str(tmp_path / "parallel"), progress=progress, **STYLE
+    )
+    a, b = decode_frames(serial), decode_frames(parallel)
+    assert a.shape == b.shape  # Frame-accurate: no frames lost or duplicated at the joins
+    assert np.abs(a.astype(int) - b.astype(int)).max() < 16
+    assert progress.counters["frames_encoded"] == len(a)
+    assert sorted(os.listdir(tmp_path / "parallel")) == ["output_reel.mp4", "voice.mp3"]
+
+
+def test_frames_backend_transparent_webm(tmp_path):
+    path = offline_generator().generate_video(
+        text="Hello transparent world", work_dir=str(tmp_path), **dict(STYLE, bg_color="Transparent", position="Bottom")
+    )
+    assert path.endswith(".webm") and os.path.getsize(path) > 0
+
+
+def test_render_reports_structured_progress(tmp_path):
+    progress = RenderProgress()
+    events = []
+    progress.subscribe(events.append)
+    messages = []
+    gen = offline_generator()
+    path = gen.generate_video(
+        text=SCRIPT, progress_callback=messages.append, work_dir=str(tmp_path), progress=progress, **STYLE
+    )
+
+    boundaries = [(e.kind, e.stage) for e in events if e.kind != PROGRESS]
+    phases = ["tts", "timing", "frames", "encode"]
+    assert boundaries == [(kind, p) for p in phases for kind in (STAGE_START, STAGE_END)]
+    assert messages == ["Generating Voice...", "Analyzing Audio & Timing...", "Compositing Video...",
+                        "Rendering Final Video..."]
+
+    fractions = [e.fraction for e in events]
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+    encode = [e for e in events if e.kind == PROGRESS and e.stage == "encode"]
+    total_frames = progress.counters["frames_encoded"]
+    assert encode and encode[-1].done == encode[-1].total == total_frames
+    assert progress.counters["frames_rendered"] < total_frames  # Held frames are rendered once
+    assert progress.counters["bytes_written"] == os.path.getsize(path)
+
+
+def ink_bbox(frame):
+    ys, xs = np.nonzero(frame.max(axis=2) > 128)
+    return np.array([xs.min(), ys.min(), xs.max(), ys.max()])
+
+
+def test_draft_matches_full_render_framing(tmp_path):
+    style = dict(STYLE, position="Bottom")
+    gen = offline_generator()
+    full = gen.generate_video(text=SCRIPT, work_dir=str(tmp_path), **style)
+    draft = gen.generate_video(text=SCRIPT, work_dir=str(tmp_path), draft=True, **style)
+    assert draft != full
+
+    full_frames = decode_frames(full, size=(360, 640))
+    draft_frames = decode_frames(draft, size=(360, 640))
+    # Same timeline at half the frame rate
+    assert len(draft_frames) == len(full_frames) // 2
+    # Draft frame k shows what the full render shows at frame 2k, in the same place
+    for k in range(0, len(draft_frames), 3):
+        offset = np.abs(ink_bbox(draft_frames[k]) - ink_bbox(full_frames[2 * k]))
+        assert offset.max() <= 3
+
+
+def highlight_bbox(frame):
+    ys, xs = np.nonzero((frame[..., 0] > 200) & (frame[..., 1] < 120))
+    return np.array([xs.min(), ys.min(), xs.max(), ys.max()]) if len(xs) else None
+
+
+def test_libass_backend_matches_pil_captions(tmp_path):
+    style = dict(STYLE, position="Bottom")
+    outputs = {}
+    for backend in ("frames", "libass"):
+        work_dir = tmp_path / backend
+        work_dir.mkdir()
+        path = offline_generator(render_backend=backend).generate_video(text=SCRIPT, work_dir=str(work_dir), **style)
+        outputs[backend] = decode_frames(path, size=(540, 960))
+
+    pil, ass = outputs["frames"], outputs["libass"]
+    assert pil.shape == ass.shape
+    # Same word lit on every frame, in the same place (different glyph rasterizers, so not bit-exact)
+    for k in range(len(pil)):
+        a, b = highlight_bbox(pil[k]), highlight_bbox(ass[k])
+        assert (a is None) == (b is None)
+        if a is not None:
+            assert np.abs(a - b).max() <= 3
+    assert np.abs(pil.astype(int) - ass.astype(int)).mean() < 2
+
+
+def test_libass_backend_transparent_alpha(tmp_path):
+    path = offline_generator(render_backend="libass").generate_video(
+        text="Hello transparent world", work_dir=str(tmp_path), **dict(STYLE, bg_color="Transparent")
+    )
+    raw = subprocess.run(
+        [FFMPEG_BINARY, "-loglevel", "error", "-c:v", "libvpx-vp9", "-i", path, "-frames:v", "1",
+         "-f", "rawvideo", "-pix_fmt", "rgba", "-"],
+        check=True, capture_output=True,
+    ).stdout
+    frame = np.frombuffer(raw, np.uint8).reshape(1920, 1080, 4)
+    assert frame[0, 0, 3] == 0  # Background stays transparent
+    ys, xs = np.nonzero(frame[..., 3] == 255)
+    assert len(ys) and 800 < ys.mean() < 1100  # Opaque captions around the centre
+    assert frame[ys, xs, :3].max() == 255  # White/red text, not premultiplied towards black
+
+
+def test_piped_runs_are_held_by_the_encoder(tmp_path):
+    runs = [(10, 10), (60, 1), (110, 1), (160, 30), (210, 3)]  # Each run's value is its frame's grey level
+    for codec in (False, "qtrle"):
+        mode = "RGBA" if codec else "RGB"
+        sent = []
+
+        def frame_for_event(level):
+            sent.append(level)
+            return Image.new(mode, (64, 32), (level,) * len(mode))
+
+        path = encode_frames_pipe(runs, frame_for_event, None, str(tmp_path / f"held.{'mov' if codec else 'mp4'}"),
+                                  60, codec)
+        assert sent == [level for level, _ in runs]  # One composite per run
+        levels = decode_frames(path, (64, 32))[:, 16, 32, 0].astype(int)
+        expected = [level for level, n in runs for _ in range(n)]
+        assert len(levels) == len(expected) and np.abs(levels - expected).max() <= 2
+
+
+def test_failed_frame_stops_the_piped_encoder(tmp_path):
+    def frame_for_event(level):
+        if level == 60:
+            raise ValueError("no frame")
+        return Image.new("RGB", (64, 32), (level,) * 3)
+
+    runs = [(10, 10), (60, 1), (110, 1)]
+    # Raised as is, rather than hanging on ffmpeg's open stdin or turning into ffmpeg's error
+    with pytest.raises(ValueError, match="no frame"):
+        encode_frames_pipe(runs, frame_for_event, None, str(tmp_path / "held.mp4"), 24, False)
+
+
+def test_concat_images_are_held_exactly_at_every_fps(tmp_path):
+    runs = [(10, 10), (60, 1), (110, 1), (160, 7), (210, 1), (30, 2), (90, 1), (140, 5)]
+    expected = [level for level, n in runs for _ in range(n)]
+    for fps in (24, 30, 60):
+        frames_dir = tmp_path / str(fps)
+        frames_dir.mkdir()
+        list_path = write_held_frames(runs, lambda level: Image.new("RGB", (64, 32), (level,) * 3), str(frames_dir), fps)
+        path = encode_concat(list_path, None, str(frames_dir / "held.mp4"), fps, False, len(expected))
+        levels = decode_frames(path, (64, 32))[:, 16, 32, 0].astype(int)
+        assert len(levels) == len(expected) and np.abs(levels - expected).max() <= 2
+
+
+def test_alpha_codecs_carry_the_same_frames(tmp_path):
+    frames = {}
+    for codec, (ext, _) in ALPHA_CODECS.items():
+        path = offline_generator(render_backend="moviepy").generate_video(
+            text="Hello transparent world", work_dir=str(tmp_path / codec), alpha_codec=codec,
+            **dict(STYLE, bg_color="Transparent")
+        )
+        assert path.endswith("." + ext)
+        assert audio_stream(path)[0] == ("opus" if ext == "webm" else "mp3")
+        frames[codec] = decode_rgba_frame(path, 6)
+
+    lossless = frames["qtrle"]
+    assert np.array_equal(lossless, frames["png"])
+    assert lossless[0, 0, 3] == 0 and lossless[..., 3].max() == 255
+    assert not lossless[lossless[..., 3] == 0, :3].any()  # No colour hidden under zero alpha
+    assert np.abs(frames["vp9"].astype(int) - lossless.astype(int)).mean() < 2
+
+
+MEMORY_PROBE = """
+import tempfile
+from functools import partial
+from conftest import STYLE, offline_generator
+from tts import silent_speech_stream
+gen = offline_generator(render_backend="moviepy")
+gen.speech_stream = partial(silent_speech_stream, words_per_second=20)
+gen.generate_video(
+    text=" ".join(f"word{{i % 50}}" for i in range({n_words})), work_dir=tempfile.mkdtemp(), draft=True, **STYLE
+)
+# VmHWM, not ru_maxrss: the latter carries over the forking parent's peak on Linux
+print(next(int(line.split()[1]) // 1024 for line in open("/proc/self/status") if line.startswith("VmHWM")))
+"""
+
+
+def test_long_script_renders_in_bounded_memory():
+    # 5,000 words is ~4 minutes of captions; every frame is built lazily and dropped once shown
+    out = subprocess.run(
+        [sys.executable, "-c", MEMORY_PROBE.format(n_words=5000)], check=True, capture_output=True, text=True,
+    ).stdout
+    assert int(out.split()[-1]) < 200  # Peak RSS in MB; one clip per word used to need several GB
@@ -0,0 +1,26 @@
+import json
+import subprocess
+import sys
+
+from bench_startup import HEAVY_MODULES, IMPORT_PROBE
+from generator import ReelGenerator
+from layout import load_font
+
+
+def test_importing_the_pipeline_defers_heavy_modules():
+    for module in ("generator", "jobs"):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        assert json.loads(out)["heavy_loaded"] == []
+
+
+def test_warm_up_preloads_fonts():
+    gen = ReelGenerator()
+    gen.speech_stream = None  # Offline: skip the edge-tts import
+    gen.warm_up(font_sizes=(72,))
+    before = load_font.cache_info().hits
+    load_font("impact.ttf", 72)
+    load_font("impact.ttf", 24)  # Draft size
+    assert load_font.cache_info().hits == before + 2
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from functools import partial
+
+import pytest
+
+from generator import ReelGenerator
+from timeline import aligned_word_durations
+from tts import TICKS_PER_SECOND, WordTiming, silent_speech_stream, split_sentences, stream_speech
+
+
+def recorded_stream(events):
+    """Replays a list of edge-tts style chunks as an async stream."""
+    async def chunks():
+        for chunk in events:
+            yield chunk
+    return chunks()
+
+
+def boundary(text, start, duration):
+    return {"type": "WordBoundary", "text": text,
+            "offset": int(start * TICKS_PER_SECOND), "duration": int(duration * TICKS_PER_SECOND)}
+
+
+def test_stream_speech_writes_audio_and_collects_timings(tmp_path):
+    events = [
+        {"type": "audio", "data": b"\x00" * 3000},
+        boundary("Hello", 0.1, 0.3),
+        {"type": "audio", "data": b"\x00" * 3000},
+        boundary("world", 0.5, 0.4),
+    ]
+    seen = []
+    path = str(tmp_path / "voice.mp3")
+    speech = asyncio.run(stream_speech(recorded_stream(events), path, on_word=seen.append))
+
+    assert open(path, "rb").read() == b"\x00" * 6000
+    assert [w.word for w in speech.words] == ["Hello", "world"] == [w.word for w in seen]
+    assert speech.words[1].start == pytest.approx(0.5)
+    # 6000 bytes of 48 kbps CBR audio
+    assert speech.duration == pytest.approx(1.0)
+
+
+def test_on_word_fires_before_the_stream_ends(tmp_path):
+    order = []
+
+    async def chunks():
+        yield boundary("first", 0.0, 0.2)
+        order.append("audio")
+        yield {"type": "audio", "data": b"\x00" * 10}
+
+    asyncio.run(stream_speech(chunks(), str(tmp_path / "v.mp3"), on_word=lambda w: order.append(w.word)))
+    assert order == ["first", "audio"]
+
+
+def test_alignment_follows_boundaries_and_fills_gaps():
+    words = "Wake up, early! 25 people".split()
+    timings = [WordTiming("Wake", 0.2, 0.2), WordTiming("up", 0.5, 0.1), WordTiming("early", 1.0, 0.3),
+               WordTiming("people", 2.0, 0.4)]
+    durations = aligned_word_durations(words, timings, 3.0)
+
+    starts = [sum(durations[:i]) for i in range(len(words))]
+    assert starts[0] == 0.0  # Captions start with the first frame
+    assert starts[1] == pytest.approx(0.5)
+    assert starts[2] == pytest.approx(1.0)
+    assert 1.0 < starts[3] < 2.0  # "25" had no boundary: interpolated
+    assert starts[4] == pytest.approx(2.0)
+    assert sum(durations) == pytest.approx(3.0)
+
+
+def test_alignment_handles_repeated_words():
+    words = "the the end".split()
+    timings = [WordTiming("the", 0.0, 0.2), WordTiming("the", 0.4, 0.2), WordTiming("end", 0.8, 0.2)]
+    durations = aligned_word_durations(words, timings, 1.0)
+    assert durations == pytest.approx([0.4, 0.4, 0.2])
+
+
+def test_synthesize_uses_the_configured_stream(tmp_path):
+    gen = ReelGenerator()
+    gen.speech_stream = silent_speech_stream
+    gen.tts_cache = None
+    speech = asyncio.run(gen.synthesize("Namaste. This is a test.", "Prabhat (Neural) - IN Male", work_dir=str(tmp_path)))
+    assert [w.word for w in speech.words] == ["Namaste", "This", "is", "a", "test"]
+    assert speech.duration == pytest.approx(2.0, abs=0.1)
+
+
+def test_split_sentences_keeps_every_word():
+    text = "Wake up early. Grind hard!  Success is waiting? Yes"
+    pieces = split_sentences(text)
+    assert pieces == ["Wake up early.", "Grind hard!", "Success is waiting?", "Yes"]
+    assert " ".join(pieces).split() == text.split()
+
+
+def test_parallel_synthesis_is_concurrent_and_stitched_in_order(tmp_path):
+    gen = ReelGenerator(parallel_tts=True, tts_concurrency=3)
+    gen.tts_cache = None
+    gen.speech_stream = partial(silent_speech_stream, latency=0.3)
+    text = " ".join(f"Sentence number {i} is here." for i in range(6))
+
+    start = time.perf_counter()
+    speech = asyncio.run(gen.synthesize(text, "Guy (Neural) - US Male", work_dir=str(tmp_path)))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 6 * 0.3  # Two waves of three, not six in a row
+    assert [w.word for w in speech.words] == [w.strip(".") for w in text.split()]
+    starts = [w.start for w in speech.words]
+    assert starts == sorted(starts)
+    # Six identical ~2 s pieces: each sentence starts where the previous audio ends
+    piece = speech.duration / 6
+    assert piece == pytest.approx(2.0, abs=0.1)
+    assert speech.words[5].start == pytest.approx(piece)
+    assert speech.words[25].start == pytest.approx(5 * piece)
+
+
+def test_only_failed_pieces_are_retried(tmp_path):
+    attempts = {}
+
+    def flaky_stream(text, voice, rate_str="+0%"):
+        attempts[text] = attempts.get(text, 0) + 1
+        if text == "Second one." and attempts[text] == 1:
+            async def failing():
+                raise ConnectionError("dropped")
+                yield
+            return failing()
+        return silent_speech_stream(text, voice, rate_str)
+
+    gen = ReelGenerator(parallel_tts=True)
+    gen.tts_cache = None
+    gen.speech_stream = flaky_stream
+    speech = asyncio.run(gen.synthesize("First one. Second one. Third one.", "Guy (Neural) - US Male", work_dir=str(tmp_path)))
+
+    assert attempts == {"First one.": 1, "Second one.": 2, "Third one.": 1}
+    assert [w.word for w in speech.words] == ["First", "one", "Second", "one", "Third", "one"]
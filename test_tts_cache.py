@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generator import ReelGenerator
+from tts import SpeechResult, WordTiming, silent_speech_stream
+from tts_cache import TTSCache
+
+
+def make_speech(tmp_path, name, n_bytes=1000):
+    path = str(tmp_path / name)
+    with open(path, "wb") as f:
+        f.write(os.urandom(n_bytes))
+    return SpeechResult(path, [WordTiming("hi", 0.0, 0.5)], 0.5)
+
+
+def test_key_covers_text_voice_and_rate():
+    keys = {
+        TTSCache.key("Hello", "en-US-GuyNeural", "+0%"),
+        TTSCache.key("Hello!", "en-US-GuyNeural", "+0%"),
+        TTSCache.key("Hello", "en-US-AriaNeural", "+0%"),
+        TTSCache.key("Hello", "en-US-GuyNeural", "+10%"),
+    }
+    assert len(keys) == 4
+    assert TTSCache.key("Hello", "en-US-GuyNeural", "+0%") == TTSCache.key("Hello", "en-US-GuyNeural", "+0%")
+
+
+def test_roundtrip_materializes_audio_and_timings(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"))
+    speech = make_speech(tmp_path, "voice.mp3")
+    cache.put("k", speech)
+
+    out = cache.get("k", str(tmp_path / "out.mp3"))
+    assert open(out.audio_path, "rb").read() == open(speech.audio_path, "rb").read()
+    assert [(w.word, w.start, w.duration) for w in out.words] == [("hi", 0.0, 0.5)]
+    assert out.duration == 0.5
+    assert cache.get("missing", str(tmp_path / "x.mp3")) is None
+
+
+def test_repeated_hits_leave_no_temporary_links(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"))
+    cache.put("k", make_speech(tmp_path, "voice.mp3"))
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    for _ in range(3):
+        assert cache.get("k", str(work_dir / "voice.mp3")) is not None
+    assert os.listdir(work_dir) == ["voice.mp3"]
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.endswith(".tmp")]
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"), max_bytes=2500)
+    for key in ("a", "b"):
+        cache.put(key, make_speech(tmp_path, f"{key}.mp3"))
+        time.sleep(0.01)
+    cache.get("a", str(tmp_path / "hit.mp3"))  # "a" becomes most recent
+    time.sleep(0.01)
+    cache.put("c", make_speech(tmp_path, "c.mp3"))
+
+    assert cache.get("b", str(tmp_path / "b_out.mp3")) is None
+    assert cache.get("a", str(tmp_path / "a_out.mp3")) is not None
+    assert cache.get("c", str(tmp_path / "c_out.mp3")) is not None
+
+
+def _put_same_key(cache_dir, src_dir, i):
+    cache = TTSCache(cache_dir)
+    path = os.path.join(src_dir, f"src_{i}.mp3")
+    with open(path, "wb") as f:
+        f.write(bytes([i]) * 5000)
+    cache.put("shared", SpeechResult(path, [], 1.0))
+    got = cache.get("shared", os.path.join(src_dir, f"got_{i}.mp3"))
+    data = open(got.audio_path, "rb").read()
+    return len(set(data)) == 1 and len(data) == 5000
+
+
+def test_concurrent_writers_never_expose_partial_entries(tmp_path):
+    cache_dir, src_dir = str(tmp_path / "cache"), str(tmp_path)
+    TTSCache(cache_dir)
+    with ProcessPoolExecutor(4) as pool:
+        results = list(pool.map(_put_same_key, [cache_dir] * 8, [src_dir] * 8, range(8)))
+    assert all(results)
+    assert not [n for n in os.listdir(cache_dir) if n.endswith(".tmp")]
+
+
+def test_generator_reuses_cached_speech(tmp_path):
+    calls = []
+
+    def counting_stream(text, voice, rate_str="+0%"):
+        calls.append(text)
+        return silent_speech_stream(text, voice, rate_str)
+
+    gen = ReelGenerator()
+    gen.tts_cache = TTSCache(str(tmp_path / "cache"))
+    gen.speech_stream = counting_stream
+
+    work_dir = str(tmp_path)
+    first = asyncio.run(gen.synthesize("Same words twice", "Guy (Neural) - US Male", work_dir=work_dir))
+    seen = []
+    second = asyncio.run(gen.synthesize("Same words twice", "Guy (Neural) - US Male", on_word=seen.append, work_dir=work_dir))
+    asyncio.run(gen.synthesize("Same words twice", "Guy (Neural) - US Male", "+10%", work_dir=work_dir))
+
+    assert calls == ["Same words twice", "Same words twice"]
+    assert [w.word for w in seen] == [w.word for w in first.words]
+    assert second.duration == first.duration
@@ -0,0 +1,50 @@
+import numpy as np
+
+from conftest import SCRIPT, STYLE, decode_frames, offline_generator
+from generator import ASPECT_SIZES
+from metrics import RenderProgress
+
+BOTTOM = dict(STYLE, position="Bottom")
+VARIANTS = [
+    dict(name="story", size=ASPECT_SIZES["9:16"]),
+    dict(name="square", size=ASPECT_SIZES["1:1"], bg_color="#F5F5F5", text_color="#111111", position="Center"),
+    dict(name="wide", size=ASPECT_SIZES["16:9"], highlight_color="#00C2FF", font_size=64),
+]
+
+
+def test_variants_match_single_renders(tmp_path):
+    gen = offline_generator()
+    calls = []
+    stream = gen.speech_stream
+    gen.speech_stream = lambda *args: calls.append(args) or stream(*args)
+    progress = RenderProgress()
+    outputs = gen.generate_variants(SCRIPT, variants=VARIANTS, work_dir=str(tmp_path / "variants"), progress=progress,
+                                    **BOTTOM)
+    assert list(outputs) == ["story", "square", "wide"]
+    assert len(calls) == 1  # One TTS pass for every variant
+
+    for variant in VARIANTS:
+        style = dict(BOTTOM, **variant)
+        name = style.pop("name")
+        single = offline_generator().generate_video(text=SCRIPT, work_dir=str(tmp_path / name), **style)
+        size = style["size"]
+        thumb = (size[0] // 10, size[1] // 10)
+        a, b = decode_frames(outputs[name], thumb), decode_frames(single, thumb)
+        assert a.shape == b.shape
+        assert np.abs(a.astype(int) - b.astype(int)).max() < 16
+
+    assert progress.counters["frames_encoded"] == 3 * len(a)
+
+
+def test_background_variants_share_rasters(tmp_path):
+    gen = offline_generator()
+    rasterized = []
+    rasterize = gen.captions._rasterize
+    gen.captions._rasterize = lambda words, *args: rasterized.append(tuple(words)) or rasterize(words, *args)
+    variants = [dict(name="dark"), dict(name="light", bg_color="#F5F5F5"),
+                dict(name="clear", bg_color="Transparent", alpha_codec="qtrle")]
+    outputs = gen.generate_variants(SCRIPT, variants=variants, work_dir=str(tmp_path), **BOTTOM)
+    assert outputs["clear"].endswith(".mov") and outputs["dark"].endswith(".mp4")
+    # Rendered side by side, yet every chunk is rasterized once for all three
+    words = SCRIPT.split()
+    assert sorted(rasterized) == sorted({tuple(words[i:i + 5]) for i in range(0, len(words), 5)})
@@ -0,0 +1,199 @@
+import re
+
+# How many script words a boundary may skip ahead to find its match
+ALIGN_LOOKAHEAD = 3
+# Seconds from the start of a word over which a motion caption animates its highlight
+MOTION_WINDOW = 0.2
+
+
+class CaptionEvent:
+    """One caption state on screen: a chunk of words with one of them highlighted."""
+    __slots__ = ("chunk_index", "words", "highlight_idx", "start", "duration")
+
+    def __init__(self, chunk_index, words, highlight_idx, start, duration):
+        self.chunk_index = chunk_index
+        self.words = words                  # Words of the chunk shown on screen
+        self.highlight_idx = highlight_idx  # Index of the spoken word within the chunk
+        self.start = start
+        self.duration = duration
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    def __repr__(self):
+        return f"CaptionEvent({self.chunk_index}, {self.highlight_idx}, {self.start:.3f}+{self.duration:.3f})"
+
+
+def chunk_words(words, max_words):
+    """Splits a word list into consecutive chunks of at most max_words."""
+    return [words[i:i + max_words] for i in range(0, len(words), max_words)]
+
+
+def char_weighted_durations(words, total_duration):
+    """Spreads total_duration over words proportionally to their character count."""
+    total_chars = sum(len(w) for w in words) or 1
+    char_duration = total_duration / total_chars
+    return [len(w) * char_duration for w in words]
+
+
+def _normalize(word):
+    return re.sub(r"\W+", "", word).lower()
+
+
+def aligned_word_durations(words, timings, total_duration):
+    """Back-to-back per-word durations anchored on TTS word boundaries.
+
+    Each script word starts when its first boundary starts and lasts until the
+    next word starts (the last word runs to total_duration), so a highlight
+    stays on through pauses. Words the TTS reported no boundary for (or that
+    could not be matched) are interpolated by character count between their
+    anchored neighbours.
+    """
+    if not timings:
+        return char_weighted_durations(words, total_duration)
+
+    norm = [_normalize(w) for w in words]
+    starts = [None] * len(words)
+    cursor = 0
+    for timing in timings:
+        token = _normalize(timing.word)
+        if not token:
+            continue
+        for j in range(cursor, min(len(words), cursor + ALIGN_LOOKAHEAD + 1)):
+            if starts[j] is not None and norm[j] == token:
+                continue  # Already matched, this is a repeat of the same word
+            if token in norm[j] or (norm[j] and norm[j] in token):
+                if starts[j] is None:
+                    starts[j] = timing.start
+                cursor = j
+                break
+
+    # Captions are on screen from the first frame
+    starts[0] = 0.0
+    anchors = [i for i, s in enumerate(starts) if s is not None] + [len(words)]
+    for a, b in zip(anchors, anchors[1:]):
+        end = starts[b] if b < len(words) else total_duration
+        t = starts[a]
+        for k, d in enumerate(char_weighted_durations(words[a:b], max(0.0, end - t))):
+            starts[a + k] = t
+            t += d
+
+    ends = starts[1:] + [total_duration]
+    return [max(0.0, e - s) for s, e in zip(starts, ends)]
+
+
+def build_caption_events(words, word_durations, max_words):
+    """One CaptionEvent per word, back to back, grouped into chunks of max_words."""
+    events = []
+    current_time = 0.0
+    word_iter = iter(word_durations)
+    for chunk_index, chunk in enumerate(chunk_words(words, max_words)):
+        for i in range(len(chunk)):
+            duration = next(word_iter)
+            events.append(CaptionEvent(chunk_index, chunk, i, current_time, duration))
+            current_time += duration
+    return events
+
+
+def held_frames(events, total_duration, fps):
+    """Run-length encodes the frame sequence a fps-sampled render would produce.
+
+    Returns a list of (event, n_frames); event is None where no caption is on
+    screen. Frame k is sampled at k / fps and shows the last event playing at
+    that time, matching moviepy's CompositeVideoClip + write_videofile.
+    """
+    n_frames = int(total_duration * fps)
+    runs = []
+    ordered = sorted(range(len(events)), key=lambda i: events[i].start)
+    pos = 0
+    playing = []
+    for k in range(n_frames):
+        t = k / fps
+        while pos < len(ordered) and events[ordered[pos]].start <= t:
+            playing.append(ordered[pos])
+            pos += 1
+        playing = [i for i in playing if t < events[i].end]
+        current = events[max(playing)] if playing else None
+
+        if runs and runs[-1][0] is current:
+            runs[-1][1] += 1
+        else:
+            runs.append([current, 1])
+    return [(event, n) for event, n in runs]
+
+
+class MotionFrame:
+    """One frame inside a caption event's animation window (see motion_frames)."""
+    __slots__ = ("event", "progress")
+
+    def __init__(self, event, progress):
+        self.event = event
+        self.progress = progress  # How far the highlight animation has run, 0..1
+
+    @property
+    def chunk_index(self):
+        return self.event.chunk_index
+
+    @property
+    def words(self):
+        return self.event.words
+
+    @property
+    def highlight_idx(self):
+        return self.event.highlight_idx
+
+    def __repr__(self):
+        return f"MotionFrame({self.event!r}, {self.progress:.3f})"
+
+
+def motion_frames(events, total_duration, fps, window=MOTION_WINDOW):
+    """held_frames with the first `window` seconds of every event split into single frames.
+
+    Each of those frames is a MotionFrame for its point in the animation; the
+    rest of the event stays one held run of the event itself (the animation's
+    end state). The number of distinct frames grows with fps only inside the
+    windows.
+    """
+    window_frames = max(1, int(round(window * fps)))
+    runs = []
+    for event, n_frames in held_frames(events, total_duration, fps):
+        if event is None:
+            runs.append((event, n_frames))
+            continue
+        animated = min(n_frames, window_frames)
+        runs += [(MotionFrame(event, i / window_frames), 1) for i in range(animated)]
+        if n_frames > animated:
+            runs.append((event, n_frames - animated))
+    return runs
+
+
+class EventCursor:
+    """Caption event on screen at time t, for times that mostly increase.
+
+    Same rule as held_frames (the latest event still playing at t), but
+    answered one query at a time without materializing the frame sequence,
+    so encoders can pull frames lazily. Moving back in time restarts the
+    scan from the beginning.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self._ordered = sorted(range(len(events)), key=lambda i: events[i].start)
+        self._reset()
+
+    def _reset(self):
+        self._pos = 0
+        self._playing = []
+        self._t = float("-inf")
+
+    def at(self, t):
+        if t < self._t:
+            self._reset()
+        self._t = t
+        events, ordered = self.events, self._ordered
+        while self._pos < len(ordered) and events[ordered[self._pos]].start <= t:
+            self._playing.append(ordered[self._pos])
+            self._pos += 1
+        self._playing = [i for i in self._playing if t < events[i].end]
+        return events[max(self._playing)] if self._playing else None
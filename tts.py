@@ -0,0 +1,165 @@
+import asyncio
+import os
+import re
+import shutil
+import subprocess
+
+from utils import ffmpeg_binary
+
+# edge-tts offsets/durations are in 100 ns ticks
+TICKS_PER_SECOND = 10_000_000
+# edge-tts always returns audio-24khz-48kbitrate-mono-mp3 (constant bitrate),
+# so the track length follows from the byte count without decoding it
+MP3_BITRATE = 48_000
+
+
+class WordTiming:
+    """When a spoken word starts and how long it lasts, in seconds."""
+    __slots__ = ("word", "start", "duration")
+
+    def __init__(self, word, start, duration):
+        self.word = word
+        self.start = start
+        self.duration = duration
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    def __repr__(self):
+        return f"WordTiming({self.word!r}, {self.start:.3f}, {self.duration:.3f})"
+
+
+class SpeechResult:
+    """Synthesized voice track plus the word timings reported while streaming it."""
+
+    def __init__(self, audio_path, words, duration):
+        self.audio_path = audio_path
+        self.words = words        # List of WordTiming, in spoken order
+        self.duration = duration  # Seconds of audio written to audio_path
+
+
+def edge_tts_stream(text, voice, rate_str="+0%"):
+    """Chunk stream from edge-tts with per-word boundary events enabled."""
+    import edge_tts  # Pulls in aiohttp; only needed once a script is actually spoken
+
+    return edge_tts.Communicate(text, voice, rate=rate_str, boundary="WordBoundary").stream()
+
+
+def silent_mp3(seconds, bitrate=MP3_BITRATE):
+    """Silent CBR MP3 bytes in edge-tts's output format (24 kHz mono)."""
+    return subprocess.run(
+        [ffmpeg_binary(), "-loglevel", "error", "-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono",
+         "-t", f"{seconds:.3f}", "-c:a", "libmp3lame", "-b:a", str(bitrate),
+         "-write_xing", "0", "-id3v2_version", "0", "-f", "mp3", "-"],
+        check=True, capture_output=True,
+    ).stdout
+
+
+def silent_speech_stream(text, voice=None, rate_str="+0%", words_per_second=2.5, chunk_bytes=4096, latency=0.0):
+    """Offline stand-in for edge_tts_stream: silence with evenly paced word boundaries.
+
+    latency simulates the network round trip before the first chunk arrives.
+    """
+    words = [w for w in (re.sub(r"[^\w'-]+", "", w) for w in text.split()) if w]
+    wps = words_per_second * (1 + int(rate_str.rstrip("%")) / 100)
+    slot = 1 / wps
+    audio = silent_mp3(max(slot, len(words) * slot))
+
+    async def chunks():
+        if latency: await asyncio.sleep(latency)
+        for i, word in enumerate(words):
+            yield {
+                "type": "WordBoundary",
+                "offset": int(i * slot * TICKS_PER_SECOND),
+                "duration": int(0.8 * slot * TICKS_PER_SECOND),
+                "text": word,
+            }
+        for i in range(0, len(audio), chunk_bytes):
+            yield {"type": "audio", "data": audio[i:i + chunk_bytes]}
+
+    return chunks()
+
+
+async def stream_speech(chunks, audio_path, on_word=None, bitrate=MP3_BITRATE):
+    """Consumes a TTS chunk stream once: audio goes to disk as it arrives, timings are collected.
+
+    on_word(WordTiming) is called for every boundary as soon as it is received,
+    so callers can start caption work before synthesis has finished.
+    """
+    words = []
+    n_bytes = 0
+    tmp_path = audio_path + ".part"
+    with open(tmp_path, "wb") as f:
+        async for chunk in chunks:
+            if chunk["type"] == "audio":
+                f.write(chunk["data"])
+                n_bytes += len(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                timing = WordTiming(
+                    chunk["text"],
+                    chunk["offset"] / TICKS_PER_SECOND,
+                    chunk["duration"] / TICKS_PER_SECOND,
+                )
+                words.append(timing)
+                if on_word: on_word(timing)
+    os.replace(tmp_path, audio_path)
+
+    duration = n_bytes * 8 / bitrate
+    if words:
+        duration = max(duration, words[-1].end)
+    return SpeechResult(audio_path, words, duration)
+
+
+def audio_seconds(audio_path, bitrate=MP3_BITRATE):
+    """Length of a CBR MP3 file from its size."""
+    return os.path.getsize(audio_path) * 8 / bitrate
+
+
+def split_sentences(text):
+    """Splits a script after sentence-ending punctuation, keeping every word."""
+    return [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+
+
+async def synthesize_pieces(pieces, synthesize_one, max_concurrency=4, retries=2, retry_delay=0.5):
+    """Runs synthesize_one(index, text) for every piece, at most max_concurrency at a time.
+
+    A failing piece is retried on its own (up to `retries` more times) while
+    the others carry on; results come back in piece order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(index, piece):
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    return await synthesize_one(index, piece)
+            except Exception:
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(retry_delay * (attempt + 1))
+
+    return await asyncio.gather(*(run(i, p) for i, p in enumerate(pieces)))
+
+
+def stitch_speech(results, audio_path, bitrate=MP3_BITRATE):
+    """Joins per-piece results into one track, shifting word timings by the audio before them.
+
+    edge-tts MP3 is headerless CBR, so the pieces are joined byte for byte and
+    each piece's length follows from its size.
+    """
+    words = []
+    offset = 0.0
+    tmp_path = audio_path + ".part"
+    with open(tmp_path, "wb") as out:
+        for result in results:
+            with open(result.audio_path, "rb") as f:
+                shutil.copyfileobj(f, out)
+            words.extend(WordTiming(w.word, w.start + offset, w.duration) for w in result.words)
+            offset += audio_seconds(result.audio_path, bitrate)
+    os.replace(tmp_path, audio_path)
+
+    duration = offset
+    if words:
+        duration = max(duration, words[-1].end)
+    return SpeechResult(audio_path, words, duration)
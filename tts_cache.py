@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from tts import SpeechResult, WordTiming
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _atomic_write_bytes(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+
+
+def atomic_link_or_copy(src, dst):
+    """Publishes src at dst in one step; a hard link when possible, else a copy."""
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return  # Already linked; replacing a file with itself would leave the temporary link behind
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst) or ".", suffix=".tmp")
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+        if os.path.exists(tmp_path): os.remove(tmp_path)  # dst was linked to src in the meantime
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+
+
+class TTSCache:
+    """On-disk cache of synthesized speech (audio + word timings), keyed by content.
+
+    Entries are `<key>.mp3` plus `<key>.json`; the JSON is written last, so an
+    entry only becomes visible once complete. Every file is published with an
+    atomic rename, which lets several processes share one directory. Reads
+    refresh an entry's mtime and writes evict the least recently used entries
+    until the directory fits in max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(text, voice, rate_str, source="edge-tts"):
+        """Content hash of everything that determines the synthesized audio."""
+        payload = json.dumps([source, voice, rate_str, text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".mp3", base + ".json"
+
+    def get(self, key, audio_path):
+        """Materializes a cached entry at audio_path and returns it, or None on a miss."""
+        cached_audio, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            atomic_link_or_copy(cached_audio, audio_path)
+        except (OSError, ValueError):
+            return None
+
+        for path in (cached_audio, meta_path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        words = [WordTiming(w, s, d) for w, s, d in meta["words"]]
+        return SpeechResult(audio_path, words, meta["duration"])
+
+    def put(self, key, speech):
+        """Stores a synthesized result, then evicts old entries to honour max_bytes."""
+        cached_audio, meta_path = self._paths(key)
+        atomic_link_or_copy(speech.audio_path, cached_audio)
+        meta = {
+            "duration": speech.duration,
+            "words": [[w.word, w.start, w.duration] for w in speech.words],
+        }
+        _atomic_write_bytes(meta_path, json.dumps(meta).encode("utf-8"))
+        self.evict()
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes."""
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext not in (".mp3", ".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue  # Removed by another worker
+            size, mtime = entries.get(key, (0, 0))
+            entries[key] = (size + st.st_size, max(mtime, st.st_mtime))
+
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            # Metadata first, so readers never see an entry without its audio
+            for path in reversed(self._paths(key)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
@@ -1,4 +1,6 @@
+import os
 import re
+from functools import lru_cache
 
 def hex_to_rgb(hex_color):
     """Converts hex color string to RGB tuple."""
@@ -19,3 +21,19 @@ def split_text_into_chunks(text, max_words=5):
     for i in range(0, len(words), max_words):
         chunks.append(" ".join(words[i:i + max_words]))
     return chunks
+
+
+@lru_cache(maxsize=None)
+def ffmpeg_binary():
+    """The ffmpeg executable, resolved once per process.
+
+    Same choice as moviepy.config (FFMPEG_BINARY, else imageio-ffmpeg's
+    bundled binary) without importing moviepy.
+    """
+    binary = os.getenv("FFMPEG_BINARY", "ffmpeg-imageio")
+    if binary == "ffmpeg-imageio":
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    if binary == "auto-detect":
+        return "ffmpeg"
+    return binary